@@ -11,10 +11,10 @@ class ReciterAdmin(admin.ModelAdmin):
 @admin.register(ChapterAudio)
 class ChapterAudioAdmin(admin.ModelAdmin):
     list_display = ('chapter', 'reciter', 'duration_seconds', 'created_at')
-    list_filter = ('chapter__book__tenant', 'reciter__tenant', 'created_at')
+    list_filter = ('tenant', 'reciter__tenant', 'created_at')
     search_fields = ('chapter__title', 'reciter__name')
 
 @admin.register(AudioTimestamp)
 class AudioTimestampAdmin(admin.ModelAdmin):
     list_display = ('verse', 'chapter_audio', 'start_time', 'end_time')
-    list_filter = ('chapter_audio__chapter__book__tenant',)
\ No newline at end of file
+    list_filter = ('tenant',)
\ No newline at end of file
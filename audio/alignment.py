@@ -0,0 +1,107 @@
+import numpy as np
+from .media import decode_audio
+
+# Length of the analysis frames, in seconds
+FRAME_SECONDS = 0.02
+# Frames quieter than the loud level (90th percentile) minus this are silent
+SILENCE_RANGE_DB = 25.0
+# Shortest silence treated as a pause between verses, in seconds
+MIN_PAUSE_SECONDS = 0.3
+
+
+def frame_energy(path, frame_seconds=FRAME_SECONDS):
+    """
+    RMS level in dBFS of every ``frame_seconds`` frame of an audio file,
+    computed block by block with vectorized NumPy.
+    """
+    blocks, rate = decode_audio(path)
+    frame = max(1, int(rate * frame_seconds))
+    levels = []
+    carry = np.empty(0, dtype=np.float32)
+    for block in blocks:
+        block = np.concatenate((carry, block))
+        whole = len(block) // frame * frame
+        if whole:
+            frames = block[:whole].reshape(-1, frame)
+            levels.append(np.sqrt(np.mean(frames * frames, axis=1)))
+        carry = block[whole:]
+    if len(carry):
+        levels.append(np.array([np.sqrt(np.mean(carry * carry))]))
+    rms = np.concatenate(levels) if levels else np.empty(0)
+    return 20 * np.log10(np.maximum(rms, 1e-10)), frame / rate
+
+
+def detect_pauses(levels, frame_seconds, min_pause=MIN_PAUSE_SECONDS, silence_range=SILENCE_RANGE_DB):
+    """
+    ``(start, end)`` seconds of the silent runs of at least ``min_pause``
+    seconds in a frame level array. The silence threshold is relative to
+    the recording's loud level, so it adapts to the recording gain.
+    """
+    if not len(levels):
+        return []
+    silent = levels < np.percentile(levels, 90) - silence_range
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+    keep = (ends - starts) * frame_seconds >= min_pause
+    return [(int(start) * frame_seconds, int(end) * frame_seconds) for start, end in zip(starts[keep], ends[keep])]
+
+
+def align_verses(pauses, duration, weights):
+    """
+    Split ``[0, duration]`` into one ``(start, end)`` span per verse at the
+    given pauses.
+
+    Verse lengths are expected to be proportional to ``weights`` (e.g. the
+    length of their text). The boundaries are matched to the pauses nearest
+    to those expected positions in order, by dynamic programming, so pauses
+    inside a verse are skipped; a boundary without a suitable pause costs one
+    average verse length and is placed at its expected position.
+    """
+    count = len(weights)
+    if not count:
+        return []
+    start, end = 0.0, duration
+    internal = []
+    for pause_start, pause_end in pauses:
+        if pause_start <= 0:
+            start = pause_end
+        elif pause_end >= duration:
+            end = pause_start
+        else:
+            internal.append((pause_start, pause_end))
+    if end <= start:
+        start, end = 0.0, duration
+
+    weights = np.maximum(np.asarray(weights, dtype=float), 1)
+    targets = start + np.cumsum(weights)[:-1] / weights.sum() * (end - start)
+    mids = np.array([(a + b) / 2 for a, b in internal])
+    miss = (end - start) / count
+
+    # costs[k][j]: lowest cost of the first k boundaries using only pauses before j
+    costs = [np.zeros(len(mids) + 1)]
+    takes = []
+    for target in targets:
+        take = costs[-1][:-1] + np.abs(mids - target)
+        takes.append(take)
+        costs.append(np.minimum(costs[-1] + miss, np.concatenate(([np.inf], np.minimum.accumulate(take)))))
+
+    boundaries = []
+    available = len(mids)
+    for index in range(len(targets) - 1, -1, -1):
+        take = takes[index][:available]
+        if len(take) and take.min() <= costs[index + 1][available] + 1e-9:
+            pause = int(np.argmin(take))
+            boundaries.append(internal[pause])
+            available = pause
+        else:
+            boundaries.append((float(targets[index]),) * 2)
+    boundaries.reverse()
+
+    spans = []
+    previous = start
+    for index in range(count):
+        verse_end = boundaries[index][0] if index < len(boundaries) else end
+        spans.append((round(previous, 3), round(max(previous, verse_end), 3)))
+        if index < len(boundaries):
+            previous = max(previous, boundaries[index][1])
+    return spans
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from django.db import transaction
+from django.utils import timezone
+from books.models import Verse
+from core.content_cache import bump_content_version_on_commit
+from core.jobs import job
+from .alignment import align_verses, detect_pauses, frame_energy
+from .media import analyze_audio
+from .models import AudioTimestamp, AudioWaveform, ChapterAudio
+from .tracks import rebuild_track
+
+
+@contextmanager
+def local_audio_path(audio):
+    """Filesystem path of ``audio.file``, downloading it first from remote storage"""
+    try:
+        yield audio.file.path
+        return
+    except NotImplementedError:
+        pass
+    suffix = os.path.splitext(audio.file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as handle:
+        with audio.file.open('rb') as source:
+            shutil.copyfileobj(source, handle, 1 << 20)
+        handle.flush()
+        yield handle.name
+
+
+@job('audio.analyze')
+def analyze_chapter_audio(payload):
+    """Compute and store duration, bitrate, loudness and waveform peaks of a ChapterAudio file"""
+    audio = ChapterAudio.unscoped.filter(id=payload['chapter_audio']).first()
+    if audio is None or not audio.file:
+        return None
+    with local_audio_path(audio) as path:
+        analysis = analyze_audio(path)
+
+    ChapterAudio.unscoped.filter(id=audio.id).update(
+        duration_seconds=round(analysis['duration']),
+        bitrate=analysis['bitrate'],
+        loudness_db=analysis['loudness_db'],
+        analyzed_at=timezone.now(),
+    )
+    if analysis['peaks'] is not None:
+        AudioWaveform.unscoped.update_or_create(chapter_audio=audio, defaults={'peaks': analysis['peaks']})
+    bump_content_version_on_commit(audio.tenant_id, 'audio')
+    return {key: value for key, value in analysis.items() if key != 'peaks'}
+
+
+@job('audio.align')
+def align_chapter_audio(payload):
+    """
+    Propose AudioTimestamp rows for every verse of a ChapterAudio's chapter
+    from the pauses in its file, and write them with one upsert. Existing
+    timestamps are kept unless ``overwrite`` is set in the payload.
+    """
+    audio = ChapterAudio.unscoped.filter(id=payload['chapter_audio']).first()
+    if audio is None or not audio.file:
+        return None
+    if not payload.get('overwrite') and audio.timestamps.exists():
+        return {'skipped': 'timestamps exist'}
+    verses = list(Verse.unscoped.filter(chapter_id=audio.chapter_id).order_by('number').values_list('id', 'text'))
+    with local_audio_path(audio) as path:
+        levels, frame_seconds = frame_energy(path)
+    pauses = detect_pauses(levels, frame_seconds, **{
+        key: payload[key] for key in ('min_pause', 'silence_range') if key in payload
+    })
+    spans = align_verses(pauses, len(levels) * frame_seconds, [len(text.strip()) for _, text in verses])
+
+    timestamps = [
+        AudioTimestamp(chapter_audio=audio, verse_id=verse_id, start_time=start, end_time=end)
+        for (verse_id, _), (start, end) in zip(verses, spans)
+    ]
+    with transaction.atomic():
+        # Bulk writes skip the signals: rebuild the track and bump the version here
+        AudioTimestamp.unscoped.bulk_create(
+            timestamps,
+            update_conflicts=True,
+            unique_fields=['chapter_audio', 'verse'],
+            update_fields=['start_time', 'end_time'],
+        )
+        rebuild_track(audio.id)
+        bump_content_version_on_commit(audio.tenant_id, 'audio')
+    return {'verses': len(timestamps), 'pauses': len(pauses)}
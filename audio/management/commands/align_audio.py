@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.management.base import BaseCommand, CommandError
+from core import job_process
+from core.jobs import enqueue, get_handler
+from audio.models import ChapterAudio
+
+class Command(BaseCommand):
+    help = 'Propose verse timestamps of chapter audios from the pauses in their files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help='ChapterAudio ids (default: all with a file)')
+        parser.add_argument('--reciter', type=int, help='Only audios of this reciter')
+        parser.add_argument('--book', type=int, help='Only audios of chapters of this book')
+        parser.add_argument('--overwrite', action='store_true', help='Replace existing timestamps')
+        parser.add_argument('--min-pause', type=float, help='Shortest pause between verses, in seconds')
+        parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: CPU count, 0: run in this process)')
+        parser.add_argument('--enqueue', action='store_true', help='Queue jobs for runjobs instead of aligning now')
+
+    def handle(self, *args, **options):
+        audios = ChapterAudio.objects.exclude(file='').exclude(file__isnull=True)
+        if options['ids']:
+            audios = audios.filter(id__in=options['ids'])
+        if options['reciter']:
+            audios = audios.filter(reciter_id=options['reciter'])
+        if options['book']:
+            audios = audios.filter(chapter__book_id=options['book'])
+        tenants = dict(audios.order_by('id').values_list('id', 'tenant_id'))
+        ids = list(tenants)
+        if not ids:
+            raise CommandError('No chapter audio with a file matches')
+
+        extra = {'overwrite': options['overwrite']}
+        if options['min_pause'] is not None:
+            extra['min_pause'] = options['min_pause']
+        payloads = [{'chapter_audio': audio_id, **extra} for audio_id in ids]
+
+        if options['enqueue']:
+            for payload in payloads:
+                enqueue('audio.align', payload, tenant=tenants[payload['chapter_audio']])
+            self.stdout.write(self.style.SUCCESS(f'Queued {len(payloads)} alignment jobs'))
+            return
+
+        processes = os.cpu_count() if options['processes'] is None else options['processes']
+        failed = 0
+        for audio_id, result, error in self._run(payloads, processes):
+            if error is not None:
+                failed += 1
+                self.stderr.write(f'Audio {audio_id}: {error}')
+            elif result and 'verses' in result:
+                self.stdout.write(f'Audio {audio_id}: {result["verses"]} verses aligned ({result["pauses"]} pauses)')
+            else:
+                self.stdout.write(f'Audio {audio_id}: skipped')
+        self.stdout.write(self.style.SUCCESS(f'Aligned {len(payloads) - failed} of {len(payloads)} audios'))
+
+    def _run(self, payloads, processes):
+        """Yield ``(chapter_audio id, result, error)``, in a spawned process pool unless ``processes`` is 0"""
+        if not processes:
+            handler = get_handler('audio.align')
+            for payload in payloads:
+                try:
+                    yield payload['chapter_audio'], handler(payload), None
+                except Exception as exc:
+                    yield payload['chapter_audio'], None, exc
+            return
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=job_process.setup) as pool:
+            futures = {pool.submit(job_process.call, 'audio.align', payload): payload['chapter_audio'] for payload in payloads}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as exc:
+                    yield futures[future], None, exc
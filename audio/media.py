@@ -0,0 +1,301 @@
+import math
+import os
+import shutil
+import struct
+import subprocess
+import wave
+import numpy as np
+
+# MPEG audio header tables, indexed by (version, layer)
+MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+MP3_VERSIONS = {0b00: 2.5, 0b10: 2, 0b11: 1}
+MP3_LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+
+
+def parse_mp3_header(header):
+    """
+    Decode a 4-byte MPEG audio frame header into
+    ``(frame_length, samples, sample_rate, bitrate_kbps)``, or None.
+    """
+    value = struct.unpack('>I', header)[0]
+    if value >> 21 != 0x7FF:
+        return None
+    version = MP3_VERSIONS.get((value >> 19) & 0b11)
+    layer = MP3_LAYERS.get((value >> 17) & 0b11)
+    bitrate_index = (value >> 12) & 0xF
+    rate_index = (value >> 10) & 0b11
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index]
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = (value >> 9) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        samples = 576 if layer == 3 and version != 1 else 1152
+        length = samples // 8 * bitrate * 1000 // sample_rate + padding
+    return length, samples, sample_rate, bitrate
+
+
+class DurationProbe:
+    """
+    Incremental duration/bitrate detection for MP3 and WAV data.
+
+    Bytes are fed in arbitrary chunks as they arrive. For MP3 the frame
+    headers are walked and frame bodies skipped without buffering; for WAV
+    only the header is kept, until the ``data`` chunk starts. Memory use is
+    bounded by a few bytes of carry-over between chunks.
+    """
+
+    MAX_WAV_HEADER = 64 * 1024
+
+    def __init__(self):
+        self.kind = None
+        self.total = 0
+        self._pending = b''
+        self._skip = 0
+        # MP3 state
+        self.samples = 0
+        self.sample_rate = None
+        self.frame_bytes = 0
+        # WAV state
+        self._header = b''
+        self.byte_rate = None
+        self.data_size = None
+        self.data_start = None
+
+    def feed(self, chunk):
+        self.total += len(chunk)
+        if self.kind == 'unknown' or (self.kind == 'wav' and self.data_start is not None):
+            return
+        data = self._pending + chunk
+        self._pending = b''
+        if self._skip:
+            skipped = min(self._skip, len(data))
+            self._skip -= skipped
+            data = data[skipped:]
+        if self.kind is None:
+            if len(data) < 12:
+                self._pending = data
+                return
+            if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+                self.kind = 'wav'
+            else:
+                self.kind = 'mp3'
+                if data[:3] == b'ID3':
+                    tag_size = 10 + sum((byte & 0x7F) << (7 * (3 - index)) for index, byte in enumerate(data[6:10]))
+                    data = self._skip_bytes(data, tag_size)
+        if self.kind == 'wav':
+            self._feed_wav(data)
+        else:
+            self._feed_mp3(data)
+
+    def _skip_bytes(self, data, count):
+        if count > len(data):
+            self._skip = count - len(data)
+            return b''
+        return data[count:]
+
+    def _feed_mp3(self, data):
+        position = 0
+        end = len(data)
+        while position + 4 <= end:
+            frame = parse_mp3_header(data[position:position + 4])
+            if frame is None or frame[0] < 4:
+                # Resynchronise on the next possible frame start
+                next_sync = data.find(b'\xff', position + 1)
+                position = end if next_sync < 0 else next_sync
+                continue
+            length, samples, sample_rate, _ = frame
+            self.samples += samples
+            self.sample_rate = self.sample_rate or sample_rate
+            self.frame_bytes += length
+            if position + length > end:
+                self._skip = position + length - end
+                return
+            position += length
+        self._pending = data[position:]
+
+    def _feed_wav(self, data):
+        # The header is small: accumulate it until the data chunk starts
+        self._header += data
+        header = self._header
+        position = 12
+        while position + 8 <= len(header):
+            chunk_id = header[position:position + 4]
+            size = struct.unpack('<I', header[position + 4:position + 8])[0]
+            if chunk_id == b'data':
+                self.data_size = size
+                self.data_start = position + 8
+                self._header = b''
+                return
+            if chunk_id == b'fmt ' and position + 20 <= len(header):
+                self.byte_rate = struct.unpack('<I', header[position + 16:position + 20])[0]
+            position += 8 + size + (size & 1)
+        if len(header) > self.MAX_WAV_HEADER:
+            self.kind, self._header = 'unknown', b''
+
+    @property
+    def duration(self):
+        """Duration in seconds, or None if the format was not recognised"""
+        if self.kind == 'mp3' and self.sample_rate:
+            return self.samples / self.sample_rate
+        if self.kind == 'wav' and self.byte_rate and self.data_start is not None:
+            size = self.data_size
+            if size in (None, 0, 0xFFFFFFFF) or size > self.total - self.data_start:
+                size = self.total - self.data_start
+            return size / self.byte_rate
+        return None
+
+    @property
+    def bitrate(self):
+        """Average bitrate in bits per second, or None"""
+        duration = self.duration
+        if not duration:
+            return None
+        if self.kind == 'wav':
+            return self.byte_rate * 8
+        return round(self.frame_bytes * 8 / duration)
+
+
+class UnsupportedAudio(Exception):
+    """Raised when audio data cannot be decoded to PCM"""
+
+
+# Samples per second decoded for analysis, and samples per decoding block
+ANALYSIS_SAMPLE_RATE = 16000
+BLOCK_SECONDS = 10
+
+
+def _wav_blocks(path):
+    """Mono float32 blocks of a PCM WAV file, plus its sample rate"""
+    try:
+        reader = wave.open(path, 'rb')
+    except (wave.Error, EOFError) as exc:
+        raise UnsupportedAudio(str(exc))
+    channels, width, rate = reader.getnchannels(), reader.getsampwidth(), reader.getframerate()
+    if width not in (1, 2, 4):
+        reader.close()
+        raise UnsupportedAudio(f'Unsupported sample width: {width * 8} bits')
+
+    def blocks():
+        with reader:
+            while True:
+                frames = reader.readframes(rate * BLOCK_SECONDS)
+                if not frames:
+                    return
+                if width == 1:
+                    samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+                else:
+                    dtype = np.int16 if width == 2 else np.int32
+                    samples = np.frombuffer(frames, dtype=f'<i{width}').astype(np.float32) / np.iinfo(dtype).max
+                yield samples.reshape(-1, channels).mean(axis=1)
+
+    return blocks(), rate
+
+
+def _ffmpeg_blocks(path):
+    """Mono float32 blocks decoded by ffmpeg (any format it reads)"""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise UnsupportedAudio('ffmpeg is not installed')
+    rate = ANALYSIS_SAMPLE_RATE
+
+    def blocks():
+        process = subprocess.Popen(
+            [ffmpeg, '-v', 'error', '-i', path, '-f', 's16le', '-ac', '1', '-ar', str(rate), '-'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                data = process.stdout.read(rate * BLOCK_SECONDS * 2)
+                if not data:
+                    break
+                yield np.frombuffer(data[:len(data) // 2 * 2], dtype='<i2').astype(np.float32) / 32767
+        finally:
+            process.stdout.close()
+            if process.wait() != 0:
+                raise UnsupportedAudio('ffmpeg could not decode the file')
+
+    return blocks(), rate
+
+
+def decode_audio(path):
+    """
+    Decode ``path`` into mono float32 sample blocks in [-1, 1]: WAV files
+    with the standard library, anything else through ffmpeg. Returns
+    ``(blocks, sample_rate)``; blocks are bounded in size, so memory does
+    not grow with the file.
+    """
+    with open(path, 'rb') as handle:
+        magic = handle.read(12)
+    if magic[:4] == b'RIFF' and magic[8:12] == b'WAVE':
+        return _wav_blocks(path)
+    return _ffmpeg_blocks(path)
+
+
+def _reduce_peaks(windows, count):
+    """Downsample per-window peaks to ``count`` buckets of one byte each"""
+    if not len(windows):
+        return b''
+    buckets = np.array_split(windows, min(count, len(windows)))
+    peaks = np.array([bucket.max() for bucket in buckets])
+    return np.clip(np.round(peaks * 255), 0, 255).astype(np.uint8).tobytes()
+
+
+def analyze_audio(path, peak_count=1000, window_seconds=0.02):
+    """
+    Duration, average bitrate, RMS loudness (dBFS) and ``peak_count``
+    waveform peaks of an audio file.
+
+    Samples are processed block by block with vectorized NumPy: a running
+    sum of squares for loudness and the absolute peak of every
+    ``window_seconds`` window, reduced to ``peak_count`` buckets at the end.
+    Without a decoder for the format (e.g. MP3 without ffmpeg) only the
+    duration and bitrate from the frame headers are returned.
+    """
+    size = os.path.getsize(path)
+    try:
+        blocks, rate = decode_audio(path)
+        window = max(1, int(rate * window_seconds))
+        samples = 0
+        squares = 0.0
+        windows = []
+        carry = np.empty(0, dtype=np.float32)
+        for block in blocks:
+            samples += len(block)
+            squares += float(np.dot(block, block))
+            block = np.abs(np.concatenate((carry, block)))
+            whole = len(block) // window * window
+            if whole:
+                windows.append(block[:whole].reshape(-1, window).max(axis=1))
+            carry = block[whole:]
+        if len(carry):
+            windows.append(np.array([carry.max()]))
+    except UnsupportedAudio:
+        probe = DurationProbe()
+        with open(path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b''):
+                probe.feed(chunk)
+        if probe.duration is None:
+            raise
+        return {'duration': probe.duration, 'bitrate': probe.bitrate, 'loudness_db': None, 'peaks': None}
+
+    duration = samples / rate if rate else 0
+    rms = math.sqrt(squares / samples) if samples else 0
+    return {
+        'duration': duration,
+        'bitrate': round(size * 8 / duration) if duration else None,
+        'loudness_db': round(20 * math.log10(rms), 2) if rms else None,
+        'peaks': _reduce_peaks(np.concatenate(windows) if windows else np.empty(0), peak_count),
+    }
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_tenant(apps, schema_editor):
+    Chapter = apps.get_model('books', 'Chapter')
+    ChapterAudio = apps.get_model('audio', 'ChapterAudio')
+    AudioTimestamp = apps.get_model('audio', 'AudioTimestamp')
+    # books may already be past 0008_tenant_managers, whose models have no 'objects'
+    ChapterAudio.objects.update(tenant=Subquery(Chapter._default_manager.filter(pk=OuterRef('chapter')).values('tenant')[:1]))
+    AudioTimestamp.objects.update(tenant=Subquery(ChapterAudio.objects.filter(pk=OuterRef('chapter_audio')).values('tenant')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio', '0002_reciter_tenant_alter_chapteraudio_unique_together_and_more'),
+        ('books', '0003_chapter_tenant_verse_tenant'),
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiotimestamp',
+            name='tenant',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='chapteraudio',
+            name='tenant',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.tenant'),
+        ),
+        migrations.RunPython(backfill_tenant, migrations.RunPython.noop),
+    ]
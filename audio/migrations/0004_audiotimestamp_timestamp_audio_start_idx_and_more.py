@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio', '0003_audiotimestamp_tenant_chapteraudio_tenant'),
+        ('books', '0003_chapter_tenant_verse_tenant'),
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audiotimestamp',
+            index=models.Index(fields=['chapter_audio', 'start_time'], name='timestamp_audio_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chapteraudio',
+            index=models.Index(fields=['tenant', 'chapter', 'reciter'], name='chapteraudio_tenant_order_idx'),
+        ),
+    ]
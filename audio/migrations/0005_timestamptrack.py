@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_tracks(apps, schema_editor):
+    from audio.tracks import encode_track
+
+    AudioTimestamp = apps.get_model('audio', 'AudioTimestamp')
+    TimestampTrack = apps.get_model('audio', 'TimestampTrack')
+    tracks = {}
+    rows = (
+        AudioTimestamp.objects.order_by('chapter_audio', 'start_time', 'verse__number')
+        .values_list('chapter_audio', 'verse__number', 'start_time', 'end_time')
+    )
+    for chapter_audio_id, verse, start, end in rows.iterator():
+        tracks.setdefault(chapter_audio_id, []).append((verse, start, end))
+    TimestampTrack.objects.bulk_create(
+        [
+            TimestampTrack(chapter_audio_id=chapter_audio_id, data=encode_track(track), verse_count=len(track))
+            for chapter_audio_id, track in tracks.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio', '0004_audiotimestamp_timestamp_audio_start_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimestampTrack',
+            fields=[
+                ('chapter_audio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='track', serialize=False, to='audio.chapteraudio')),
+                ('data', models.BinaryField()),
+                ('verse_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(build_tracks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio', '0006_audioupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioWaveform',
+            fields=[
+                ('chapter_audio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='waveform', serialize=False, to='audio.chapteraudio')),
+                ('peaks', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='chapteraudio',
+            name='analyzed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chapteraudio',
+            name='bitrate',
+            field=models.PositiveIntegerField(blank=True, help_text='Average bitrate in bits per second', null=True),
+        ),
+        migrations.AddField(
+            model_name='chapteraudio',
+            name='loudness_db',
+            field=models.FloatField(blank=True, help_text='RMS loudness in dBFS', null=True),
+        ),
+    ]
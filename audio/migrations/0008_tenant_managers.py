@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:12
+
+import django.db.models.manager
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio', '0007_chapteraudio_analysis'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='audiotimestamp',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='audioupload',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='audiowaveform',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='chapteraudio',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='reciter',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='timestamptrack',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
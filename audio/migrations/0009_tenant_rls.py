@@ -0,0 +1,20 @@
+from django.db import migrations
+from core.rls import TenantRLS
+
+
+class Migration(migrations.Migration):
+    """Row-level security policies for the optional TENANT_RLS mode (PostgreSQL only, see core.rls)"""
+
+    dependencies = [
+        ('audio', '0008_tenant_managers'),
+        ('books', '0009_tenant_rls'),
+    ]
+
+    operations = [
+        TenantRLS('reciter'),
+        TenantRLS('chapteraudio'),
+        TenantRLS('audiotimestamp'),
+        TenantRLS('audioupload'),
+        TenantRLS('timestamptrack', parent='chapter_audio'),
+        TenantRLS('audiowaveform', parent='chapter_audio'),
+    ]
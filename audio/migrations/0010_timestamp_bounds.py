@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:32
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio', '0009_tenant_rls'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='audiotimestamp',
+            name='end_time',
+            field=models.FloatField(blank=True, help_text='End time in seconds', null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(4294967)]),
+        ),
+        migrations.AlterField(
+            model_name='audiotimestamp',
+            name='start_time',
+            field=models.FloatField(help_text='Start time in seconds', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(4294967)]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio', '0010_timestamp_bounds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audioupload',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,6 +1,10 @@
+import os
+import uuid
+from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from books.models import Chapter, Verse
-from core.models import Tenant
+from core.models import InheritedTenantModel, Tenant, TenantManager, UnscopedTenantManager
 
 
 class Reciter(models.Model):
@@ -10,6 +14,9 @@ class Reciter(models.Model):
     bio = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    unscoped = UnscopedTenantManager()
+    objects = TenantManager()
+
     class Meta:
         unique_together = ('tenant', 'name')
 
@@ -17,29 +24,121 @@ class Reciter(models.Model):
         return self.name
 
 
-class ChapterAudio(models.Model):
+class ChapterAudio(InheritedTenantModel):
+    tenant_parent = "chapter"
+
     chapter = models.ForeignKey(Chapter, on_delete=models.CASCADE, related_name="audios")
     reciter = models.ForeignKey(Reciter, on_delete=models.CASCADE, related_name="audios")
     external_url = models.URLField(blank=True, null=True)
     file = models.FileField(upload_to="chapter_audios/", blank=True, null=True)
     duration_seconds = models.PositiveIntegerField(null=True, blank=True)
+    bitrate = models.PositiveIntegerField(null=True, blank=True, help_text="Average bitrate in bits per second")
+    loudness_db = models.FloatField(null=True, blank=True, help_text="RMS loudness in dBFS")
+    analyzed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ("chapter", "reciter")
+        indexes = [
+            # Tenant-scoped audio list in (chapter, reciter) order
+            models.Index(fields=["tenant", "chapter", "reciter"], name="chapteraudio_tenant_order_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored file so a new upload can be analyzed
+        instance._loaded_file = instance.__dict__.get('file') or None
+        return instance
 
     def __str__(self):
         return f"{self.chapter.title} - {self.reciter.name}"
 
 
-class AudioTimestamp(models.Model):
+# Packed tracks store times as uint32 milliseconds (see audio.tracks)
+MAX_TIMESTAMP_SECONDS = 4294967
+
+
+class AudioTimestamp(InheritedTenantModel):
+    tenant_parent = "chapter_audio"
+
     chapter_audio = models.ForeignKey(ChapterAudio, on_delete=models.CASCADE, related_name="timestamps")
     verse = models.ForeignKey(Verse, on_delete=models.CASCADE, related_name="timestamps")
-    start_time = models.FloatField(help_text="Start time in seconds")
-    end_time = models.FloatField(help_text="End time in seconds", null=True, blank=True)
+    start_time = models.FloatField(
+        help_text="Start time in seconds",
+        validators=[MinValueValidator(0), MaxValueValidator(MAX_TIMESTAMP_SECONDS)],
+    )
+    end_time = models.FloatField(
+        help_text="End time in seconds",
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0), MaxValueValidator(MAX_TIMESTAMP_SECONDS)],
+    )
 
     class Meta:
         unique_together = ("chapter_audio", "verse")
+        indexes = [
+            # A recitation's track in playback order
+            models.Index(fields=["chapter_audio", "start_time"], name="timestamp_audio_start_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.chapter_audio} - Verse {self.verse.number}"
+
+class TimestampTrack(models.Model):
+    """
+    Packed copy of a recitation's AudioTimestamp rows (see audio.tracks),
+    kept in sync by the AudioTimestamp signals.
+    """
+    chapter_audio = models.OneToOneField(ChapterAudio, on_delete=models.CASCADE, primary_key=True, related_name="track")
+    data = models.BinaryField()
+    verse_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    unscoped = UnscopedTenantManager()
+    objects = TenantManager()
+
+    def __str__(self):
+        return f"Track of {self.chapter_audio_id} ({self.verse_count} verses)"
+
+
+class AudioWaveform(models.Model):
+    """Downsampled waveform peaks of a ChapterAudio file, one byte (0-255) per bucket"""
+    chapter_audio = models.OneToOneField(ChapterAudio, on_delete=models.CASCADE, primary_key=True, related_name="waveform")
+    peaks = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    unscoped = UnscopedTenantManager()
+    objects = TenantManager()
 
     def __str__(self):
-        return f"{self.chapter_audio} - Verse {self.verse.number}"
\ No newline at end of file
+        return f"Waveform of {self.chapter_audio_id} ({len(self.peaks)} peaks)"
+
+
+class AudioUpload(InheritedTenantModel):
+    """
+    A resumable chunked upload of a ChapterAudio file (see audio.uploads).
+    Chunks are appended to ``temp_path`` until ``offset`` reaches ``size``.
+    """
+    tenant_parent = "chapter_audio"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    chapter_audio = models.ForeignKey(ChapterAudio, on_delete=models.CASCADE, related_name="uploads")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Total size in bytes")
+    offset = models.PositiveBigIntegerField(default=0, help_text="Bytes received so far")
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # Set while a request streams a chunk into the partial file
+    locked_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def temp_path(self):
+        directory = settings.AUDIO_UPLOAD_TEMP_DIR or os.path.join(settings.MEDIA_ROOT, 'tmp_uploads')
+        return os.path.join(directory, f'{self.id}.part')
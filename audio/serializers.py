@@ -1,5 +1,7 @@
+import os
+from django.conf import settings
 from rest_framework import serializers
-from .models import Reciter, ChapterAudio, AudioTimestamp
+from .models import Reciter, ChapterAudio, AudioTimestamp, AudioUpload
 from books.models import Chapter
 
 
@@ -14,14 +16,14 @@ class ChapterAudioSerializer(serializers.ModelSerializer):
     reciter = ReciterSerializer(read_only=True)
     # write-only field to set reciter by id
     reciter_id = serializers.PrimaryKeyRelatedField(
-        queryset=Reciter.objects.all(),
+        queryset=Reciter.objects,
         source='reciter',
         write_only=True,
         required=False,
     )
     # write-only field to set chapter by id
     chapter_id = serializers.PrimaryKeyRelatedField(
-        queryset=Chapter.objects.all(),
+        queryset=Chapter.objects,
         source='chapter',
         write_only=True,
         required=True,
@@ -32,9 +34,10 @@ class ChapterAudioSerializer(serializers.ModelSerializer):
         # use actual model field names; include external_url and created_at for convenience
         fields = [
             'id', 'reciter', 'reciter_id', 'chapter', 'chapter_id',
-            'external_url', 'file', 'duration_seconds', 'created_at'
+            'external_url', 'file', 'duration_seconds', 'bitrate', 'loudness_db',
+            'analyzed_at', 'created_at'
         ]
-        read_only_fields = ['id', 'reciter', 'chapter', 'created_at']
+        read_only_fields = ['id', 'reciter', 'chapter', 'bitrate', 'loudness_db', 'analyzed_at', 'created_at']
 
 
 class AudioTimestampSerializer(serializers.ModelSerializer):
@@ -42,3 +45,28 @@ class AudioTimestampSerializer(serializers.ModelSerializer):
         model = AudioTimestamp
         fields = "__all__"
 
+    def validate(self, attrs):
+        # On partial updates the other bound comes from the stored row
+        start = attrs.get('start_time', getattr(self.instance, 'start_time', None))
+        end = attrs.get('end_time', getattr(self.instance, 'end_time', None))
+        if start is not None and end is not None and end < start:
+            raise serializers.ValidationError({'end_time': 'Must not be before start_time.'})
+        return attrs
+
+
+class AudioUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AudioUpload
+        fields = ['id', 'chapter_audio', 'filename', 'size', 'offset', 'sha256', 'created_at', 'completed_at']
+        read_only_fields = ['id', 'offset', 'sha256', 'created_at', 'completed_at']
+
+    def validate_filename(self, value):
+        value = os.path.basename(value.replace('\\', '/'))
+        if not value:
+            raise serializers.ValidationError('A file name is required.')
+        return value
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.AUDIO_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f'Must be between 1 and {settings.AUDIO_UPLOAD_MAX_SIZE} bytes.')
+        return value
@@ -0,0 +1,59 @@
+import os
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from books.models import Verse
+from core.content_cache import bump_content_version_on_commit
+from core.jobs import enqueue
+from .models import AudioTimestamp, AudioUpload, ChapterAudio, Reciter
+from .tracks import rebuild_track_on_commit
+
+
+@receiver(post_save, sender=AudioTimestamp)
+def update_track_on_timestamp_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rebuild_track_on_commit(instance.chapter_audio_id)
+
+
+@receiver(post_delete, sender=AudioTimestamp)
+def update_track_on_timestamp_delete(sender, instance, origin=None, **kwargs):
+    # Deleting the audio (or its chapter, book, reciter) removes the track too
+    if getattr(origin, 'model', type(origin)) not in (AudioTimestamp, Verse):
+        return
+    rebuild_track_on_commit(instance.chapter_audio_id)
+
+
+@receiver(post_save, sender=Reciter)
+@receiver(post_save, sender=ChapterAudio)
+@receiver(post_save, sender=AudioTimestamp)
+@receiver(post_delete, sender=Reciter)
+@receiver(post_delete, sender=ChapterAudio)
+@receiver(post_delete, sender=AudioTimestamp)
+def bump_audio_version(sender, instance, **kwargs):
+    """Invalidate the tenant's cached audio content"""
+    bump_content_version_on_commit(instance.tenant_id, 'audio')
+
+
+@receiver(post_save, sender=ChapterAudio)
+def analyze_new_audio_file(sender, instance, raw=False, **kwargs):
+    """Queue the background analysis whenever a new file is attached"""
+    if raw:
+        return
+    name = instance.file.name if instance.file else None
+    if name and name != getattr(instance, '_loaded_file', None):
+        enqueue('audio.analyze', {'chapter_audio': instance.id}, tenant=instance.tenant_id)
+    instance._loaded_file = name
+
+
+@receiver(post_delete, sender=AudioUpload)
+def remove_partial_upload(sender, instance, **kwargs):
+    path = instance.temp_path
+
+    def remove():
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    transaction.on_commit(remove)
@@ -0,0 +1,202 @@
+import mimetypes
+import os
+import re
+import uuid
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.negotiation import BaseContentNegotiation
+
+CHUNK_SIZE = 64 * 1024
+# More ranges than this are answered with the whole file
+MAX_RANGES = 16
+RANGE_SPEC = re.compile(r'^(\d*)-(\d*)$')
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    Media players send ``Accept: audio/*``; file responses bypass the
+    renderer anyway, so pick the first renderer (used for error bodies).
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+def parse_range_header(header, size):
+    """
+    Parse a ``Range: bytes=...`` header into sorted, coalesced inclusive
+    ``(start, end)`` pairs.
+
+    Returns None when the header should be ignored (absent, malformed, not
+    bytes, too many ranges) and an empty list when no range is satisfiable.
+    """
+    if not header:
+        return None
+    unit, _, specs = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not specs:
+        return None
+    ranges = []
+    for spec in specs.split(','):
+        match = RANGE_SPEC.match(spec.strip())
+        if not match or match.groups() == ('', ''):
+            return None
+        first, last = match.groups()
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                continue
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if last and int(last) < start:
+                return None
+        if start < size:
+            ranges.append((start, end))
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _if_range_matches(request, etag, last_modified):
+    """Whether a ``Range`` header may be honoured under ``If-Range``"""
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        # Strong comparison: weak validators never match
+        return value == etag
+    date = parse_http_date_safe(value)
+    return date is not None and date == last_modified
+
+
+def _read_ranges(path, ranges, parts=None):
+    """Yield the requested byte ranges with constant memory, optionally framed by multipart parts"""
+    with open(path, 'rb') as handle:
+        for index, (start, end) in enumerate(ranges):
+            if parts:
+                yield parts[index]
+            handle.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = handle.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+        if parts:
+            yield parts[-1]
+
+
+def serve_file(request, path, content_type=None):
+    """
+    Serve a local file with conditional GET and byte-range support.
+
+    Full responses use FileResponse, which servers with ``wsgi.file_wrapper``
+    send with ``sendfile``; partial responses stream the ranges in fixed-size
+    chunks, so worker memory does not grow with the file.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    content_type = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        response = not_modified
+    else:
+        ranges = parse_range_header(request.META.get('HTTP_RANGE'), size)
+        if ranges is not None and not _if_range_matches(request, etag, last_modified):
+            ranges = None
+        head = request.method == 'HEAD'
+
+        if ranges is None:
+            if head:
+                response = HttpResponse(content_type=content_type)
+                response['Content-Length'] = size
+            else:
+                response = FileResponse(open(path, 'rb'), content_type=content_type)
+        elif not ranges:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            response = StreamingHttpResponse(
+                [] if head else _read_ranges(path, ranges), status=206, content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+        else:
+            boundary = uuid.uuid4().hex
+            parts = []
+            for index, (start, end) in enumerate(ranges):
+                lead = '\r\n' if index else ''
+                parts.append((
+                    f'{lead}--{boundary}\r\n'
+                    f'Content-Type: {content_type}\r\n'
+                    f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+                ).encode())
+            parts.append(f'\r\n--{boundary}--\r\n'.encode())
+            length = sum(len(part) for part in parts) + sum(end - start + 1 for start, end in ranges)
+            response = StreamingHttpResponse(
+                [] if head else _read_ranges(path, ranges, parts),
+                status=206,
+                content_type=f'multipart/byteranges; boundary={boundary}',
+            )
+            response['Content-Length'] = length
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def accel_redirect_response(request, name, content_type=None):
+    """
+    Hand the transfer to the front proxy (nginx ``X-Accel-Redirect``), which
+    then handles ranges and conditional requests itself. The name is
+    percent-encoded: nginx decodes the URI, while Django would MIME-encode
+    a header holding non-latin-1 characters.
+    """
+    prefix = settings.AUDIO_X_ACCEL_REDIRECT_PREFIX.rstrip('/')
+    response = HttpResponse(content_type=content_type or mimetypes.guess_type(name)[0] or 'application/octet-stream')
+    response['X-Accel-Redirect'] = f'{prefix}/{quote(name.lstrip("/"))}'
+    return response
+
+
+def stream_audio(request, audio):
+    """
+    Response playing ``audio``: its uploaded file (ranges supported,
+    optionally offloaded to the proxy), a redirect to remote storage, or a
+    redirect to its ``external_url``.
+    """
+    if not audio.file:
+        if audio.external_url:
+            return HttpResponseRedirect(audio.external_url)
+        raise Http404
+    if getattr(settings, 'AUDIO_X_ACCEL_REDIRECT_PREFIX', ''):
+        return accel_redirect_response(request, audio.file.name)
+    try:
+        path = audio.file.path
+    except NotImplementedError:
+        # Remote storage (e.g. S3) serves ranges itself
+        return HttpResponseRedirect(audio.file.url)
+    return serve_file(request, path)
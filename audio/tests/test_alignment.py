@@ -0,0 +1,116 @@
+import io
+import wave
+import numpy as np
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from audio.alignment import align_verses, detect_pauses, frame_energy
+from audio.models import AudioTimestamp, TimestampTrack
+from audio.tests.factories import AudioTimestampFactory, ChapterAudioFactory
+from audio.tracks import decode_track
+from books.tests.factories import VerseFactory
+from core.models import Job
+
+RATE = 8000
+# (seconds, sound): three verses, the second with a short pause inside it
+SEGMENTS = [(0.5, False), (2.0, True), (0.6, False), (0.5, True), (0.4, False), (0.5, True), (0.6, False), (2.0, True), (0.5, False)]
+
+
+def make_recitation_wav(segments=SEGMENTS):
+    parts = []
+    for seconds, sound in segments:
+        count = int(seconds * RATE)
+        parts.append(np.sin(2 * np.pi * 220 * np.arange(count) / RATE) * 0.5 if sound else np.zeros(count))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(RATE)
+        writer.writeframes((np.concatenate(parts) * 32767).astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+class TestAlignment:
+    """
+    Unit tests for pause detection and verse alignment.
+    """
+
+    def test_detect_pauses(self, tmp_path):
+        """
+        Test that the silent runs of the recording are found.
+        """
+        path = tmp_path / 'recitation.wav'
+        path.write_bytes(make_recitation_wav())
+        levels, frame_seconds = frame_energy(str(path))
+        pauses = detect_pauses(levels, frame_seconds)
+
+        assert len(levels) * frame_seconds == pytest.approx(7.6)
+        expected = [(0, 0.5), (2.5, 3.1), (3.6, 4.0), (4.5, 5.1), (7.1, 7.6)]
+        assert len(pauses) == len(expected)
+        for (start, end), (expected_start, expected_end) in zip(pauses, expected):
+            assert start == pytest.approx(expected_start, abs=0.03)
+            assert end == pytest.approx(expected_end, abs=0.03)
+
+    def test_align_skips_pauses_inside_verses(self):
+        """
+        Test that boundaries take the pauses nearest to the text-weighted positions.
+        """
+        pauses = [(0, 0.5), (2.5, 3.1), (3.6, 4.0), (4.5, 5.1), (7.1, 7.6)]
+        spans = align_verses(pauses, 7.6, [20, 10, 20])
+        assert spans == [(0.5, 2.5), (3.1, 4.5), (5.1, 7.1)]
+
+    def test_align_without_enough_pauses(self):
+        """
+        Test that missing boundaries fall back to the expected positions.
+        """
+        assert align_verses([], 10, [1, 1]) == [(0.0, 5.0), (5.0, 10.0)]
+        assert align_verses([(2.0, 3.0)], 10.0, [1, 1, 1]) == [(0.0, 2.0), (3.0, 6.667), (6.667, 10.0)]
+
+
+@pytest.mark.django_db
+class TestAlignCommand:
+    """
+    Tests for the align_audio command and the audio.align job.
+    """
+
+    def make_audio(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        audio = ChapterAudioFactory()
+        audio.file.save('recitation.wav', ContentFile(make_recitation_wav()), save=False)
+        type(audio).objects.filter(id=audio.id).update(file=audio.file.name)
+        verses = [
+            VerseFactory(chapter=audio.chapter, book=audio.chapter.book, number=number, text='x' * length)
+            for number, length in ((1, 20), (2, 10), (3, 20))
+        ]
+        return audio, verses
+
+    def test_writes_timestamps_and_track(self, settings, tmp_path):
+        """
+        Test that proposals are upserted for every verse and the track rebuilt.
+        """
+        audio, verses = self.make_audio(settings, tmp_path)
+        AudioTimestampFactory(chapter_audio=audio, verse=verses[0], start_time=9, end_time=10)
+
+        call_command('align_audio', str(audio.id), '--processes=0', stdout=io.StringIO())
+        assert AudioTimestamp.objects.filter(chapter_audio=audio).get(verse=verses[0]).start_time == 9
+
+        call_command('align_audio', str(audio.id), '--processes=0', '--overwrite', stdout=io.StringIO())
+        rows = list(AudioTimestamp.objects.filter(chapter_audio=audio).order_by('verse__number').values_list('start_time', 'end_time'))
+        for (start, end), (expected_start, expected_end) in zip(rows, [(0.5, 2.5), (3.1, 4.5), (5.1, 7.1)]):
+            assert start == pytest.approx(expected_start, abs=0.03)
+            assert end == pytest.approx(expected_end, abs=0.03)
+        assert len(rows) == 3
+        assert all(timestamp.tenant_id == audio.tenant_id for timestamp in AudioTimestamp.objects.all())
+        track = decode_track(TimestampTrack.objects.get(chapter_audio=audio).data)
+        assert [row[0] for row in track] == [1, 2, 3]
+
+    def test_enqueue(self, settings, tmp_path):
+        """
+        Test that --enqueue queues one job per audio instead of aligning.
+        """
+        audio, _ = self.make_audio(settings, tmp_path)
+        call_command('align_audio', '--enqueue', stdout=io.StringIO())
+        assert list(Job.objects.filter(name='audio.align').values_list('payload', flat=True)) == [
+            {'chapter_audio': audio.id, 'overwrite': False}
+        ]
+        assert not AudioTimestamp.objects.exists()
@@ -0,0 +1,78 @@
+import io
+import wave
+import numpy as np
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from audio.media import analyze_audio
+from audio.models import AudioWaveform
+from audio.tests.factories import ChapterAudioFactory
+from core.jobs import Worker
+from core.models import Job
+
+
+def make_tone_wav(seconds=2.0, rate=8000, amplitude=0.5):
+    """One second of a sine tone followed by silence."""
+    samples = np.zeros(int(seconds * rate), dtype=np.float32)
+    tone = np.sin(2 * np.pi * 440 * np.arange(rate) / rate) * amplitude
+    samples[:rate] = tone
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes((samples * 32767).astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+class TestAnalyzeAudio:
+    """
+    Unit tests for the audio analysis.
+    """
+
+    def test_wav_analysis(self, tmp_path):
+        """
+        Test duration, bitrate, loudness and peaks of a tone followed by silence.
+        """
+        path = tmp_path / 'tone.wav'
+        path.write_bytes(make_tone_wav())
+        result = analyze_audio(str(path), peak_count=10)
+
+        assert result['duration'] == pytest.approx(2.0)
+        assert result['bitrate'] == pytest.approx(128000, rel=0.01)
+        # Half a second of RMS 0.354 over two seconds: about -12 dBFS
+        assert result['loudness_db'] == pytest.approx(-12.04, abs=0.1)
+        peaks = list(result['peaks'])
+        assert len(peaks) == 10
+        assert min(peaks[:5]) > 120 and max(peaks[5:]) == 0
+
+
+class TestAnalysisJob:
+    """
+    Tests for queueing and running the analysis when a file is attached.
+    """
+
+    @pytest.mark.django_db
+    def test_upload_queues_analysis(self, settings, tmp_path):
+        """
+        Test that attaching a file queues one job whose run stores the results.
+        """
+        settings.MEDIA_ROOT = tmp_path
+        audio = ChapterAudioFactory(duration_seconds=None)
+        assert not Job.objects.exists()
+
+        audio.file = SimpleUploadedFile('tone.wav', make_tone_wav(), content_type='audio/wav')
+        audio.save()
+        audio.save()
+        assert Job.objects.filter(name='audio.analyze').count() == 1
+
+        Worker(processes=0).run(burst=True)
+        audio.refresh_from_db()
+        assert audio.duration_seconds == 2
+        assert audio.bitrate and audio.loudness_db < 0 and audio.analyzed_at
+        # 2 s of 20 ms windows: fewer windows than the 1000 requested buckets
+        assert len(AudioWaveform.objects.get(chapter_audio=audio).peaks) == 100
+
+        response = APIClient().get(f'/api/v1/audio/chapter-audios/{audio.id}/waveform/', HTTP_X_TENANT_ID=str(audio.tenant_id))
+        assert response.status_code == 200
+        assert len(response.json()['peaks']) == 100
@@ -0,0 +1,100 @@
+import pytest
+from rest_framework.test import APIClient
+from audio.tests.factories import AudioTimestampFactory, ChapterAudioFactory
+from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
+from core.tests.factories import TenantFactory
+from core.tests.utils import count_queries
+
+class TestChapterAudioBundle:
+    """
+    Integration tests for the chapter player bundle endpoint.
+    Tests cover the response content, the fixed query count, caching,
+    validation and tenant isolation.
+    """
+
+    @pytest.fixture
+    def audio(self):
+        """Fixture providing a chapter audio with three timestamped verses."""
+        book = BookFactory(tenant=TenantFactory())
+        chapter = ChapterFactory(book=book, number=1)
+        audio = ChapterAudioFactory(chapter=chapter, reciter__tenant=book.tenant)
+        for number, start in [(2, 4.0), (1, 0.0), (3, 9.5)]:
+            verse = VerseFactory(book=book, chapter=chapter, number=number)
+            AudioTimestampFactory(chapter_audio=audio, verse=verse, start_time=start, end_time=start + 4)
+        return audio
+
+    def _url(self, audio):
+        return f'/api/v1/audio/chapter-audios/bundle/?chapter={audio.chapter_id}&reciter={audio.reciter_id}'
+
+    def _get(self, url, tenant):
+        return APIClient().get(url, HTTP_X_TENANT_ID=str(tenant.id))
+
+    @pytest.mark.django_db
+    def test_bundle_content(self, audio):
+        """
+        Test that the bundle holds the chapter, the audio with its reciter,
+        the ordered verses and the timestamps in playback order.
+        """
+        response = self._get(self._url(audio), audio.tenant)
+        assert response.status_code == 200
+        data = response.json()
+        assert data['chapter']['id'] == audio.chapter_id
+        assert data['audio']['id'] == audio.id
+        assert data['audio']['reciter']['name'] == audio.reciter.name
+        assert [verse['number'] for verse in data['verses']] == [1, 2, 3]
+        assert [row[1] for row in data['timestamps']] == [0.0, 4.0, 9.5]
+        assert data['timestamps'][0][0] == data['verses'][0]['id']
+
+    @pytest.mark.django_db
+    def test_fixed_query_count(self, audio):
+        """
+        Test that building the bundle takes three queries plus the tenant lookup.
+        """
+        assert count_queries(APIClient(), self._url(audio), HTTP_X_TENANT_ID=str(audio.tenant.id)) == 4
+
+    @pytest.mark.django_db
+    def test_bundle_cached_until_verse_changes(self, audio, django_assert_num_queries, django_capture_on_commit_callbacks):
+        """
+        Test that a repeated request is served from cache and that a change
+        to the book content invalidates it.
+        """
+        url = self._url(audio)
+        self._get(url, audio.tenant)
+        with django_assert_num_queries(0):
+            assert self._get(url, audio.tenant).status_code == 200
+
+        with django_capture_on_commit_callbacks(execute=True):
+            VerseFactory(book=audio.chapter.book, chapter=audio.chapter, number=4)
+        assert len(self._get(url, audio.tenant).json()['verses']) == 4
+
+    @pytest.mark.django_db
+    def test_invalid_and_missing(self, audio):
+        """
+        Test that bad parameters return 400 and unknown pairs or other tenants return 404.
+        """
+        assert self._get('/api/v1/audio/chapter-audios/bundle/?chapter=x', audio.tenant).status_code == 400
+        missing = f'/api/v1/audio/chapter-audios/bundle/?chapter={audio.chapter_id}&reciter=999999'
+        assert self._get(missing, audio.tenant).status_code == 404
+        assert self._get(self._url(audio), TenantFactory()).status_code == 404
+
+
+class TestAudioTimestampFilter:
+    """
+    Tests for filtering timestamps by chapter audio.
+    """
+
+    @pytest.mark.django_db
+    def test_filter_by_chapter_audio(self):
+        """
+        Test that ?chapter_audio= limits the list to one recitation.
+        """
+        first = AudioTimestampFactory()
+        chapter = first.chapter_audio.chapter
+        other_audio = ChapterAudioFactory(chapter=chapter, reciter__tenant=chapter.tenant)
+        AudioTimestampFactory(chapter_audio=other_audio, verse=first.verse)
+
+        response = APIClient().get(
+            f'/api/v1/audio/timestamps/?chapter_audio={first.chapter_audio_id}',
+            HTTP_X_TENANT_ID=str(chapter.tenant_id),
+        )
+        assert [row['id'] for row in response.json()['results']] == [first.id]
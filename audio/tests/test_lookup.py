@@ -0,0 +1,105 @@
+import pytest
+from rest_framework.test import APIClient
+from audio.tests.factories import AudioTimestampFactory, ChapterAudioFactory
+from audio.tracks import TrackIndex, track_indexes
+from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
+from core.tests.factories import TenantFactory
+
+class TestTrackIndex:
+    """
+    Unit tests for bisect-based time/verse resolution.
+    """
+
+    @pytest.fixture
+    def index(self):
+        """Fixture providing an index with a gap between verses 2 and 3."""
+        return TrackIndex([(2, 4000, 8000), (1, 0, 4000), (3, 9000, None)])
+
+    def test_verse_at(self, index):
+        """
+        Test lookups at boundaries, inside a verse, in a gap and past the last start.
+        """
+        assert index.verse_at(0) == (1, 0, 4000)
+        assert index.verse_at(3999) == (1, 0, 4000)
+        assert index.verse_at(4000) == (2, 4000, 8000)
+        assert index.verse_at(8500) is None
+        assert index.verse_at(60000) == (3, 9000, None)
+
+    def test_time_of(self, index):
+        """
+        Test verse to time lookups.
+        """
+        assert index.time_of(2) == (2, 4000, 8000)
+        assert index.time_of(7) is None
+
+
+class TestLookupEndpoint:
+    """
+    Integration tests for the chapter audio lookup endpoint.
+    """
+
+    @pytest.fixture
+    def audio(self, django_capture_on_commit_callbacks):
+        """Fixture providing a chapter audio with two timestamped verses and their track."""
+        book = BookFactory(tenant=TenantFactory())
+        chapter = ChapterFactory(book=book, number=1)
+        audio = ChapterAudioFactory(chapter=chapter, reciter__tenant=book.tenant)
+        with django_capture_on_commit_callbacks(execute=True):
+            for number, start in [(1, 0.0), (2, 5.0)]:
+                verse = VerseFactory(book=book, chapter=chapter, number=number)
+                AudioTimestampFactory(chapter_audio=audio, verse=verse, start_time=start, end_time=start + 5)
+        return audio
+
+    def _url(self, audio):
+        return f'/api/v1/audio/chapter-audios/{audio.id}/lookup/'
+
+    @pytest.mark.django_db
+    def test_get_time_and_verse(self, audio):
+        """
+        Test single GET lookups in both directions.
+        """
+        client = APIClient()
+        headers = {'HTTP_X_TENANT_ID': str(audio.tenant_id)}
+        assert client.get(f'{self._url(audio)}?t=6.2', **headers).json() == {'verse': 2, 'start_time': 5.0, 'end_time': 10.0}
+        assert client.get(f'{self._url(audio)}?verse=1', **headers).json()['start_time'] == 0.0
+        assert client.get(self._url(audio), **headers).status_code == 400
+        assert client.get(f'{self._url(audio)}?t=-1', **headers).status_code == 400
+
+    @pytest.mark.django_db
+    def test_batch_post_uses_cached_index(self, audio, django_assert_num_queries):
+        """
+        Test the batch form and that warm lookups run no queries.
+        """
+        client = APIClient()
+        headers = {'HTTP_X_TENANT_ID': str(audio.tenant_id)}
+        client.get(f'{self._url(audio)}?t=0', **headers)
+        with django_assert_num_queries(0):
+            response = client.post(self._url(audio), {'t': [1, 7.5, 11], 'verses': [2, 9]}, format='json', **headers)
+        data = response.json()
+        assert [row and row['verse'] for row in data['times']] == [1, 2, None]
+        assert data['verses'][0]['start_time'] == 5.0
+        assert data['verses'][1] is None
+
+    @pytest.mark.django_db
+    def test_timestamp_write_invalidates(self, audio, django_capture_on_commit_callbacks):
+        """
+        Test that changing a timestamp is reflected by the next lookup.
+        """
+        client = APIClient()
+        headers = {'HTTP_X_TENANT_ID': str(audio.tenant_id)}
+        assert client.get(f'{self._url(audio)}?t=4', **headers).json()['verse'] == 1
+
+        second = audio.timestamps.get(verse__number=2)
+        second.start_time = 3.0
+        with django_capture_on_commit_callbacks(execute=True):
+            second.save()
+        assert client.get(f'{self._url(audio)}?t=4', **headers).json()['verse'] == 2
+
+    @pytest.mark.django_db
+    def test_other_tenant(self, audio):
+        """
+        Test that another tenant gets 404 even when the index is cached.
+        """
+        assert track_indexes.get(audio.tenant_id, audio.id) is not None
+        response = APIClient().get(f'{self._url(audio)}?t=1', HTTP_X_TENANT_ID=str(TenantFactory().id))
+        assert response.status_code == 404
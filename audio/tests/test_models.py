@@ -6,6 +6,7 @@ from audio.tests.factories import (
     ChapterAudioFactory, 
     AudioTimestampFactory
 )
+from books.models import Chapter
 from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
 from core.tests.factories import TenantFactory
 
@@ -272,4 +273,54 @@ class TestAudioTimestampModel:
         assert timestamp.start_time is not None
         
         timestamp_with_end = AudioTimestampFactory(start_time=0.0, end_time=10.0)
-        assert timestamp_with_end.end_time == 10.0              
\ No newline at end of file
+        assert timestamp_with_end.end_time == 10.0
+
+    @pytest.mark.django_db
+    def test_audio_timestamp_denormalized_tenant(self):
+        """
+        Test that the timestamp carries the book's tenant in its own column
+        and follows the book when it moves to another tenant.
+        """
+        tenant = TenantFactory()
+        book = BookFactory(tenant=tenant)
+        chapter = ChapterFactory(book=book)
+        audio = ChapterAudioFactory(chapter=chapter)
+        timestamp = AudioTimestampFactory(chapter_audio=audio)
+        
+        assert audio.tenant_id == tenant.id
+        assert timestamp.tenant_id == tenant.id
+        
+        new_tenant = TenantFactory()
+        book.tenant = new_tenant
+        book.save()
+        timestamp.refresh_from_db()
+        
+        assert timestamp.tenant_id == new_tenant.id
+
+    @pytest.mark.django_db
+    def test_unchanged_tenant_is_not_propagated(self, django_assert_num_queries):
+        """
+        Test that saving a parent without moving it to another tenant
+        leaves the descendants' rows alone.
+        """
+        timestamp = AudioTimestampFactory()
+        chapter = Chapter.objects.select_related('book').get(pk=timestamp.chapter_audio.chapter_id)
+        chapter.title = 'Renamed'
+
+        with django_assert_num_queries(1):
+            chapter.save()
+
+    @pytest.mark.django_db
+    def test_parent_update_cascades_to_descendants(self):
+        """
+        Test that queryset.update() moving rows to a parent of another
+        tenant also resyncs the rows inheriting their tenant.
+        """
+        timestamp = AudioTimestampFactory()
+        other = BookFactory()
+
+        Chapter.objects.filter(pk=timestamp.chapter_audio.chapter_id).update(book=other)
+        timestamp.refresh_from_db()
+
+        assert ChapterAudio.objects.get(pk=timestamp.chapter_audio_id).tenant_id == other.tenant_id
+        assert timestamp.tenant_id == other.tenant_id
@@ -182,4 +182,22 @@ class TestAudioTimestampSerializer:
         timestamp = serializer.save()
         assert timestamp.start_time == 10.0
         assert timestamp.end_time is None
-
+    
+    @pytest.mark.django_db
+    def test_audio_timestamp_rejects_out_of_range_times(self):
+        """
+        Test that negative times, times past the packed track's range and an
+        end before the start are rejected instead of failing the track rebuild.
+        """
+        timestamp = AudioTimestampFactory(start_time=10.0, end_time=20.0)
+        cases = [
+            ({'start_time': -1}, 'start_time'),
+            ({'end_time': 5_000_000}, 'end_time'),
+            ({'end_time': 5.0}, 'end_time'),
+        ]
+        for data, field in cases:
+            serializer = AudioTimestampSerializer(timestamp, data=data, partial=True)
+            assert not serializer.is_valid()
+            assert field in serializer.errors
+        
+        assert AudioTimestampSerializer(timestamp, data={'end_time': 10.0}, partial=True).is_valid()
@@ -0,0 +1,156 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from audio.streaming import accel_redirect_response, parse_range_header
+from audio.tests.factories import ChapterAudioFactory
+from books.tests.factories import ChapterFactory
+from core.tests.factories import TenantFactory
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+
+class TestParseRangeHeader:
+    """
+    Unit tests for Range header parsing.
+    """
+
+    def test_forms(self):
+        """
+        Test closed, open-ended and suffix ranges, clamping and coalescing.
+        """
+        assert parse_range_header('bytes=0-99', 1000) == [(0, 99)]
+        assert parse_range_header('bytes=900-', 1000) == [(900, 999)]
+        assert parse_range_header('bytes=-100', 1000) == [(900, 999)]
+        assert parse_range_header('bytes=990-2000', 1000) == [(990, 999)]
+        assert parse_range_header('bytes=50-99, 0-49, 200-300', 1000) == [(0, 99), (200, 300)]
+
+    def test_ignored_and_unsatisfiable(self):
+        """
+        Test that malformed headers are ignored and out-of-bounds ranges are unsatisfiable.
+        """
+        assert parse_range_header(None, 1000) is None
+        assert parse_range_header('items=0-1', 1000) is None
+        assert parse_range_header('bytes=5-1', 1000) is None
+        assert parse_range_header('bytes=abc', 1000) is None
+        assert parse_range_header('bytes=1000-', 1000) == []
+
+
+class TestStreamEndpoint:
+    """
+    Integration tests for the chapter audio stream endpoint.
+    """
+
+    @pytest.fixture
+    def audio(self, settings, tmp_path):
+        """Fixture providing a chapter audio with an uploaded 10 KB file."""
+        settings.MEDIA_ROOT = tmp_path
+        chapter = ChapterFactory()
+        return ChapterAudioFactory(
+            chapter=chapter,
+            reciter__tenant=chapter.tenant,
+            external_url=None,
+            file=SimpleUploadedFile('recitation.mp3', CONTENT, content_type='audio/mpeg'),
+        )
+
+    def _get(self, audio, tenant=None, **headers):
+        tenant = tenant or audio.tenant
+        response = APIClient().get(
+            f'/api/v1/audio/chapter-audios/{audio.id}/stream/',
+            HTTP_X_TENANT_ID=str(tenant.id), HTTP_ACCEPT='audio/*', **headers,
+        )
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    @pytest.mark.django_db
+    def test_full_file(self, audio):
+        """
+        Test a plain GET returns the whole file and advertises range support.
+        """
+        response, body = self._get(audio)
+        assert response.status_code == 200
+        assert body == CONTENT
+        assert response['Accept-Ranges'] == 'bytes'
+        assert response['Content-Type'] == 'audio/mpeg'
+
+    @pytest.mark.django_db
+    def test_single_range(self, audio):
+        """
+        Test a single range returns 206 with the matching slice.
+        """
+        response, body = self._get(audio, HTTP_RANGE='bytes=100-199')
+        assert response.status_code == 206
+        assert response['Content-Range'] == f'bytes 100-199/{len(CONTENT)}'
+        assert body == CONTENT[100:200]
+
+    @pytest.mark.django_db
+    def test_multiple_ranges(self, audio):
+        """
+        Test several ranges return a multipart/byteranges body with an exact length.
+        """
+        response, body = self._get(audio, HTTP_RANGE='bytes=0-9,-10')
+        assert response.status_code == 206
+        assert response['Content-Type'].startswith('multipart/byteranges; boundary=')
+        assert int(response['Content-Length']) == len(body)
+        assert CONTENT[:10] in body and CONTENT[-10:] in body
+        assert f'Content-Range: bytes 0-9/{len(CONTENT)}'.encode() in body
+
+    @pytest.mark.django_db
+    def test_unsatisfiable_range(self, audio):
+        """
+        Test a range past the end returns 416.
+        """
+        response, _ = self._get(audio, HTTP_RANGE='bytes=999999-')
+        assert response.status_code == 416
+        assert response['Content-Range'] == f'bytes */{len(CONTENT)}'
+
+    @pytest.mark.django_db
+    def test_if_range(self, audio):
+        """
+        Test that a matching If-Range honours the range and a stale one returns the full file.
+        """
+        etag = self._get(audio)[0]['ETag']
+        assert self._get(audio, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)[0].status_code == 206
+        response, body = self._get(audio, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        assert response.status_code == 200
+        assert body == CONTENT
+
+    @pytest.mark.django_db
+    def test_not_modified(self, audio):
+        """
+        Test that If-None-Match with the current ETag returns 304.
+        """
+        etag = self._get(audio)[0]['ETag']
+        assert self._get(audio, HTTP_IF_NONE_MATCH=etag)[0].status_code == 304
+
+    @pytest.mark.django_db
+    def test_accel_redirect(self, audio, settings):
+        """
+        Test the X-Accel-Redirect offload mode.
+        """
+        settings.AUDIO_X_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+        response, body = self._get(audio)
+        assert response['X-Accel-Redirect'] == f'/protected-media/{audio.file.name}'
+        assert body == b''
+
+    def test_accel_redirect_quotes_name(self, settings):
+        """
+        Test that a non-ASCII file name is percent-encoded for nginx instead
+        of being MIME-encoded in the header.
+        """
+        settings.AUDIO_X_ACCEL_REDIRECT_PREFIX = '/protected-media'
+        response = accel_redirect_response(None, 'chapter_audios/سوره حمد.mp3')
+        assert response['X-Accel-Redirect'] == '/protected-media/chapter_audios/%D8%B3%D9%88%D8%B1%D9%87%20%D8%AD%D9%85%D8%AF.mp3'
+        assert response['Content-Type'] == 'audio/mpeg'
+
+    @pytest.mark.django_db
+    def test_external_url_and_tenant(self, audio):
+        """
+        Test the redirect for external audio and that other tenants get 404.
+        """
+        external = ChapterAudioFactory(chapter=audio.chapter, reciter__tenant=audio.tenant)
+        response, _ = self._get(external)
+        assert response.status_code == 302
+        assert response['Location'] == external.external_url
+
+        assert self._get(audio, tenant=TenantFactory())[0].status_code == 404
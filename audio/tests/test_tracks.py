@@ -0,0 +1,151 @@
+import pytest
+from django.db import transaction
+from rest_framework.test import APIClient
+from audio.models import AudioTimestamp, TimestampTrack
+from audio.tests.factories import AudioTimestampFactory, ChapterAudioFactory
+from audio.tracks import decode_track, delta_decode, delta_encode, encode_track, rebuild_tracks, track_indexes
+from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
+from core.tests.factories import TenantFactory
+
+class TestTrackEncoding:
+    """
+    Unit tests for the packed track formats.
+    """
+
+    def test_binary_round_trip(self):
+        """
+        Test that encoding to the binary form and decoding returns millisecond rows,
+        with missing end times preserved.
+        """
+        data = encode_track([(1, 0.0, 4.25), (2, 4.25, None)])
+        assert data.startswith(b'QTS1')
+        assert len(data) == 4 + 2 * 12
+        assert decode_track(data) == [(1, 0, 4250), (2, 4250, None)]
+
+    def test_delta_round_trip(self):
+        """
+        Test that the delta-encoded array decodes back to the same rows.
+        """
+        rows = [(1, 0, 4250), (2, 4250, 9000), (3, 9000, None)]
+        flat = delta_encode(rows)
+        assert flat == [1, 0, 4250, 1, 4250, 4750, 1, 4750, -1]
+        assert delta_decode(flat) == rows
+
+    def test_rejects_foreign_data(self):
+        """
+        Test that decoding data without the magic prefix fails.
+        """
+        with pytest.raises(ValueError):
+            decode_track(b'nope')
+
+
+class TestTrackSync:
+    """
+    Tests for keeping TimestampTrack in sync with AudioTimestamp rows and
+    for the track endpoint.
+    """
+
+    @pytest.fixture
+    def audio(self, django_capture_on_commit_callbacks):
+        """Fixture providing a chapter audio with two timestamped verses and their track."""
+        book = BookFactory(tenant=TenantFactory())
+        chapter = ChapterFactory(book=book, number=1)
+        audio = ChapterAudioFactory(chapter=chapter, reciter__tenant=book.tenant)
+        with django_capture_on_commit_callbacks(execute=True):
+            for number, start in [(1, 0.0), (2, 5.5)]:
+                verse = VerseFactory(book=book, chapter=chapter, number=number)
+                AudioTimestampFactory(chapter_audio=audio, verse=verse, start_time=start, end_time=start + 5)
+        return audio
+
+    @pytest.mark.django_db
+    def test_track_follows_timestamp_writes(self, audio, django_capture_on_commit_callbacks):
+        """
+        Test that saving and deleting timestamps (directly or through a verse) re-packs the track.
+        """
+        assert decode_track(audio.track.data) == [(1, 0, 5000), (2, 5500, 10500)]
+
+        first = audio.timestamps.get(verse__number=1)
+        first.end_time = 5.5
+        with django_capture_on_commit_callbacks(execute=True):
+            first.save()
+        audio.track.refresh_from_db()
+        assert decode_track(audio.track.data)[0] == (1, 0, 5500)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            audio.timestamps.get(verse__number=2).verse.delete()
+        audio.track.refresh_from_db()
+        assert audio.track.verse_count == 1
+
+    @pytest.mark.django_db
+    def test_track_rebuilt_once_per_transaction(self, audio, django_capture_on_commit_callbacks):
+        """
+        Test that writing several timestamps in one transaction re-packs the
+        track once, on commit.
+        """
+        with django_capture_on_commit_callbacks() as callbacks:
+            with transaction.atomic():
+                for timestamp in audio.timestamps.all():
+                    timestamp.end_time += 1
+                    timestamp.save()
+        rebuilds = [callback for callback in callbacks if getattr(callback, 'callback', None) is rebuild_tracks]
+        assert len(rebuilds) == 1
+        assert rebuilds[0].items == {audio.id}
+
+        rebuilds[0]()
+        audio.track.refresh_from_db()
+        assert decode_track(audio.track.data) == [(1, 0, 6000), (2, 5500, 11500)]
+
+    @pytest.mark.django_db
+    def test_queryset_delete_rebuilds_track(self, audio, django_capture_on_commit_callbacks):
+        """
+        Test that a bulk delete of timestamps re-packs the track once and
+        drops the deleted rows from lookups.
+        """
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            AudioTimestamp.unscoped.filter(chapter_audio=audio).delete()
+
+        assert len([callback for callback in callbacks if getattr(callback, 'callback', None) is rebuild_tracks]) == 1
+        audio.track.refresh_from_db()
+        assert decode_track(audio.track.data) == []
+        assert track_indexes.get(audio.tenant_id, audio.id).verse_at(1000) is None
+
+    @pytest.mark.django_db
+    def test_track_deleted_with_audio(self, audio):
+        """
+        Test that deleting the audio removes its track without rebuilding it.
+        """
+        audio.delete()
+        assert not TimestampTrack.objects.exists()
+
+    @pytest.mark.django_db
+    def test_binary_endpoint(self, audio, django_assert_max_num_queries):
+        """
+        Test that the endpoint serves the binary track with one track query.
+        """
+        client = APIClient()
+        url = f'/api/v1/audio/chapter-audios/{audio.id}/track/'
+        client.get(url, HTTP_X_TENANT_ID=str(audio.tenant_id))
+        with django_assert_max_num_queries(1):
+            response = client.get(url, HTTP_X_TENANT_ID=str(audio.tenant_id))
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/octet-stream'
+        assert decode_track(response.content) == [(1, 0, 5000), (2, 5500, 10500)]
+
+    @pytest.mark.django_db
+    def test_json_endpoint(self, audio):
+        """
+        Test the delta-encoded JSON form.
+        """
+        response = APIClient().get(
+            f'/api/v1/audio/chapter-audios/{audio.id}/track/?encoding=json',
+            HTTP_X_TENANT_ID=str(audio.tenant_id),
+        )
+        assert delta_decode(response.json()['data']) == [(1, 0, 5000), (2, 5500, 10500)]
+
+    @pytest.mark.django_db
+    def test_other_tenant_gets_404(self, audio):
+        """
+        Test that another tenant cannot read the track.
+        """
+        response = APIClient().get(f'/api/v1/audio/chapter-audios/{audio.id}/track/', HTTP_X_TENANT_ID=str(TenantFactory().id))
+        assert response.status_code == 404
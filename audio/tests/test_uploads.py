@@ -0,0 +1,208 @@
+import hashlib
+import io
+import os
+import wave
+from datetime import timedelta
+import pytest
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+from audio.media import DurationProbe
+from audio.models import AudioUpload
+from audio.tests.factories import ChapterAudioFactory
+from audio import uploads
+from users.tests.factories import UserFactory
+
+
+def make_wav(seconds=2, rate=8000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(b'\x01\x00' * rate * seconds)
+    return buffer.getvalue()
+
+
+def make_mp3(frames=50):
+    # MPEG-1 Layer III, 128 kbps, 44.1 kHz: 417-byte frames of 1152 samples
+    frame = bytes([0xFF, 0xFB, 0x90, 0x00]) + b'\x00' * 413
+    tag = b'ID3\x03\x00\x00\x00\x00\x00\x0a' + b'\x00' * 10
+    return tag + frame * frames
+
+
+class TestDurationProbe:
+    """
+    Unit tests for incremental duration detection.
+    """
+
+    @pytest.mark.parametrize('chunk_size', [1, 7, 417, 1 << 20])
+    def test_mp3_and_wav_in_any_chunking(self, chunk_size):
+        """
+        Test that the duration does not depend on how the bytes are split.
+        """
+        for data, expected in [(make_wav(2), 2.0), (make_mp3(50), 50 * 1152 / 44100)]:
+            probe = DurationProbe()
+            for start in range(0, len(data), chunk_size):
+                probe.feed(data[start:start + chunk_size])
+            assert probe.duration == pytest.approx(expected)
+            assert probe.bitrate
+
+    def test_unknown_format(self):
+        """
+        Test that data in an unknown format gives no duration.
+        """
+        probe = DurationProbe()
+        probe.feed(b'not audio at all')
+        assert probe.duration is None
+
+
+class TestResumableUpload:
+    """
+    Integration tests for the init/append/commit upload protocol.
+    """
+
+    @pytest.fixture
+    def setup(self, settings, tmp_path):
+        """Fixture providing an admin client, a chapter audio and WAV data."""
+        settings.MEDIA_ROOT = tmp_path
+        settings.AUDIO_UPLOAD_TEMP_DIR = ''
+        audio = ChapterAudioFactory(external_url=None, duration_seconds=None)
+        audio.reciter.tenant = audio.tenant
+        audio.reciter.save()
+        client = APIClient()
+        client.force_authenticate(UserFactory(tenant=audio.tenant, is_staff=True))
+        client.credentials(HTTP_X_TENANT_ID=str(audio.tenant_id))
+        return client, audio, make_wav(3)
+
+    def _init(self, client, audio, data):
+        response = client.post(
+            '/api/v1/audio/uploads/',
+            {'chapter_audio': audio.id, 'filename': 'dir/recitation.wav', 'size': len(data)},
+            format='json',
+        )
+        assert response.status_code == 201, response.content
+        return response.json()['id']
+
+    def _patch(self, client, upload_id, offset, chunk):
+        return client.patch(
+            f'/api/v1/audio/uploads/{upload_id}/', chunk,
+            content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    @pytest.mark.django_db
+    def test_chunked_upload_and_commit(self, setup):
+        """
+        Test uploading in chunks, then committing moves the file into place
+        with the checksum and duration computed on the way.
+        """
+        client, audio, data = setup
+        upload_id = self._init(client, audio, data)
+        for offset in range(0, len(data), 10000):
+            response = self._patch(client, upload_id, offset, data[offset:offset + 10000])
+            assert response.status_code == 200
+            assert response['Upload-Offset'] == str(min(offset + 10000, len(data)))
+
+        temp_path = AudioUpload.objects.get(id=upload_id).temp_path
+        response = client.post(
+            f'/api/v1/audio/uploads/{upload_id}/commit/',
+            {'sha256': hashlib.sha256(data).hexdigest()}, format='json',
+        )
+        assert response.status_code == 200, response.content
+
+        audio.refresh_from_db()
+        assert audio.duration_seconds == 3
+        assert audio.file.name.startswith('chapter_audios/recitation')
+        with audio.file.open('rb') as handle:
+            assert handle.read() == data
+        assert not os.path.exists(temp_path)
+        assert AudioUpload.objects.get(id=upload_id).sha256 == hashlib.sha256(data).hexdigest()
+
+    @pytest.mark.django_db
+    def test_offset_mismatch_and_resume(self, setup):
+        """
+        Test that a wrong offset is rejected with 409 and the current offset,
+        and that the status endpoint tells where to resume.
+        """
+        client, audio, data = setup
+        upload_id = self._init(client, audio, data)
+        self._patch(client, upload_id, 0, data[:5000])
+
+        response = self._patch(client, upload_id, 0, data[:5000])
+        assert response.status_code == 409
+        assert response.json()['offset'] == 5000
+        assert client.get(f'/api/v1/audio/uploads/{upload_id}/')['Upload-Offset'] == '5000'
+
+        assert client.post(f'/api/v1/audio/uploads/{upload_id}/commit/').status_code == 409
+
+    @pytest.mark.django_db
+    def test_rehash_after_lost_state(self, setup):
+        """
+        Test that the checksum and duration are rebuilt from the partial file
+        when the in-memory state is gone (e.g. another worker took the chunk).
+        """
+        client, audio, data = setup
+        upload_id = self._init(client, audio, data)
+        self._patch(client, upload_id, 0, data[:20000])
+        uploads._states.clear()
+        self._patch(client, upload_id, 20000, data[20000:])
+
+        response = client.post(f'/api/v1/audio/uploads/{upload_id}/commit/', {'sha256': hashlib.sha256(data).hexdigest()}, format='json')
+        assert response.status_code == 200
+        assert response.json()['duration_seconds'] == 3
+
+    @pytest.mark.django_db
+    def test_rejects_oversized_chunk_and_bad_checksum(self, setup):
+        """
+        Test that bytes beyond the declared size and a wrong checksum are rejected.
+        """
+        client, audio, data = setup
+        upload_id = self._init(client, audio, data)
+        assert self._patch(client, upload_id, 0, data + b'extra').status_code == 400
+        assert self._patch(client, upload_id, 0, data).status_code == 200
+
+        response = client.post(f'/api/v1/audio/uploads/{upload_id}/commit/', {'sha256': '0' * 64}, format='json')
+        assert response.status_code == 400
+
+    @pytest.mark.django_db
+    def test_requires_admin_and_tenant(self, setup):
+        """
+        Test that non-admins cannot upload and another tenant's audio is refused.
+        """
+        client, audio, data = setup
+        other = ChapterAudioFactory()
+        response = client.post('/api/v1/audio/uploads/', {'chapter_audio': other.id, 'filename': 'a.wav', 'size': 10}, format='json')
+        assert response.status_code == 400
+
+        user_client = APIClient()
+        user_client.force_authenticate(UserFactory(tenant=audio.tenant))
+        response = user_client.post(
+            '/api/v1/audio/uploads/', {'chapter_audio': audio.id, 'filename': 'a.wav', 'size': 10},
+            format='json', HTTP_X_TENANT_ID=str(audio.tenant_id),
+        )
+        assert response.status_code == 403
+
+    @pytest.mark.django_db
+    def test_chunk_streams_outside_transaction(self, setup, settings):
+        """
+        Test that the body is read without an open transaction, that a chunk
+        arriving meanwhile gets 409, and that a lock left by a crashed
+        worker expires.
+        """
+        client, audio, data = setup
+        upload = AudioUpload.objects.get(id=self._init(client, audio, data))
+        depth = len(connection.atomic_blocks)
+
+        class Stream(io.BytesIO):
+            def read(self, size=-1):
+                assert len(connection.atomic_blocks) == depth
+                with pytest.raises(uploads.UploadConflict):
+                    uploads.append_chunk(upload, 0, io.BytesIO(b'x'))
+                return super().read(size)
+
+        upload = uploads.append_chunk(upload, 0, Stream(data[:5000]))
+        assert (upload.offset, upload.locked_at) == (5000, None)
+
+        settings.AUDIO_UPLOAD_LOCK_TIMEOUT = 60
+        AudioUpload.objects.filter(id=upload.id).update(locked_at=timezone.now() - timedelta(minutes=2))
+        assert self._patch(client, upload.id, 5000, data[5000:]).status_code == 200
@@ -0,0 +1,176 @@
+import sys
+from array import array
+from bisect import bisect_right
+from django.conf import settings
+from core.content_cache import content_version
+from core.lru import LRUCache
+from core.on_commit import defer_on_commit
+from .models import AudioTimestamp, ChapterAudio, TimestampTrack
+
+TRACK_MAGIC = b'QTS1'
+# end_ms value of a timestamp without an end time
+NO_END = 0xFFFFFFFF
+# Layout of the JSON form: per verse, delta of verse number, delta of start, duration (-1: no end)
+DELTA_FIELDS = ('verse', 'start_ms', 'duration_ms')
+
+
+def _to_ms(seconds):
+    return int(round(seconds * 1000))
+
+
+def encode_track(rows):
+    """
+    Pack ``(verse_number, start_seconds, end_seconds or None)`` rows into a
+    track: the magic ``QTS1`` followed by little-endian uint32 triples
+    ``(verse, start_ms, end_ms)``, 12 bytes per verse.
+    """
+    values = array('I')
+    for verse, start, end in rows:
+        values.extend((verse, _to_ms(start), NO_END if end is None else _to_ms(end)))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return TRACK_MAGIC + values.tobytes()
+
+
+def decode_track(data):
+    """Unpack a track into ``(verse, start_ms, end_ms or None)`` tuples"""
+    data = bytes(data)
+    if data[:len(TRACK_MAGIC)] != TRACK_MAGIC:
+        raise ValueError('Not a timestamp track')
+    values = array('I', data[len(TRACK_MAGIC):])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return [
+        (values[i], values[i + 1], None if values[i + 2] == NO_END else values[i + 2])
+        for i in range(0, len(values), 3)
+    ]
+
+
+def delta_encode(rows):
+    """Flatten decoded rows into the delta-encoded JSON array (see DELTA_FIELDS)"""
+    flat = []
+    previous_verse = previous_start = 0
+    for verse, start, end in rows:
+        flat.extend((verse - previous_verse, start - previous_start, -1 if end is None else end - start))
+        previous_verse, previous_start = verse, start
+    return flat
+
+
+def delta_decode(flat):
+    """Inverse of :func:`delta_encode`"""
+    rows = []
+    verse = start = 0
+    for i in range(0, len(flat), 3):
+        verse += flat[i]
+        start += flat[i + 1]
+        rows.append((verse, start, None if flat[i + 2] < 0 else start + flat[i + 2]))
+    return rows
+
+
+def rebuild_track(chapter_audio_id):
+    """
+    Re-pack the track of ``chapter_audio_id`` from its AudioTimestamp rows
+    (one indexed read over (chapter_audio, start_time) plus one upsert).
+    Does nothing if the chapter audio no longer exists.
+    """
+    if not ChapterAudio.unscoped.filter(id=chapter_audio_id).exists():
+        return None
+    rows = list(
+        AudioTimestamp.unscoped.filter(chapter_audio_id=chapter_audio_id)
+        .order_by('start_time', 'verse__number')
+        .values_list('verse__number', 'start_time', 'end_time')
+    )
+    track, _ = TimestampTrack.unscoped.update_or_create(
+        chapter_audio_id=chapter_audio_id,
+        defaults={'data': encode_track(rows), 'verse_count': len(rows)},
+    )
+    track_indexes.invalidate(chapter_audio_id)
+    return track
+
+
+def rebuild_tracks(chapter_audio_ids):
+    """:func:`rebuild_track` for each of ``chapter_audio_ids``"""
+    for chapter_audio_id in sorted(chapter_audio_ids):
+        rebuild_track(chapter_audio_id)
+
+
+def rebuild_track_on_commit(chapter_audio_id):
+    """
+    Rebuild the track once the current transaction commits: however many
+    of its timestamps the transaction writes, it is re-packed only once.
+    """
+    defer_on_commit(rebuild_tracks, chapter_audio_id)
+
+
+class TrackIndex:
+    """
+    Time/verse lookups over one decoded track: a sorted start-time array
+    searched with bisect, and a verse-number map for the reverse direction.
+    """
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda row: row[1])
+        self.verses = array('I', (row[0] for row in rows))
+        self.starts = array('I', (row[1] for row in rows))
+        self.ends = [row[2] for row in rows]
+        self.positions = {verse: index for index, verse in enumerate(self.verses)}
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _row(self, index):
+        return self.verses[index], self.starts[index], self.ends[index]
+
+    def verse_at(self, ms):
+        """Row playing at ``ms``, or None before the first verse or in a gap after a verse's end"""
+        index = bisect_right(self.starts, ms) - 1
+        if index < 0:
+            return None
+        end = self.ends[index]
+        if end is not None and ms >= end:
+            return None
+        return self._row(index)
+
+    def time_of(self, verse):
+        """Row of verse number ``verse``, or None if the verse is not in the track"""
+        index = self.positions.get(verse)
+        return None if index is None else self._row(index)
+
+
+class TrackIndexCache:
+    """
+    In-process LRU of TrackIndex objects keyed by chapter audio.
+
+    Each entry remembers the tenant's audio content version it was built
+    under, so a timestamp write in any process (which bumps the version)
+    makes the entry stale; writes in this process also drop it directly
+    (see ``audio.signals``).
+    """
+
+    def __init__(self, max_size=None):
+        self._cache = LRUCache(max_size=max_size or getattr(settings, 'TRACK_INDEX_CACHE_SIZE', 256))
+
+    def get(self, tenant_id, chapter_audio_id):
+        version = content_version(tenant_id, 'audio')
+        entry = self._cache.get(chapter_audio_id)
+        if entry is not None and entry[:2] == (tenant_id, version):
+            return entry[2]
+        track = (
+            TimestampTrack.unscoped.filter(chapter_audio_id=chapter_audio_id, chapter_audio__tenant_id=tenant_id)
+            .only('data')
+            .first()
+        )
+        if track is None:
+            return None
+        index = TrackIndex(decode_track(track.data))
+        self._cache.set(chapter_audio_id, (tenant_id, version, index))
+        return index
+
+    def invalidate(self, chapter_audio_id):
+        self._cache.delete(chapter_audio_id)
+
+    def clear(self):
+        self._cache.clear()
+
+
+track_indexes = TrackIndexCache()
@@ -0,0 +1,190 @@
+import hashlib
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.http import UnreadablePostError
+from django.utils import timezone
+from core.lru import LRUCache
+from .media import DurationProbe
+from .models import AudioUpload
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """The request cannot be applied to the upload (HTTP 400)"""
+
+
+class UploadConflict(UploadError):
+    """The upload is not in the state the request expects (HTTP 409)"""
+
+    def __init__(self, message, offset):
+        super().__init__(message)
+        self.offset = offset
+
+
+class UploadState:
+    """Checksum and duration probe of the bytes received so far"""
+
+    def __init__(self):
+        self.offset = 0
+        self.hasher = hashlib.sha256()
+        self.probe = DurationProbe()
+
+    def update(self, chunk):
+        self.hasher.update(chunk)
+        self.probe.feed(chunk)
+        self.offset += len(chunk)
+
+
+# Upload id -> UploadState of uploads in progress in this process
+_states = LRUCache(max_size=256)
+
+
+def _get_state(upload):
+    """
+    State matching ``upload.offset``. Normally kept in memory between
+    chunks; when a chunk arrives at another process (or after a restart)
+    it is rebuilt by re-reading the partial file once.
+    """
+    state = _states.get(upload.id)
+    if state is None or state.offset != upload.offset:
+        state = UploadState()
+        if upload.offset:
+            with open(upload.temp_path, 'rb') as handle:
+                while state.offset < upload.offset:
+                    chunk = handle.read(min(CHUNK_SIZE, upload.offset - state.offset))
+                    if not chunk:
+                        raise UploadConflict('Partial file is shorter than the recorded offset', state.offset)
+                    state.update(chunk)
+        _states.set(upload.id, state)
+    return state
+
+
+def _lock(upload):
+    return AudioUpload.unscoped.select_for_update().get(pk=upload.pk)
+
+
+def _stale_before(now):
+    """Chunk locks older than this were left behind by a crashed worker"""
+    return now - timedelta(seconds=getattr(settings, 'AUDIO_UPLOAD_LOCK_TIMEOUT', 3600))
+
+
+def _claim(upload, offset):
+    """
+    Lock ``upload`` for one chunk at ``offset``: a single conditional UPDATE,
+    so concurrent requests for the same upload get a conflict instead of
+    waiting. Returns the lock's timestamp, which identifies the claim.
+    """
+    now = timezone.now()
+    claimed = AudioUpload.unscoped.filter(
+        Q(locked_at__isnull=True) | Q(locked_at__lt=_stale_before(now)),
+        pk=upload.pk, offset=offset, completed_at__isnull=True,
+    ).update(locked_at=now)
+    if claimed:
+        return now
+    upload = AudioUpload.unscoped.get(pk=upload.pk)
+    if upload.completed_at:
+        raise UploadConflict('Upload already committed', upload.offset)
+    if offset != upload.offset:
+        raise UploadConflict('Upload-Offset does not match', upload.offset)
+    raise UploadConflict('Another chunk is being received', upload.offset)
+
+
+def append_chunk(upload, offset, stream):
+    """
+    Append the bytes of ``stream`` at ``offset`` (which must equal the bytes
+    already received) straight to the partial file, updating the checksum
+    and duration probe as they pass. A dropped connection keeps whatever
+    arrived; the client resumes from the returned upload's ``offset``.
+
+    No transaction or row lock is held while the body streams in: the
+    chunk is claimed with ``locked_at`` first, and the new offset recorded
+    only if the offset and the claim are still the ones it started from.
+    """
+    locked_at = _claim(upload, offset)
+    claim = AudioUpload.unscoped.filter(pk=upload.pk, offset=offset, locked_at=locked_at)
+    try:
+        upload = AudioUpload.unscoped.get(pk=upload.pk)
+        state = _get_state(upload)
+
+        os.makedirs(os.path.dirname(upload.temp_path), exist_ok=True)
+        mode = 'r+b' if os.path.exists(upload.temp_path) else 'wb'
+        with open(upload.temp_path, mode) as handle:
+            # Drop bytes of an earlier chunk that was written but not recorded
+            handle.seek(upload.offset)
+            handle.truncate()
+            remaining = upload.size - upload.offset
+            while stream is not None:
+                try:
+                    chunk = stream.read(min(CHUNK_SIZE, remaining) or 1)
+                except (OSError, UnreadablePostError):
+                    break
+                if not chunk:
+                    break
+                if len(chunk) > remaining:
+                    raise UploadError('Chunk exceeds the declared upload size')
+                handle.write(chunk)
+                state.update(chunk)
+                remaining -= len(chunk)
+    except BaseException:
+        # The offset stays; the next chunk truncates what was written
+        claim.update(locked_at=None)
+        raise
+
+    upload.updated_at = timezone.now()
+    if not claim.update(offset=state.offset, locked_at=None, updated_at=upload.updated_at):
+        _states.delete(upload.id)
+        raise UploadConflict('The chunk lock expired', AudioUpload.unscoped.get(pk=upload.pk).offset)
+    upload.offset, upload.locked_at = state.offset, None
+    return upload
+
+
+class PartialFile(File):
+    """The partial file as a Django File; storages move it instead of copying"""
+
+    def __init__(self, path, name):
+        super().__init__(open(path, 'rb'), name=name)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def commit_upload(upload, sha256=None):
+    """
+    Attach the completed upload to its ChapterAudio. The partial file is
+    moved into storage (a rename on the filesystem storage), and the
+    checksum and duration computed while receiving are stored.
+    """
+    with transaction.atomic():
+        upload = _lock(upload)
+        if upload.completed_at:
+            raise UploadConflict('Upload already committed', upload.offset)
+        if upload.locked_at and upload.locked_at >= _stale_before(timezone.now()):
+            raise UploadConflict('A chunk is being received', upload.offset)
+        if upload.offset != upload.size:
+            raise UploadConflict('Upload is incomplete', upload.offset)
+        state = _get_state(upload)
+        digest = state.hasher.hexdigest()
+        if sha256 and sha256.lower() != digest:
+            raise UploadError('Checksum mismatch')
+
+        audio = upload.chapter_audio
+        content = PartialFile(upload.temp_path, upload.filename)
+        try:
+            audio.file.save(upload.filename, content, save=False)
+        finally:
+            content.close()
+        if state.probe.duration is not None:
+            audio.duration_seconds = round(state.probe.duration)
+        audio.save()
+
+        upload.sha256 = digest
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=['sha256', 'completed_at', 'updated_at'])
+    _states.delete(upload.id)
+    return upload
@@ -1,10 +1,18 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import ReciterViewSet,ChapterAudioViewSet,AudioTimestampsViewSet
+from .views import ReciterViewSet,ChapterAudioViewSet,AudioTimestampsViewSet,AudioUploadViewSet
+from .views import ChapterAudioBundleView, ChapterAudioTrackView
 
 
 router=DefaultRouter()
 router.register('reciters',ReciterViewSet, basename='reciter')
 router.register('chapter-audios',ChapterAudioViewSet, basename='chapter-audio')
 router.register('timestamps',AudioTimestampsViewSet, basename='audio-timestamp')
+router.register('uploads',AudioUploadViewSet, basename='audio-upload')
 
-urlpatterns = router.urls
+urlpatterns = [
+    # Async read path (see core.async_views)
+    path('chapter-audios/bundle/', ChapterAudioBundleView.as_view(), name='chapter-audio-bundle'),
+    path('chapter-audios/<int:pk>/track/', ChapterAudioTrackView.as_view(), name='chapter-audio-track'),
+    *router.urls,
+]
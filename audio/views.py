@@ -1,51 +1,279 @@
-from rest_framework import viewsets
+import math
+from django.http import Http404, HttpResponse
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from books.models import Verse
+from books.serializers import ChapterSerializer, VerseSerializer
+from core.async_views import AsyncContentView
+from core.conditional import ConditionalResponseMixin
+from core.content_cache import CachedResponseMixin
+from core.eager import EagerLoadingMixin
 from core.middleware import get_current_tenant
-from .models import Reciter, ChapterAudio, AudioTimestamp
+from .models import Reciter, ChapterAudio, AudioTimestamp, AudioUpload, AudioWaveform, TimestampTrack
+from .streaming import IgnoreClientContentNegotiation, stream_audio
+from .uploads import UploadConflict, UploadError, append_chunk, commit_upload
+from .tracks import DELTA_FIELDS, decode_track, delta_encode, track_indexes
 from .serializers import (
     ReciterSerializer, 
     ChapterAudioSerializer, 
-    AudioTimestampSerializer
+    AudioTimestampSerializer,
+    AudioUploadSerializer,
 )
 
+LOOKUP_BATCH_LIMIT = 1000
 
-class ReciterViewSet(viewsets.ModelViewSet):
+
+def _lookup_result(row):
+    if row is None:
+        return None
+    verse, start, end = row
+    return {'verse': verse, 'start_time': start / 1000, 'end_time': None if end is None else end / 1000}
+
+
+def _parse_values(values, parse, name):
+    try:
+        parsed = [parse(value) for value in values]
+    except (TypeError, ValueError):
+        raise ValidationError({name: 'Invalid value.'})
+    if not all(math.isfinite(value) and value >= 0 for value in parsed):
+        raise ValidationError({name: 'Must be a non-negative number.'})
+    return parsed
+
+
+class ReciterViewSet(ConditionalResponseMixin, CachedResponseMixin, EagerLoadingMixin, viewsets.ModelViewSet):
+    cache_scopes = ('audio',)
     serializer_class = ReciterSerializer
     
     def get_queryset(self):
-        tenant = get_current_tenant()
-        if tenant:
-            return Reciter.objects.filter(tenant=tenant)
-        return Reciter.objects.none()
+        return Reciter.objects.all()
     
     def perform_create(self, serializer):
         tenant = get_current_tenant()
         if tenant:
             serializer.save(tenant=tenant)
 
-class ChapterAudioViewSet(viewsets.ModelViewSet):
+class ChapterAudioViewSet(ConditionalResponseMixin, CachedResponseMixin, EagerLoadingMixin, viewsets.ModelViewSet):
+    cache_scopes = ('audio',)
     serializer_class = ChapterAudioSerializer
+    pagination_ordering = ('chapter', 'reciter')
     
     def get_queryset(self):
+        # Scoped on the denormalized tenant column (no join to chapter/book)
+        return ChapterAudio.objects.all()
+
+    @action(detail=True, content_negotiation_class=IgnoreClientContentNegotiation)
+    def stream(self, request, pk=None):
+        """
+        Play the recitation: supports ``Range`` (including multiple ranges),
+        ``If-Range`` and conditional requests. See audio.streaming.
+        """
+        return stream_audio(request, self.get_object())
+
+    @action(detail=True)
+    def waveform(self, request, pk=None):
+        """Waveform peaks (0-255) computed by the background analysis"""
+        return self.conditional_response(request, self._waveform, pk=pk)
+
+    def _waveform(self, request, pk=None):
+        if not pk.isdigit():
+            raise Http404
+        waveform = (
+            AudioWaveform.objects.filter(chapter_audio_id=pk)
+            .select_related('chapter_audio')
+            .first()
+        )
+        if waveform is None:
+            raise Http404
+        audio = waveform.chapter_audio
+        return Response({
+            'chapter_audio': audio.id,
+            'duration_seconds': audio.duration_seconds,
+            'peaks': list(bytes(waveform.peaks)),
+        })
+
+    @action(detail=True, methods=['get', 'post'])
+    def lookup(self, request, pk=None):
+        """
+        Resolve playback time to verse and verse to time.
+        GET ``?t=<seconds>`` or ``?verse=<number>``; POST
+        ``{"t": [...], "verses": [...]}`` resolves many at once. Unmatched
+        entries (before the first verse, in a gap, unknown verse) are null.
+        """
         tenant = get_current_tenant()
-        if tenant:
-            # Filter by tenant through chapter->book relationship
-            return ChapterAudio.objects.filter(chapter__book__tenant=tenant)
-        return ChapterAudio.objects.none()
+        if tenant is None or not pk.isdigit():
+            raise Http404
+        index = track_indexes.get(tenant.id, int(pk))
+        if index is None:
+            raise Http404
+
+        if request.method == 'POST':
+            times = request.data.get('t') or []
+            verses = request.data.get('verses') or []
+            if not isinstance(times, list) or not isinstance(verses, list):
+                raise ValidationError('"t" and "verses" must be lists.')
+            if len(times) + len(verses) > LOOKUP_BATCH_LIMIT:
+                raise ValidationError(f'At most {LOOKUP_BATCH_LIMIT} lookups per request.')
+        else:
+            times = request.query_params.getlist('t')
+            verses = request.query_params.getlist('verse')
+            if not times and not verses:
+                raise ValidationError('Pass "t" or "verse".')
+
+        times = _parse_values(times, float, 't')
+        verses = _parse_values(verses, int, 'verses')
+        results = {
+            'times': [_lookup_result(index.verse_at(round(t * 1000))) for t in times],
+            'verses': [_lookup_result(index.time_of(verse)) for verse in verses],
+        }
+        if request.method == 'GET' and len(times) + len(verses) == 1:
+            return Response((results['times'] or results['verses'])[0])
+        return Response(results)
     
     def perform_create(self, serializer):
         tenant = get_current_tenant()
         if tenant:
             chapter = serializer.validated_data.get('chapter')
-            if chapter and chapter.book.tenant == tenant:
+            if chapter and chapter.tenant_id == tenant.id:
                 serializer.save()
 
-class AudioTimestampsViewSet(viewsets.ModelViewSet):
+class AudioTimestampsViewSet(ConditionalResponseMixin, CachedResponseMixin, EagerLoadingMixin, viewsets.ModelViewSet):
+    cache_scopes = ('audio',)
     serializer_class = AudioTimestampSerializer
+    pagination_ordering = ('chapter_audio', 'start_time')
     
     def get_queryset(self):
+        # Scoped on the denormalized tenant column (no join to chapter_audio/chapter/book)
+        queryset = AudioTimestamp.objects.all()
+        chapter_audio = self.request.query_params.get('chapter_audio')
+        if chapter_audio is not None:
+            if not chapter_audio.isdigit():
+                raise ValidationError({'chapter_audio': 'A valid integer is required.'})
+            queryset = queryset.filter(chapter_audio_id=chapter_audio)
+        return queryset
+
+
+class AudioUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable chunked upload of a ChapterAudio file (admin only):
+
+    1. ``POST /uploads/`` with ``chapter_audio``, ``filename`` and ``size``
+    2. ``PATCH /uploads/{id}/`` with raw bytes and an ``Upload-Offset``
+       header, repeated until ``offset == size``; ``GET /uploads/{id}/``
+       returns the offset to resume from after a failure
+    3. ``POST /uploads/{id}/commit/`` (optionally with ``sha256``)
+    """
+    serializer_class = AudioUploadSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        return AudioUpload.objects.all()
+
+    def perform_create(self, serializer):
         tenant = get_current_tenant()
-        if tenant:
-            # Filter by tenant through chapter_audio->chapter->book relationship
-            return AudioTimestamp.objects.filter(chapter_audio__chapter__book__tenant=tenant)
-        return AudioTimestamp.objects.none()        
+        chapter_audio = serializer.validated_data['chapter_audio']
+        if tenant is None or chapter_audio.tenant_id != tenant.id:
+            raise ValidationError({'chapter_audio': 'Invalid chapter audio.'})
+        serializer.save(created_by=self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        upload = self.get_object()
+        return self._upload_response(upload)
+
+    def partial_update(self, request, pk=None):
+        upload = self.get_object()
+        offset = request.headers.get('Upload-Offset', '')
+        if not offset.isdigit():
+            raise ValidationError({'Upload-Offset': 'A non-negative integer header is required.'})
+        try:
+            upload = append_chunk(upload, int(offset), request.stream)
+        except UploadConflict as exc:
+            return self._conflict(exc)
+        except UploadError as exc:
+            raise ValidationError(str(exc))
+        return self._upload_response(upload)
+
+    @action(detail=True, methods=['post'])
+    def commit(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            upload = commit_upload(upload, sha256=request.data.get('sha256'))
+        except UploadConflict as exc:
+            return self._conflict(exc)
+        except UploadError as exc:
+            raise ValidationError(str(exc))
+        return Response(ChapterAudioSerializer(upload.chapter_audio, context=self.get_serializer_context()).data)
+
+    def _upload_response(self, upload):
+        return Response(self.get_serializer(upload).data, headers={'Upload-Offset': str(upload.offset)})
+
+    def _conflict(self, exc):
+        return Response(
+            {'detail': str(exc), 'offset': exc.offset},
+            status=status.HTTP_409_CONFLICT,
+            headers={'Upload-Offset': str(exc.offset)},
+        )
+
+
+class ChapterAudioBundleView(AsyncContentView):
+    """
+    GET chapter-audios/bundle/?chapter=<id>&reciter=<id>: everything needed
+    to play a chapter with a reciter, served on the async path.
+    """
+    cache_scopes = ('books', 'audio')
+
+    async def get_data(self, request, tenant):
+        """
+        Three queries: the audio joined with its chapter and reciter, the
+        chapter's verses, and the timestamp track as
+        ``[verse_id, start_time, end_time]`` rows in playback order.
+        """
+        params = {}
+        for name in ('chapter', 'reciter'):
+            value = request.GET.get(name, '')
+            if not value.isdigit():
+                raise ValidationError({name: 'A valid integer is required.'})
+            params[f'{name}_id'] = int(value)
+
+        audio = await ChapterAudio.objects.filter(**params).select_related('chapter', 'reciter').afirst()
+        if audio is None:
+            raise Http404
+        verses = [verse async for verse in Verse.objects.filter(chapter_id=audio.chapter_id).order_by('number')]
+        timestamps = [
+            list(row) async for row in AudioTimestamp.objects.filter(chapter_audio=audio)
+            .order_by('start_time')
+            .values_list('verse_id', 'start_time', 'end_time')
+        ]
+        return {
+            'chapter': ChapterSerializer(audio.chapter).data,
+            'audio': ChapterAudioSerializer(audio, context={'request': request}).data,
+            'verses': VerseSerializer(verses, many=True).data,
+            'timestamps': timestamps,
+        }
+
+
+class ChapterAudioTrackView(AsyncContentView):
+    """
+    GET chapter-audios/{id}/track/: the recitation's packed timestamp track
+    (see audio.tracks), the binary form by default or ``?encoding=json`` for
+    the delta-encoded array. Served on the async path.
+    """
+    cache_scopes = ('audio',)
+    # The binary body is not JSON data; clients revalidate with the ETag
+    cache_data = False
 
+    async def get_data(self, request, tenant, pk):
+        track = await TimestampTrack.objects.filter(chapter_audio_id=pk).afirst()
+        if track is None:
+            raise Http404
+        if request.GET.get('encoding') == 'json':
+            return self.json_response({
+                'chapter_audio': track.chapter_audio_id,
+                'fields': DELTA_FIELDS,
+                'data': delta_encode(decode_track(track.data)),
+            })
+        response = HttpResponse(bytes(track.data), content_type='application/octet-stream')
+        response['X-Track-Verse-Count'] = track.verse_count
+        return response
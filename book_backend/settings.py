@@ -101,6 +101,11 @@ DATABASES = {
     }
 }
 
+# Cache (e.g. CACHE_URL=rediscache://127.0.0.1:6379/1 in production)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -158,6 +163,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    # Keyset pagination: views declare `pagination_ordering`
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': env.int('API_PAGE_SIZE', default=50),
 }
 
 SIMPLE_JWT = {
@@ -165,3 +173,48 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=180),
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+
+# In-process tenant resolution cache used by core.middleware.TenantMiddleware
+TENANT_CACHE_TIMEOUT = env.int('TENANT_CACHE_TIMEOUT', default=300)
+TENANT_CACHE_NEGATIVE_TIMEOUT = env.int('TENANT_CACHE_NEGATIVE_TIMEOUT', default=30)
+TENANT_CACHE_MAX_SIZE = env.int('TENANT_CACHE_MAX_SIZE', default=1024)
+
+# Enforce tenant isolation with PostgreSQL row-level security policies
+# instead of query filters (core.rls); the database role must not bypass RLS
+TENANT_RLS = env.bool('TENANT_RLS', default=False)
+
+# Tenant-versioned API response cache (core.content_cache)
+RESPONSE_CACHE_ALIAS = env('RESPONSE_CACHE_ALIAS', default='default')
+RESPONSE_CACHE_TIMEOUT = env.int('RESPONSE_CACHE_TIMEOUT', default=3600)
+
+# In-process LRU of decoded timestamp tracks used by the audio lookup endpoint
+TRACK_INDEX_CACHE_SIZE = env.int('TRACK_INDEX_CACHE_SIZE', default=256)
+
+# When set (e.g. '/protected-media'), audio streams are handed to nginx via
+# X-Accel-Redirect to an internal location serving MEDIA_ROOT
+AUDIO_X_ACCEL_REDIRECT_PREFIX = env('AUDIO_X_ACCEL_REDIRECT_PREFIX', default='')
+
+# Resumable audio uploads: partial files live here until committed (default:
+# MEDIA_ROOT/tmp_uploads, on the same filesystem so committing is a rename)
+AUDIO_UPLOAD_TEMP_DIR = env('AUDIO_UPLOAD_TEMP_DIR', default='')
+AUDIO_UPLOAD_MAX_SIZE = env.int('AUDIO_UPLOAD_MAX_SIZE', default=2 * 1024 ** 3)
+# Seconds after which a chunk left unfinished by a crashed worker no longer blocks the upload
+AUDIO_UPLOAD_LOCK_TIMEOUT = env.int('AUDIO_UPLOAD_LOCK_TIMEOUT', default=3600)
+
+# Database-backed background jobs (core.jobs, run with `manage.py runjobs`)
+JOB_MAX_ATTEMPTS = env.int('JOB_MAX_ATTEMPTS', default=3)
+JOB_RETRY_DELAY = env.int('JOB_RETRY_DELAY', default=30)
+JOB_STALE_TIMEOUT = env.int('JOB_STALE_TIMEOUT', default=3600)
+JOB_POLL_INTERVAL = env.float('JOB_POLL_INTERVAL', default=1.0)
+
+# Playback progress reports: seconds between batched writes (0: write each
+# report immediately) and pending reports that trigger an early flush
+PLAY_PROGRESS_FLUSH_INTERVAL = env.float('PLAY_PROGRESS_FLUSH_INTERVAL', default=5.0)
+PLAY_PROGRESS_BUFFER_SIZE = env.int('PLAY_PROGRESS_BUFFER_SIZE', default=5000)
+
+# Offline sync of notes and bookmarks (notes.sync): operations per push,
+# changes per feed page, and how long recent writes are held back from the
+# feed so that none can commit behind a cursor already handed out
+SYNC_BATCH_LIMIT = env.int('SYNC_BATCH_LIMIT', default=500)
+SYNC_PAGE_SIZE = env.int('SYNC_PAGE_SIZE', default=500)
+SYNC_SETTLE_SECONDS = env.float('SYNC_SETTLE_SECONDS', default=2.0)
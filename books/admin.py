@@ -11,11 +11,11 @@ class BookAdmin(admin.ModelAdmin):
 @admin.register(Chapter)
 class ChapterAdmin(admin.ModelAdmin):
     list_display = ('title', 'book', 'number', 'juz')
-    list_filter = ('book__tenant', 'book')
+    list_filter = ('tenant', 'book')
     search_fields = ('title',)
 
 @admin.register(Verse)
 class VerseAdmin(admin.ModelAdmin):
     list_display = ('number', 'chapter', 'page_number')
-    list_filter = ('chapter__book__tenant', 'chapter__book', 'chapter')
+    list_filter = ('tenant', 'chapter__book', 'chapter')
     search_fields = ('text', 'translation')
\ No newline at end of file
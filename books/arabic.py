@@ -0,0 +1,118 @@
+import functools
+import re
+import unicodedata
+
+# Harakat, Quranic annotation marks, superscript alef and tatweel
+_STRIPPED = re.compile('[ؐ-ًؚ-ٰٟۖ-ۭـ]')
+_FOLDED = str.maketrans({
+    'آ': 'ا',  # alef madda -> alef
+    'أ': 'ا',  # alef hamza above -> alef
+    'إ': 'ا',  # alef hamza below -> alef
+    'ٱ': 'ا',  # alef wasla -> alef
+    'ى': 'ي',  # alef maksura -> ya
+    'ئ': 'ي',  # ya hamza -> ya
+    'ی': 'ي',  # Persian ya -> ya
+    'ؤ': 'و',  # waw hamza -> waw
+    'ة': 'ه',  # ta marbuta -> ha
+    'ک': 'ك',  # Persian kaf -> kaf
+})
+_WORD = re.compile(r'[^\W_]+')
+
+
+def normalize(text):
+    """
+    Search form of ``text``: diacritics (tashkeel) and tatweel removed, alef,
+    ya, waw-hamza and ta marbuta variants folded, Persian ya/kaf folded to
+    their Arabic letters, other scripts case-folded and stripped of accents,
+    and everything but letters and digits collapsed to single spaces.
+    """
+    if not text:
+        return ''
+    text = _STRIPPED.sub('', text).translate(_FOLDED).casefold()
+    # Latin accents are combining marks after NFD
+    text = ''.join(char for char in unicodedata.normalize('NFD', text) if not unicodedata.combining(char))
+    return ' '.join(_WORD.findall(text))
+
+
+def tokenize(text):
+    """Normalized words of ``text``"""
+    return normalize(text).split()
+
+
+# Light stemming and root extraction, in the spirit of Larkey's light10 and
+# the ISRI stemmer. Both work on normalize()d words: hamza and ta marbuta
+# are already folded, so e.g. رحمة is رحمه here.
+_ARABIC_WORD = re.compile('^[ء-ي]+$')
+_ALLAH = frozenset(['الله', 'لله', 'بالله', 'والله', 'تالله', 'فالله'])
+_DEFINITE = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال')
+_LIGHT_SUFFIXES = ('ها', 'ان', 'ات', 'ون', 'ين', 'يه', 'ه', 'ي')
+# Pronoun and verb suffixes, only stripped on the way to a root
+_ROOT_SUFFIXES = ('كما', 'هما', 'تما', 'تم', 'تن', 'كم', 'كن', 'هم', 'هن', 'نا', 'وا', 'ك', 'ت', 'ا')
+# Medial long vowels of the derived patterns (فاعل, فعول, فعيل, ...)
+_WEAK = 'اوي'
+# Leading letters of verb prefixes and derived patterns (مفعول, تفعيل, استفعل, ...)
+_PATTERN_PREFIXES = 'امتنيس'
+
+
+@functools.lru_cache(maxsize=65536)
+def stem(word):
+    """
+    Light stem of a normalized word: the conjunction و, the article and
+    attached prepositions, and common plural/pronoun suffixes removed.
+    Words in other scripts are returned unchanged.
+    """
+    if not _ARABIC_WORD.match(word):
+        return word
+    if word in _ALLAH:
+        return 'الله'
+    if len(word) >= 4 and word[0] == 'و':
+        word = word[1:]
+    for prefix in _DEFINITE:
+        if word.startswith(prefix) and len(word) - len(prefix) >= 2:
+            word = word[len(prefix):]
+            break
+    for suffix in _LIGHT_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            word = word[:-len(suffix)]
+    return word
+
+
+@functools.lru_cache(maxsize=65536)
+def root(word):
+    """
+    Approximate (usually triliteral) root of a normalized word, e.g. كتب for
+    الكتاب, كاتب, مكتوب and يكتبون. Pattern letters are peeled off until three
+    letters remain: medial long vowels first, then prefix letters, then the
+    ت of افتعل and a trailing ن or ء (فعلان, فعلاء). Heuristic: hollow and hamzated roots
+    come out incomplete, but consistently for all forms of a word.
+    """
+    word = stem(word)
+    if not _ARABIC_WORD.match(word) or word == 'الله':
+        return word
+    for suffix in _ROOT_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    while len(word) > 3:
+        weak = next((index for index in range(1, len(word) - 1) if word[index] in _WEAK), None)
+        if weak is not None:
+            word = word[:weak] + word[weak + 1:]
+        elif word[0] in _PATTERN_PREFIXES:
+            word = word[1:]
+        elif len(word) == 4 and word[1] == 'ت':
+            word = word[0] + word[2:]
+        elif word[-1] in 'نء':
+            word = word[:-1]
+        else:
+            break
+    return word
+
+
+def stems(text):
+    """Light stems of the words of ``text``"""
+    return [stem(word) for word in tokenize(text)]
+
+
+def roots(text):
+    """Roots of the words of ``text``"""
+    return [root(word) for word in tokenize(text)]
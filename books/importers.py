@@ -0,0 +1,226 @@
+import csv
+import json
+import operator
+from functools import reduce
+from itertools import islice
+from django.db import transaction
+from django.db.models import Q
+from core.content_cache import bump_content_version_on_commit
+from .models import Chapter, Verse
+from .pages import rebuild_pages
+from .search import index_verses
+
+
+class ImportFormatError(ValueError):
+    """Raised when an import file cannot be parsed into verse records"""
+
+
+# Accepted column/key names for each record field
+FIELD_ALIASES = {
+    'chapter': ('chapter', 'chapter_number', 'sura', 'surah'),
+    'number': ('number', 'verse', 'verse_number', 'aya', 'ayah'),
+    'text': ('text',),
+    'translation': ('translation',),
+    'page_number': ('page_number', 'page'),
+    'chapter_title': ('chapter_title', 'sura_name', 'surah_name'),
+    'juz': ('juz',),
+}
+INTEGER_FIELDS = ('chapter', 'number', 'page_number', 'juz')
+
+
+def normalize_record(raw, position=None):
+    """Map a parsed row onto the importer's field names, converting integers"""
+    if not isinstance(raw, dict):
+        raise ImportFormatError(f'Record {position}: expected an object, got {type(raw).__name__}')
+    record = {}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            value = raw.get(alias)
+            if value not in (None, ''):
+                record[field] = value
+                break
+    try:
+        for field in INTEGER_FIELDS:
+            if field in record:
+                record[field] = int(record[field])
+    except (TypeError, ValueError):
+        raise ImportFormatError(f'Record {position}: {field} must be an integer')
+    if 'chapter' not in record or 'number' not in record:
+        raise ImportFormatError(f'Record {position}: chapter and verse number are required')
+    return record
+
+
+def iter_json(stream, chunk_size=64 * 1024):
+    """
+    Incrementally parse a JSON array of objects (or JSON Lines / concatenated
+    objects) from a text stream, holding at most one chunk plus one record
+    in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    in_array = None
+    position = 0
+    while True:
+        buffer = buffer.lstrip()
+        if buffer:
+            if in_array is None:
+                in_array = buffer[0] == '['
+                if in_array:
+                    buffer = buffer[1:]
+                continue
+            if buffer[0] == ',':
+                buffer = buffer[1:]
+                continue
+            if buffer[0] == ']' and in_array:
+                return
+            try:
+                raw, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError as exc:
+                if eof:
+                    raise ImportFormatError(f'Invalid JSON near record {position + 1}: {exc.msg}')
+            else:
+                buffer = buffer[end:]
+                position += 1
+                yield normalize_record(raw, position)
+                continue
+        if eof:
+            if in_array:
+                raise ImportFormatError('Unterminated JSON array')
+            return
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def iter_csv(stream):
+    """Parse a CSV file with a header row (see FIELD_ALIASES for column names)"""
+    for position, row in enumerate(csv.DictReader(stream), start=1):
+        yield normalize_record(row, position)
+
+
+def iter_tanzil(stream, field='text'):
+    """
+    Parse the Tanzil text format: one ``sura|aya|text`` line per verse,
+    ``#`` comment lines. ``field`` selects whether the text is the verse
+    text or its translation.
+    """
+    position = 0
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        position += 1
+        parts = line.split('|', 2)
+        if len(parts) != 3:
+            raise ImportFormatError(f'Line {position}: expected sura|aya|text')
+        yield normalize_record({'chapter': parts[0], 'number': parts[1], field: parts[2]}, position)
+
+
+PARSERS = {
+    'json': iter_json,
+    'csv': iter_csv,
+    'tanzil': iter_tanzil,
+}
+
+
+def guess_format(filename):
+    name = filename.lower()
+    if name.endswith(('.json', '.jsonl', '.ndjson')):
+        return 'json'
+    if name.endswith('.csv'):
+        return 'csv'
+    return 'tanzil'
+
+
+class VerseImporter:
+    """
+    Upsert verse records into a book in batches.
+
+    Each batch runs in its own transaction: missing chapters are created
+    with one bulk_create, then the verses are written with one
+    ``INSERT ... ON CONFLICT (chapter, number) DO UPDATE`` per set of
+    supplied fields. Only the fields a record has are updated, so a
+    translation-only file leaves the verse text untouched; the search fields
+    of those verses are then recomputed from the stored text. The page index
+    is rebuilt once at the end.
+    """
+
+    def __init__(self, book, batch_size=1000, progress=None):
+        self.book = book
+        self.batch_size = batch_size
+        self.progress = progress
+        self.chapters = dict(Chapter.unscoped.filter(book=book).values_list('number', 'id'))
+        self.verse_count = 0
+        self.chapters_created = 0
+
+    def run(self, records):
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                self._import_batch(batch)
+                # bulk writes send no signals
+                bump_content_version_on_commit(self.book.tenant_id, 'books')
+            self.verse_count += len(batch)
+            if self.progress:
+                self.progress(self.verse_count)
+        rebuild_pages(self.book.id)
+        bump_content_version_on_commit(self.book.tenant_id, 'books')
+        return self.verse_count
+
+    def _import_batch(self, batch):
+        new_chapters = {}
+        for record in batch:
+            number = record['chapter']
+            if number not in self.chapters and number not in new_chapters:
+                new_chapters[number] = Chapter(
+                    book=self.book,
+                    number=number,
+                    title=record.get('chapter_title') or str(number),
+                    juz=record.get('juz'),
+                )
+        if new_chapters:
+            for chapter in Chapter.unscoped.bulk_create(new_chapters.values()):
+                self.chapters[chapter.number] = chapter.id
+            self.chapters_created += len(new_chapters)
+
+        # Later duplicates of the same verse win; ON CONFLICT cannot touch a row twice
+        verses = {}
+        for record in batch:
+            values = {field: record[field] for field in ('text', 'translation', 'page_number') if field in record}
+            verses[record['chapter'], record['number']] = Verse(
+                book=self.book,
+                chapter_id=self.chapters[record['chapter']],
+                number=record['number'],
+                **Verse.build_search_fields(values.get('text', ''), values.get('translation', '')),
+                **values,
+            ), frozenset(values)
+        # One upsert per set of supplied fields: a record must not reset the
+        # columns it leaves out to their defaults
+        groups = {}
+        for verse, fields in verses.values():
+            groups.setdefault(fields, []).append(verse)
+        for fields, group in groups.items():
+            self._upsert(group, fields)
+
+    def _upsert(self, verses, fields):
+        # With only one of text/translation, the search fields of existing
+        # verses also depend on the stored other half
+        complete = {'text', 'translation'} <= fields
+        Verse.unscoped.bulk_create(
+            verses,
+            update_conflicts=bool(fields),
+            ignore_conflicts=not fields,
+            unique_fields=['chapter', 'number'] if fields else None,
+            update_fields=sorted(fields | set(Verse.SEARCH_FIELDS) if complete else fields) or None,
+        )
+        if fields and not complete:
+            if all(verse.pk is not None for verse in verses):
+                imported = Q(pk__in=[verse.pk for verse in verses])
+            else:
+                # Backends that cannot return the upserted rows
+                imported = reduce(operator.or_, (Q(chapter_id=verse.chapter_id, number=verse.number) for verse in verses))
+            index_verses(Verse.unscoped.filter(imported))
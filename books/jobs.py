@@ -0,0 +1,22 @@
+from core.content_cache import bump_content_version_on_commit
+from core.jobs import job
+from .models import Book, Verse
+from .search import index_verses
+
+
+@job('books.index')
+def index_book_verses(payload):
+    """
+    Recompute the search fields (normalized text, stems and roots) of the
+    verses of ``book``, or of every book without one, in batches.
+    """
+    verses = Verse.unscoped.all()
+    books = Book.unscoped.all()
+    if payload.get('book') is not None:
+        verses = verses.filter(book_id=payload['book'])
+        books = books.filter(id=payload['book'])
+    count = index_verses(verses, batch_size=payload.get('batch_size', 1000))
+    # Bulk writes send no signals; cached search responses are stale
+    for tenant_id in set(books.values_list('tenant_id', flat=True)):
+        bump_content_version_on_commit(tenant_id, 'books')
+    return {'verses': count}
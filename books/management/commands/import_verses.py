@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from books.importers import PARSERS, ImportFormatError, VerseImporter, guess_format
+from books.models import Book
+
+class Command(BaseCommand):
+    help = 'Stream-import verses (and missing chapters) into a book from a JSON, CSV or Tanzil file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('book_id', type=int, help='Target book id')
+        parser.add_argument('path', type=str, help='File to import')
+        parser.add_argument('--format', choices=sorted(PARSERS), help='File format (default: from the extension)')
+        parser.add_argument('--field', choices=['text', 'translation'], default='text', help='Column filled by Tanzil files')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Verses written per transaction')
+
+    def handle(self, *args, **options):
+        try:
+            book = Book.objects.get(pk=options['book_id'])
+        except Book.DoesNotExist:
+            raise CommandError(f'Book {options["book_id"]} does not exist')
+
+        fmt = options['format'] or guess_format(options['path'])
+        importer = VerseImporter(
+            book,
+            batch_size=options['batch_size'],
+            progress=lambda count: self.stdout.write(f'{count} verses imported', ending='\r'),
+        )
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            records = PARSERS[fmt](stream, field=options['field']) if fmt == 'tanzil' else PARSERS[fmt](stream)
+            try:
+                count = importer.run(records)
+            except ImportFormatError as exc:
+                raise CommandError(f'{exc} ({importer.verse_count} verses were committed before the error)')
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {count} verses into "{book.title}" ({importer.chapters_created} chapters created)'
+        ))
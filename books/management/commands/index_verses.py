@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.jobs import enqueue, get_handler
+from books.models import Book
+
+class Command(BaseCommand):
+    help = 'Recompute the normalized, stemmed and root search columns of verses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('book_ids', nargs='*', type=int, help='Book ids (default: all books)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Verses written per query')
+        parser.add_argument('--enqueue', action='store_true', help='Queue jobs for runjobs instead of indexing now')
+
+    def handle(self, *args, **options):
+        books = Book.objects.order_by('id')
+        if options['book_ids']:
+            books = books.filter(id__in=options['book_ids'])
+        tenants = dict(books.values_list('id', 'tenant_id'))
+        ids = list(tenants)
+        if not ids:
+            raise CommandError('No book matches')
+
+        payloads = [{'book': book_id, 'batch_size': options['batch_size']} for book_id in ids]
+        if options['enqueue']:
+            for payload in payloads:
+                enqueue('books.index', payload, tenant=tenants[payload['book']])
+            self.stdout.write(self.style.SUCCESS(f'Queued {len(payloads)} indexing jobs'))
+            return
+
+        handler = get_handler('books.index')
+        total = 0
+        for payload in payloads:
+            count = handler(payload)['verses']
+            total += count
+            self.stdout.write(f'Book {payload["book"]}: {count} verses indexed')
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} verses of {len(payloads)} books'))
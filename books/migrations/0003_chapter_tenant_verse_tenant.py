@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_tenant(apps, schema_editor):
+    Book = apps.get_model('books', 'Book')
+    book_tenant = Subquery(Book.objects.filter(pk=OuterRef('book')).values('tenant')[:1])
+    for model_name in ('Chapter', 'Verse'):
+        apps.get_model('books', model_name).objects.update(tenant=book_tenant)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0002_book_tenant_alter_book_unique_together'),
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapter',
+            name='tenant',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='verse',
+            name='tenant',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.tenant'),
+        ),
+        migrations.RunPython(backfill_tenant, migrations.RunPython.noop),
+    ]
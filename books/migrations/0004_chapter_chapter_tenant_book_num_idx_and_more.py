@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_chapter_tenant_verse_tenant'),
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chapter',
+            index=models.Index(fields=['tenant', 'book', 'number'], name='chapter_tenant_book_num_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chapter',
+            index=models.Index(condition=models.Q(('juz__isnull', False)), fields=['book', 'juz'], name='chapter_book_juz_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verse',
+            index=models.Index(condition=models.Q(('page_number__isnull', False)), fields=['book', 'page_number'], name='verse_book_page_idx'),
+        ),
+    ]
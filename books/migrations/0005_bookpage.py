@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_pages(apps, schema_editor):
+    Verse = apps.get_model('books', 'Verse')
+    BookPage = apps.get_model('books', 'BookPage')
+    pages = {}
+    rows = (
+        Verse.objects.filter(page_number__isnull=False)
+        .order_by('book', 'page_number', 'chapter__number', 'number')
+        .values_list('book', 'page_number', 'id')
+    )
+    for book_id, number, verse_id in rows.iterator():
+        page = pages.get((book_id, number))
+        if page is None:
+            pages[(book_id, number)] = BookPage(book_id=book_id, number=number, first_verse_id=verse_id, last_verse_id=verse_id, verse_count=1)
+        else:
+            page.last_verse_id = verse_id
+            page.verse_count += 1
+    BookPage.objects.bulk_create(pages.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0004_chapter_chapter_tenant_book_num_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('verse_count', models.PositiveIntegerField(default=0)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='books.book')),
+                ('first_verse', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='books.verse')),
+                ('last_verse', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='books.verse')),
+            ],
+            options={
+                'unique_together': {('book', 'number')},
+            },
+        ),
+        migrations.RunPython(build_pages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:56
+
+from django.db import migrations, models
+
+
+def populate_search_text(apps, schema_editor):
+    from books.arabic import normalize
+
+    Verse = apps.get_model('books', 'Verse')
+    rows = []
+    for verse_id, text, translation in Verse.objects.values_list('id', 'text', 'translation').iterator():
+        rows.append(Verse(id=verse_id, search_text=f'{normalize(text)} {normalize(translation)}'.strip()))
+        if len(rows) == 1000:
+            Verse.objects.bulk_update(rows, ['search_text'])
+            rows = []
+    Verse.objects.bulk_update(rows, ['search_text'])
+
+
+def install_index(apps, schema_editor):
+    from books.search import install_search_index
+
+    install_search_index(schema_editor.connection, columns=['search_text'])
+
+
+def drop_index(apps, schema_editor):
+    from books.search import drop_search_index
+
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0005_bookpage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verse',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(populate_search_text, migrations.RunPython.noop),
+        migrations.RunPython(install_index, drop_index),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:02
+
+from django.db import migrations, models
+
+
+def populate_morphology(apps, schema_editor):
+    from books.arabic import roots, stems
+
+    Verse = apps.get_model('books', 'Verse')
+    rows = []
+    for verse_id, text in Verse.objects.values_list('id', 'text').iterator():
+        rows.append(Verse(id=verse_id, stem_text=' '.join(stems(text)), root_text=' '.join(roots(text))))
+        if len(rows) == 1000:
+            Verse.objects.bulk_update(rows, ['stem_text', 'root_text'])
+            rows = []
+    Verse.objects.bulk_update(rows, ['stem_text', 'root_text'])
+
+
+def install_index(apps, schema_editor):
+    from books.search import install_search_index
+
+    install_search_index(schema_editor.connection, columns=['search_text', 'stem_text', 'root_text'])
+
+
+def restore_index(apps, schema_editor):
+    from books.search import drop_search_index, install_search_index
+
+    drop_search_index(schema_editor.connection)
+    install_search_index(schema_editor.connection, columns=['search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0006_verse_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verse',
+            name='root_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='verse',
+            name='stem_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(populate_morphology, migrations.RunPython.noop),
+        migrations.RunPython(install_index, restore_index),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:12
+
+import django.db.models.manager
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0007_verse_morphology'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='book',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='bookpage',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='chapter',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='verse',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+from core.rls import TenantRLS
+
+
+class Migration(migrations.Migration):
+    """Row-level security policies for the optional TENANT_RLS mode (PostgreSQL only, see core.rls)"""
+
+    dependencies = [
+        ('books', '0008_tenant_managers'),
+    ]
+
+    operations = [
+        TenantRLS('book'),
+        TenantRLS('chapter'),
+        TenantRLS('verse'),
+        TenantRLS('bookpage', parent='book'),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0009_tenant_rls'),
+        ('core', '0003_job_tenant'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='verse',
+            index=models.Index(fields=['tenant', 'chapter', 'number'], name='verse_tenant_order_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
-from core.models import Tenant
+from core.models import InheritedTenantModel, Tenant, TenantManager, UnscopedTenantManager, remember_tenant
+from .arabic import normalize, roots, stems
 
 class Book(models.Model):
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="books", null=True, blank=True)
@@ -8,36 +9,114 @@ class Book(models.Model):
     language = models.CharField(max_length=50, default="ar")  # زبان کتاب
     created_at = models.DateTimeField(auto_now_add=True)
 
+    unscoped = UnscopedTenantManager()
+    objects = TenantManager()
+
     class Meta:
         unique_together = ('tenant', 'title')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        remember_tenant(instance)
+        return instance
+
     def __str__(self):
         return self.title
 
 
-class Chapter(models.Model):
+class Chapter(InheritedTenantModel):
+    tenant_parent = "book"
 
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="chapters")
     title = models.CharField(max_length=255)
     number = models.PositiveIntegerField()  
     juz = models.PositiveIntegerField(null=True, blank=True) 
 
+    class Meta:
+        indexes = [
+            # Tenant-scoped chapter list in reading order
+            models.Index(fields=['tenant', 'book', 'number'], name='chapter_tenant_book_num_idx'),
+            models.Index(fields=['book', 'juz'], name='chapter_book_juz_idx', condition=models.Q(juz__isnull=False)),
+        ]
+
     def __str__(self):
         return f"{self.book.title} - {self.title}"
 
 
-class Verse(models.Model):
+class Verse(InheritedTenantModel):
+    tenant_parent = "book"
+
     book=models.ForeignKey(Book, on_delete=models.CASCADE,related_name="verses")
     chapter = models.ForeignKey(Chapter, on_delete=models.CASCADE, related_name="verses")
     number = models.PositiveIntegerField()  
     text = models.TextField() 
     translation = models.TextField(blank=True)
     page_number = models.PositiveIntegerField(null=True, blank=True) 
- 
+    # Normalized text and translation, and light stems and roots of the text;
+    # full-text indexed (see books.search)
+    search_text = models.TextField(blank=True, default='', editable=False)
+    stem_text = models.TextField(blank=True, default='', editable=False)
+    root_text = models.TextField(blank=True, default='', editable=False)
+
+    SEARCH_FIELDS = ('search_text', 'stem_text', 'root_text')
+
 
     class Meta:
-        unique_together = ('chapter', 'number') 
+        unique_together = ('chapter', 'number')  # also serves (chapter, number) lookups
+        indexes = [
+            # Mushaf page lookups; verses without a page are never searched by page
+            models.Index(fields=['book', 'page_number'], name='verse_book_page_idx', condition=models.Q(page_number__isnull=False)),
+            # Tenant-scoped verse list in (chapter, number) order
+            models.Index(fields=['tenant', 'chapter', 'number'], name='verse_tenant_order_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored page and position so only moves rebuild pages
+        instance._loaded_page = (instance.__dict__.get('book_id'), instance.__dict__.get('page_number'))
+        instance._loaded_position = (instance.__dict__.get('chapter_id'), instance.__dict__.get('number'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        for field, value in self.build_search_fields(self.text, self.translation).items():
+            setattr(self, field, value)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'text', 'translation'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, *self.SEARCH_FIELDS}
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def build_search_fields(text, translation):
+        """Values of SEARCH_FIELDS; stems and roots only cover the Arabic text"""
+        return {
+            'search_text': f'{normalize(text)} {normalize(translation)}'.strip(),
+            'stem_text': ' '.join(stems(text)),
+            'root_text': ' '.join(roots(text)),
+        }
 
     def __str__(self):
         return f"{self.chapter.title} - {self.number} P: {self.page_number}"
 
+
+class BookPage(models.Model):
+    """
+    Precomputed page -> verse range index of a book (Mushaf pages).
+    Maintained incrementally by books.pages.rebuild_pages when verses change.
+    """
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="pages")
+    number = models.PositiveIntegerField()
+    first_verse = models.ForeignKey(Verse, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_verse = models.ForeignKey(Verse, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    verse_count = models.PositiveIntegerField(default=0)
+
+    unscoped = UnscopedTenantManager()
+    objects = TenantManager()
+
+    class Meta:
+        unique_together = ('book', 'number')
+
+    def __str__(self):
+        return f"{self.book.title} - P: {self.number}"
+
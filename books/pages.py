@@ -0,0 +1,76 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Q
+from core.on_commit import defer_on_commit
+from .models import BookPage, Verse
+
+
+def rebuild_pages(book_id, page_numbers=None):
+    """
+    Recompute the BookPage rows of ``book_id``.
+
+    When ``page_numbers`` is given only those pages are rebuilt (one indexed
+    range read over (book, page_number) plus one upsert), which is what the
+    Verse signals use; otherwise the whole book is rebuilt.
+    """
+    verses = Verse.unscoped.filter(book_id=book_id, page_number__isnull=False)
+    if page_numbers is not None:
+        page_numbers = {number for number in page_numbers if number is not None}
+        if not page_numbers:
+            return
+        verses = verses.filter(page_number__in=page_numbers)
+
+    pages = {}
+    rows = verses.order_by('page_number', 'chapter__number', 'number').values_list('page_number', 'id')
+    for number, verse_id in rows.iterator():
+        page = pages.get(number)
+        if page is None:
+            pages[number] = BookPage(book_id=book_id, number=number, first_verse_id=verse_id, last_verse_id=verse_id, verse_count=1)
+        else:
+            page.last_verse_id = verse_id
+            page.verse_count += 1
+
+    with transaction.atomic():
+        stale = BookPage.unscoped.filter(book_id=book_id).exclude(number__in=pages.keys())
+        if page_numbers is not None:
+            stale = stale.filter(number__in=page_numbers)
+        stale.delete()
+        if pages:
+            BookPage.unscoped.bulk_create(
+                pages.values(),
+                update_conflicts=True,
+                unique_fields=['book', 'number'],
+                update_fields=['first_verse', 'last_verse', 'verse_count'],
+            )
+
+
+def rebuild_book_pages(pages):
+    """:func:`rebuild_pages` for each ``(book_id, page_number)`` of ``pages``, one call per book"""
+    numbers = defaultdict(set)
+    for book_id, number in pages:
+        numbers[book_id].add(number)
+    for book_id in sorted(numbers):
+        rebuild_pages(book_id, numbers[book_id])
+
+
+def rebuild_page_on_commit(book_id, page_number):
+    """
+    Rebuild a page once the current transaction commits, together with the
+    other pages of the book it touched (a bulk or cascading verse delete).
+    """
+    defer_on_commit(rebuild_book_pages, (book_id, page_number))
+
+
+def page_verses(page):
+    """
+    Q of the verses of ``page`` in reading order, from its precomputed
+    bounds (loaded with their chapters): a (chapter, number) range scan, or
+    one per boundary chapter when the page spans chapters.
+    """
+    first, last = page.first_verse, page.last_verse
+    if first.chapter_id == last.chapter_id:
+        return Q(chapter_id=first.chapter_id, number__range=(first.number, last.number))
+    verses = Q(chapter_id=first.chapter_id, number__gte=first.number) | Q(chapter_id=last.chapter_id, number__lte=last.number)
+    if last.chapter.number - first.chapter.number > 1:
+        verses |= Q(book_id=page.book_id, chapter__number__gt=first.chapter.number, chapter__number__lt=last.chapter.number)
+    return verses
@@ -0,0 +1,223 @@
+"""
+Full-text search over verse text and translation.
+
+Verses carry precomputed search columns (see books.arabic):
+``search_text`` (normalized text and translation), and ``stem_text`` and
+``root_text`` (light stems and roots of the Arabic text). They are indexed
+per database backend:
+
+* PostgreSQL: a GIN index on ``to_tsvector('simple', search_text)``, ranked
+  with ``ts_rank_cd``, and a pg_trgm GIN index on the stem and root
+  columns, ranked with ``word_similarity``;
+* SQLite: an external-content FTS5 table over the three columns, kept in
+  sync by triggers and ranked with ``bm25``;
+* anything else: unindexed ``LIKE`` matching, unranked.
+
+Every term must match. In ``words`` mode the last one also matches as a
+prefix, so results follow the user while they type; ``prefix`` mode
+matches every term's stem as a prefix of a stem of the verse, and
+``root`` mode matches words sharing each term's root.
+"""
+import re
+from django.db import connection
+from django.utils.html import escape
+from .arabic import normalize, root, stem, tokenize
+from .models import Verse
+
+FTS_TABLE = 'books_verse_fts'
+PG_INDEX = 'verse_search_gin_idx'
+PG_TRIGRAM_INDEX = 'verse_morph_trgm_idx'
+SEARCH_MODES = ('words', 'prefix', 'root')
+# Column searched by each mode
+MODE_COLUMNS = {'words': 'search_text', 'prefix': 'stem_text', 'root': 'root_text'}
+SQLITE_TRIGGERS = {f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au'}
+
+
+def sqlite_setup(columns):
+    """Statements creating the FTS5 table over ``columns`` and its sync triggers"""
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        f"{names}, content='books_verse', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON books_verse BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {names}) VALUES (new.id, {new});
+        END""",
+        f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON books_verse BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {names}) VALUES ('delete', old.id, {old});
+        END""",
+        f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {names} ON books_verse BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {names}) VALUES ('delete', old.id, {old});
+            INSERT INTO {FTS_TABLE}(rowid, {names}) VALUES (new.id, {new});
+        END""",
+    ]
+
+
+def install_search_index(connection, columns=Verse.SEARCH_FIELDS):
+    """
+    Create the backend's full-text indexes over the search ``columns`` if
+    they are missing. Idempotent; on SQLite it also restores the triggers,
+    which are dropped whenever a migration rebuilds the verse table, and
+    recreates the FTS table when its columns changed, then re-indexes.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON books_verse USING gin (to_tsvector('simple', search_text))"
+            )
+            morphology = [column for column in columns if column != 'search_text']
+            if morphology:
+                # Needs a role allowed to create the extension
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+                opclasses = ', '.join(f'{column} gin_trgm_ops' for column in morphology)
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS {PG_TRIGRAM_INDEX} ON books_verse USING gin ({opclasses})')
+        elif connection.vendor == 'sqlite':
+            setup = sqlite_setup(columns)
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE (type = 'trigger' AND tbl_name = 'books_verse') OR name = %s",
+                [FTS_TABLE],
+            )
+            existing = dict(cursor.fetchall())
+            if existing.get(FTS_TABLE) != setup[0] or SQLITE_TRIGGERS - existing.keys():
+                drop_search_index(connection)
+                for statement in setup:
+                    cursor.execute(statement)
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {PG_TRIGRAM_INDEX}')
+            cursor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+        elif connection.vendor == 'sqlite':
+            for trigger in sorted(SQLITE_TRIGGERS):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def index_verses(verses, batch_size=1000):
+    """
+    Recompute the search fields of a Verse queryset, ``batch_size`` verses
+    per query, e.g. after bulk writes that bypass save() or a change of the
+    stemmer. Stems and roots are memoized per distinct word, so a batch
+    costs one normalization per verse plus one analysis per new word.
+    Returns the number of verses indexed.
+    """
+    rows = verses.order_by('id').values_list('id', 'text', 'translation')
+    count = 0
+    last_id = 0
+    while True:
+        batch = list(rows.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return count
+        Verse.unscoped.bulk_update(
+            [Verse(id=verse_id, **Verse.build_search_fields(text, translation)) for verse_id, text, translation in batch],
+            Verse.SEARCH_FIELDS,
+        )
+        count += len(batch)
+        last_id = batch[-1][0]
+
+
+def query_terms(query, mode='words'):
+    """Terms of ``query`` as stored in the column searched by ``mode``"""
+    if mode == 'prefix':
+        return [stem(word) for word in tokenize(query)]
+    if mode == 'root':
+        return [root(word) for word in tokenize(query)]
+    return tokenize(query)
+
+
+def search_verses(query, tenant_id, book_id=None, mode='words', limit=20, offset=0):
+    """
+    ``(verse_id, score)`` pairs of the tenant's verses matching ``query``
+    in ``mode`` (see SEARCH_MODES), best first (ties by id). Scores are only
+    comparable within one backend and mode.
+    """
+    terms = query_terms(query, mode)
+    if not terms or tenant_id is None:
+        return []
+    column = MODE_COLUMNS[mode]
+    filters, params = ['v.tenant_id = %s'], [tenant_id]
+    if book_id is not None:
+        filters.append('v.book_id = %s')
+        params.append(book_id)
+    where = ' AND '.join(filters)
+
+    if connection.vendor == 'postgresql' and mode == 'words':
+        tsquery = ' & '.join([*terms[:-1], f'{terms[-1]}:*'])
+        sql = (
+            f"SELECT v.id, ts_rank_cd(to_tsvector('simple', v.search_text), q) AS score "
+            f"FROM books_verse v, to_tsquery('simple', %s) q "
+            f"WHERE to_tsvector('simple', v.search_text) @@ q AND {where} "
+            f"ORDER BY score DESC, v.id LIMIT %s OFFSET %s"
+        )
+        params = [tsquery, *params, limit, offset]
+    elif connection.vendor == 'postgresql':
+        # Word-bounded regular expressions, answered from the trigram index;
+        # terms are normalized letters and digits, nothing to escape
+        end = '' if mode == 'prefix' else '( |$)'
+        patterns = [f'(^| ){term}{end}' for term in terms]
+        sql = (
+            f"SELECT v.id, word_similarity(%s, v.{column}) AS score FROM books_verse v "
+            f"WHERE {' AND '.join([f'v.{column} ~ %s'] * len(patterns))} AND {where} "
+            f"ORDER BY score DESC, v.id LIMIT %s OFFSET %s"
+        )
+        params = [' '.join(terms), *patterns, *params, limit, offset]
+    elif connection.vendor == 'sqlite':
+        if mode == 'prefix':
+            phrases = [f'"{term}"*' for term in terms]
+        else:
+            phrases = [f'"{term}"' for term in terms[:-1]]
+            phrases.append(f'"{terms[-1]}"*' if mode == 'words' else f'"{terms[-1]}"')
+        weights = ', '.join('1.0' if field == column else '0.0' for field in Verse.SEARCH_FIELDS)
+        # bm25() is lower for better matches
+        sql = (
+            f"SELECT v.id, -bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} "
+            f"JOIN books_verse v ON v.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND {where} "
+            f"ORDER BY score DESC, v.id LIMIT %s OFFSET %s"
+        )
+        params = [f'{column} : ({" ".join(phrases)})', *params, limit, offset]
+    else:
+        verses = Verse.unscoped.filter(tenant_id=tenant_id)
+        if book_id is not None:
+            verses = verses.filter(book_id=book_id)
+        for term in terms:
+            verses = verses.filter(**{f'{column}__contains': term})
+        return [(verse_id, 0.0) for verse_id in verses.order_by('id').values_list('id', flat=True)[offset:offset + limit]]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(verse_id, float(score)) for verse_id, score in cursor.fetchall()]
+
+
+def highlight(text, query, mode='words', start='<mark>', end='</mark>'):
+    """
+    HTML-escaped ``text`` with the words matching ``query`` in ``mode``
+    wrapped in ``start``/``end``. Words are compared in normalized form, so
+    matches are found whatever their diacritics.
+    """
+    terms = query_terms(query, mode)
+    if not text or not terms:
+        return escape(text or '')
+    if mode == 'words':
+        exact, prefixes = set(terms[:-1]), (terms[-1],)
+        analyze = str
+    elif mode == 'prefix':
+        exact, prefixes, analyze = set(), tuple(terms), stem
+    else:
+        exact, prefixes, analyze = set(terms), (), root
+
+    def mark(match):
+        word = match.group(0)
+        parts = [analyze(part) for part in normalize(word).split()]
+        if any(part in exact or part.startswith(prefixes) for part in parts):
+            return f'{start}{escape(word)}{end}'
+        return escape(word)
+
+    return ''.join(
+        mark(match) if match.group(0).strip() else match.group(0)
+        for match in re.finditer(r'\s+|\S+', text)
+    )
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Book, Chapter, Verse
+from .search import highlight
 
 class BookSerializer(serializers.ModelSerializer):
     class Meta:
@@ -14,4 +15,25 @@ class ChapterSerializer(serializers.ModelSerializer):
 class VerseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Verse
-        fields = '__all__'
+        exclude = list(Verse.SEARCH_FIELDS)
+
+
+class VerseSearchResultSerializer(VerseSerializer):
+    """
+    A search hit: the verse with its chapter, rank and highlighted text.
+    Expects ``scores`` (verse id -> score), ``query`` and ``mode`` in the context.
+    """
+    chapter_number = serializers.IntegerField(source='chapter.number', read_only=True)
+    chapter_title = serializers.CharField(source='chapter.title', read_only=True)
+    score = serializers.SerializerMethodField()
+    highlight = serializers.SerializerMethodField()
+
+    class Meta(VerseSerializer.Meta):
+        pass
+
+    def get_score(self, verse):
+        return self.context['scores'][verse.id]
+
+    def get_highlight(self, verse):
+        query, mode = self.context['query'], self.context.get('mode', 'words')
+        return {'text': highlight(verse.text, query, mode), 'translation': highlight(verse.translation, query, mode)}
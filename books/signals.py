@@ -0,0 +1,63 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+from core.content_cache import bump_content_version_on_commit
+from .models import Book, Chapter, Verse
+from .pages import rebuild_page_on_commit, rebuild_pages
+from .search import install_search_index
+
+@receiver(post_save, sender=Verse)
+def update_pages_on_verse_save(sender, instance, created=False, raw=False, **kwargs):
+    """Rebuild the verse's page, and its previous page if it moved"""
+    if raw:
+        return
+    old_book_id, old_page = getattr(instance, '_loaded_page', (None, None))
+    current = (instance.book_id, instance.page_number)
+    position = (instance.chapter_id, instance.number)
+    if not created and (old_book_id, old_page) == current and getattr(instance, '_loaded_position', None) == position:
+        # Text edits leave the page ranges as they are
+        return
+    if old_book_id is not None and (old_book_id, old_page) != current:
+        rebuild_pages(old_book_id, [old_page])
+    rebuild_pages(instance.book_id, [instance.page_number])
+    instance._loaded_page = current
+    instance._loaded_position = position
+
+
+@receiver(post_delete, sender=Verse)
+def update_pages_on_verse_delete(sender, instance, origin=None, **kwargs):
+    # Deleting a whole book cascades to its pages; nothing to rebuild
+    if getattr(origin, 'model', type(origin)) is Book:
+        return
+    rebuild_page_on_commit(instance.book_id, instance.page_number)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Chapter)
+@receiver(post_save, sender=Verse)
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Chapter)
+@receiver(post_delete, sender=Verse)
+def bump_books_version(sender, instance, **kwargs):
+    """Invalidate the tenant's cached book content"""
+    bump_content_version_on_commit(instance.tenant_id, 'books')
+
+
+@receiver(post_migrate)
+def ensure_search_index(sender, using='default', apps=None, **kwargs):
+    """
+    Recreate the full-text index after migrations: SQLite drops the FTS
+    triggers whenever a migration rebuilds the verse table, and test
+    databases created without migrations never ran the search migrations.
+    """
+    if sender.name != 'books' or apps is None:
+        return
+    try:
+        verse = apps.get_model('books', 'Verse')
+    except LookupError:
+        return
+    # Only the columns of the migrated state, which is older after migrating backwards
+    fields = {field.name for field in verse._meta.get_fields()}
+    columns = [column for column in Verse.SEARCH_FIELDS if column in fields]
+    if columns:
+        install_search_index(connections[using], columns)
@@ -1,5 +1,5 @@
 import pytest
-from books.models import Book
+from books.models import Book, Chapter
 from django.db import IntegrityError
 from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
 from core.tests.factories import TenantFactory
@@ -245,4 +245,70 @@ class TestVerseModel:
         
         verse_with_fields = VerseFactory(translation="Translation", page_number=10)
         assert verse_with_fields.translation == "Translation"
-        assert verse_with_fields.page_number == 10
\ No newline at end of file
+        assert verse_with_fields.page_number == 10
+
+class TestDenormalizedTenant:
+    """
+    Unit tests for the denormalized tenant column on Chapter and Verse.
+    Tests cover save(), bulk_create(), update() and propagation of a book's tenant change.
+    """
+    
+    @pytest.mark.django_db
+    def test_tenant_copied_on_save(self):
+        """
+        Test that saving a chapter or verse copies the book's tenant.
+        """
+        tenant = TenantFactory()
+        book = BookFactory(tenant=tenant)
+        chapter = ChapterFactory(book=book)
+        verse = VerseFactory(book=book, chapter=chapter)
+        
+        assert chapter.tenant_id == tenant.id
+        assert verse.tenant_id == tenant.id
+    
+    @pytest.mark.django_db
+    def test_tenant_filled_on_bulk_create(self, django_assert_num_queries):
+        """
+        Test that bulk_create fills the tenant for rows whose book is not loaded.
+        Verifies the parents are resolved with a single extra query.
+        """
+        tenant = TenantFactory()
+        book = BookFactory(tenant=tenant)
+        chapters = [Chapter(book_id=book.id, title=f"C{n}", number=n) for n in range(3)]
+        
+        with django_assert_num_queries(2):
+            Chapter.objects.bulk_create(chapters)
+        
+        assert set(Chapter.objects.filter(book=book).values_list('tenant_id', flat=True)) == {tenant.id}
+    
+    @pytest.mark.django_db
+    def test_tenant_follows_book_reassignment(self):
+        """
+        Test that queryset.update() of the parent relation also updates the tenant.
+        """
+        book = BookFactory()
+        other = BookFactory()
+        chapter = ChapterFactory(book=book)
+        
+        Chapter.objects.filter(pk=chapter.pk).update(book=other)
+        chapter.refresh_from_db()
+        
+        assert chapter.tenant_id == other.tenant_id
+    
+    @pytest.mark.django_db
+    def test_book_tenant_change_propagates(self):
+        """
+        Test that moving a book to another tenant updates its chapters and verses.
+        """
+        book = BookFactory()
+        chapter = ChapterFactory(book=book)
+        verse = VerseFactory(book=book, chapter=chapter)
+        new_tenant = TenantFactory()
+        
+        book.tenant = new_tenant
+        book.save()
+        chapter.refresh_from_db()
+        verse.refresh_from_db()
+        
+        assert chapter.tenant_id == new_tenant.id
+        assert verse.tenant_id == new_tenant.id
@@ -0,0 +1,167 @@
+import pytest
+from rest_framework.test import APIClient
+from books.models import BookPage, Verse
+from books.pages import rebuild_book_pages, rebuild_pages
+from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
+from core.tests.factories import TenantFactory
+
+class TestBookPageIndex:
+    """
+    Unit tests for the precomputed BookPage index.
+    Tests cover incremental maintenance on verse save/move/delete and full rebuilds.
+    """
+    
+    @pytest.mark.django_db
+    def test_page_created_on_verse_save(self):
+        """
+        Test that saving verses maintains the page's verse range and count.
+        """
+        book = BookFactory()
+        chapter = ChapterFactory(book=book, number=1)
+        first = VerseFactory(book=book, chapter=chapter, number=1, page_number=2)
+        last = VerseFactory(book=book, chapter=chapter, number=2, page_number=2)
+        
+        page = BookPage.objects.get(book=book, number=2)
+        assert page.verse_count == 2
+        assert page.first_verse == first
+        assert page.last_verse == last
+    
+    @pytest.mark.django_db
+    def test_verse_moved_between_pages(self):
+        """
+        Test that moving the only verse of a page removes that page
+        and adds the verse to the new page.
+        """
+        book = BookFactory()
+        verse = VerseFactory(book=book, page_number=1)
+        
+        verse.page_number = 3
+        verse.save()
+        
+        assert list(BookPage.objects.filter(book=book).values_list('number', flat=True)) == [3]
+    
+    @pytest.mark.django_db
+    def test_page_removed_on_verse_delete(self, django_capture_on_commit_callbacks):
+        """
+        Test that deleting the last verse of a page removes the page.
+        """
+        verse = VerseFactory(page_number=1)
+        book = verse.book
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            verse.delete()
+        
+        assert not BookPage.objects.filter(book=book).exists()
+    
+    @pytest.mark.django_db
+    def test_queryset_delete_rebuilds_pages(self, django_capture_on_commit_callbacks):
+        """
+        Test that a bulk delete rebuilds the pages it touched once, on
+        commit, and the page keeps serving its remaining verses.
+        """
+        book = BookFactory()
+        chapter = ChapterFactory(book=book, number=1)
+        for number in (1, 2, 3):
+            VerseFactory(book=book, chapter=chapter, number=number, page_number=1)
+        
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            Verse.unscoped.filter(book=book, number__gt=1).delete()
+        
+        assert len([callback for callback in callbacks if getattr(callback, 'callback', None) is rebuild_book_pages]) == 1
+        page = BookPage.objects.get(book=book, number=1)
+        assert (page.verse_count, page.first_verse.number, page.last_verse.number) == (1, 1, 1)
+        response = APIClient().get(f'/api/v1/books/{book.id}/pages/1/', HTTP_X_TENANT_ID=str(book.tenant_id))
+        assert response.status_code == 200
+    
+    @pytest.mark.django_db
+    def test_text_edit_keeps_pages(self, django_assert_num_queries):
+        """
+        Test that editing a verse's text, which cannot move it, does not rebuild its page.
+        """
+        verse = VerseFactory(page_number=1)
+        verse.text = 'بسم الله'
+        
+        with django_assert_num_queries(1):
+            verse.save()
+    
+    @pytest.mark.django_db
+    def test_full_rebuild(self):
+        """
+        Test rebuilding every page of a book after rows were written without signals.
+        """
+        verse = VerseFactory(page_number=1)
+        BookPage.objects.all().delete()
+        
+        rebuild_pages(verse.book_id)
+        
+        assert BookPage.objects.get(book=verse.book, number=1).verse_count == 1
+
+
+class TestBookPageEndpoint:
+    """
+    Tests for GET /api/v1/books/{id}/pages/{n}/.
+    """
+    
+    @pytest.fixture
+    def page_setup(self):
+        """Fixture providing a book whose page 2 spans the end of chapter 1 and start of chapter 2."""
+        tenant = TenantFactory()
+        book = BookFactory(tenant=tenant)
+        chapter1 = ChapterFactory(book=book, number=1)
+        chapter2 = ChapterFactory(book=book, number=2)
+        VerseFactory(book=book, chapter=chapter1, number=1, page_number=1)
+        VerseFactory(book=book, chapter=chapter2, number=1, page_number=2)
+        VerseFactory(book=book, chapter=chapter1, number=2, page_number=2)
+        return tenant, book, chapter1, chapter2
+    
+    @pytest.mark.django_db
+    def test_page_returns_verses_and_chapters(self, page_setup, django_assert_max_num_queries):
+        """
+        Test that the page lists its verses in reading order with chapter headers,
+        using one query for the page index and one for the verses.
+        """
+        tenant, book, chapter1, chapter2 = page_setup
+        client = APIClient()
+        client.get(f'/api/v1/books/{book.id}/pages/2/', HTTP_X_TENANT_ID=str(tenant.id))  # warm the tenant cache
+        
+        with django_assert_max_num_queries(2):
+            response = client.get(f'/api/v1/books/{book.id}/pages/2/', HTTP_X_TENANT_ID=str(tenant.id))
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [(verse['chapter'], verse['number']) for verse in data['verses']] == [(chapter1.id, 2), (chapter2.id, 1)]
+        assert [chapter['id'] for chapter in data['chapters']] == [chapter1.id, chapter2.id]
+        assert data['previous_page'] == 1
+        assert data['next_page'] is None
+    
+    @pytest.mark.django_db
+    def test_page_of_other_tenant_not_found(self, page_setup):
+        """
+        Test that a page of another tenant's book returns 404.
+        """
+        _, book, _, _ = page_setup
+        other = TenantFactory()
+        
+        response = APIClient().get(f'/api/v1/books/{book.id}/pages/2/', HTTP_X_TENANT_ID=str(other.id))
+        
+        assert response.status_code == 404
+    
+    @pytest.mark.django_db
+    def test_page_spanning_several_chapters(self):
+        """
+        Test that a page covering whole chapters between its bounds lists
+        them all, and nothing outside the bounds.
+        """
+        tenant = TenantFactory()
+        book = BookFactory(tenant=tenant)
+        chapters = [ChapterFactory(book=book, number=number) for number in (1, 2, 3, 4)]
+        VerseFactory(book=book, chapter=chapters[0], number=1, page_number=1)
+        for chapter, number in [(chapters[0], 2), (chapters[1], 1), (chapters[1], 2), (chapters[2], 1)]:
+            VerseFactory(book=book, chapter=chapter, number=number, page_number=5)
+        VerseFactory(book=book, chapter=chapters[3], number=1, page_number=6)
+        
+        response = APIClient().get(f'/api/v1/books/{book.id}/pages/5/', HTTP_X_TENANT_ID=str(tenant.id))
+        
+        assert [(verse['chapter'], verse['number']) for verse in response.json()['verses']] == [
+            (chapters[0].id, 2), (chapters[1].id, 1), (chapters[1].id, 2), (chapters[2].id, 1),
+        ]
@@ -0,0 +1,217 @@
+import io
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from books.arabic import normalize, root, stem
+from books.importers import VerseImporter, iter_tanzil
+from books.models import Verse
+from books.search import highlight, index_verses, search_verses
+from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
+
+BASMALA = 'بِسْمِ اللَّهِ الرَّحْمَٰنِ الرَّحِيمِ'
+
+
+class TestNormalize:
+    """
+    Unit tests for the Arabic search normalization.
+    """
+
+    def test_strips_tashkeel(self):
+        assert normalize(BASMALA) == 'بسم الله الرحمن الرحيم'
+
+    def test_folds_letter_variants(self):
+        assert normalize('إِنَّ أَنزَلْنَاهُ آمَنُوا') == 'ان انزلناه امنوا'
+        assert normalize('رحمة') == normalize('رحمه')
+        assert normalize('هدى') == normalize('هدي')
+        assert normalize('ـــالله') == 'الله'
+
+    def test_folds_latin_case_and_accents(self):
+        assert normalize('In the Name of Allāh, the Merciful!') == 'in the name of allah the merciful'
+
+
+class TestSearchVerses:
+    """
+    Unit tests for the full-text index: matching, ranking and tenant/book filtering.
+    """
+
+    @pytest.mark.django_db
+    def test_matches_regardless_of_diacritics(self):
+        verse = VerseFactory(text=BASMALA)
+        VerseFactory(book=verse.book, text='الْحَمْدُ لِلَّهِ رَبِّ الْعَالَمِينَ')
+
+        assert [verse_id for verse_id, _ in search_verses('الرحمن', verse.tenant_id)] == [verse.id]
+
+    @pytest.mark.django_db
+    def test_requires_all_words_and_prefix_matches_last(self):
+        verse = VerseFactory(text=BASMALA, translation='In the name of Allah')
+        VerseFactory(book=verse.book, text='الرحمن علم القرآن')
+
+        assert [verse_id for verse_id, _ in search_verses('الرحمن الرحي', verse.tenant_id)] == [verse.id]
+        assert [verse_id for verse_id, _ in search_verses('nam', verse.tenant_id)] == [verse.id]
+
+    @pytest.mark.django_db
+    def test_ranks_denser_matches_first(self):
+        book = BookFactory()
+        chapter = ChapterFactory(book=book)
+        sparse = VerseFactory(book=book, chapter=chapter, text='رحمة ' + ' '.join(['كلمة'] * 30))
+        dense = VerseFactory(book=book, chapter=chapter, text='رحمة ربك رحمة')
+
+        assert [verse_id for verse_id, _ in search_verses('رحمه', book.tenant_id)] == [dense.id, sparse.id]
+
+    @pytest.mark.django_db
+    def test_filters_by_tenant_and_book(self):
+        verse = VerseFactory(text=BASMALA)
+        other_book = VerseFactory(book=BookFactory(tenant=verse.book.tenant), text=BASMALA)
+        VerseFactory(text=BASMALA)  # another tenant
+
+        assert {verse_id for verse_id, _ in search_verses('بسم', verse.tenant_id)} == {verse.id, other_book.id}
+        assert [verse_id for verse_id, _ in search_verses('بسم', verse.tenant_id, book_id=verse.book_id)] == [verse.id]
+
+    @pytest.mark.django_db
+    def test_index_follows_updates_and_deletes(self):
+        verse = VerseFactory(text=BASMALA)
+        verse.text = 'قل هو الله احد'
+        verse.save(update_fields=['text'])
+
+        assert search_verses('بسم', verse.tenant_id) == []
+        assert [verse_id for verse_id, _ in search_verses('احد', verse.tenant_id)] == [verse.id]
+        verse.delete()
+        assert search_verses('احد', verse.tenant_id) == []
+
+    @pytest.mark.django_db
+    def test_importer_keeps_search_text_in_sync(self):
+        book = BookFactory()
+        VerseImporter(book).run(iter_tanzil(io.StringIO(f'1|1|{BASMALA}\n')))
+        VerseImporter(book).run(iter_tanzil(io.StringIO('1|1|In the name of Allah\n'), field='translation'))
+
+        verse = Verse.objects.get(book=book)
+        assert verse.search_text == 'بسم الله الرحمن الرحيم in the name of allah'
+        assert verse.root_text == 'بسم الله رحم رحم'
+        assert [verse_id for verse_id, _ in search_verses('الرحيم allah', book.tenant_id)] == [verse.id]
+
+
+class TestHighlight:
+    """
+    Unit tests for search hit highlighting.
+    """
+
+    def test_marks_matching_words_with_original_diacritics(self):
+        assert highlight(BASMALA, 'الرحمن') == 'بِسْمِ اللَّهِ <mark>الرَّحْمَٰنِ</mark> الرَّحِيمِ'
+
+    def test_last_term_matches_as_prefix_and_html_is_escaped(self):
+        assert highlight('Mercy <b>merciful</b>', 'merc') == '<mark>Mercy</mark> <mark>&lt;b&gt;merciful&lt;/b&gt;</mark>'
+
+
+class TestSearchEndpoint:
+    """
+    API tests for GET /api/v1/verses/search/.
+    """
+
+    @pytest.mark.django_db
+    def test_returns_ranked_highlighted_results(self):
+        verse = VerseFactory(text=BASMALA, translation='In the name of Allah')
+
+        response = APIClient().get('/api/v1/verses/search/', {'q': 'الله'}, HTTP_X_TENANT_ID=str(verse.tenant_id))
+
+        assert response.status_code == 200
+        assert response.data['next'] is None and response.data['previous'] is None
+        [result] = response.data['results']
+        assert result['id'] == verse.id
+        assert result['chapter_number'] == verse.chapter.number
+        assert isinstance(result['score'], float)
+        assert result['highlight']['text'] == 'بِسْمِ <mark>اللَّهِ</mark> الرَّحْمَٰنِ الرَّحِيمِ'
+        assert 'search_text' not in result
+
+    @pytest.mark.django_db
+    def test_paginates(self):
+        book = BookFactory()
+        chapter = ChapterFactory(book=book)
+        verses = [VerseFactory(book=book, chapter=chapter, text=BASMALA) for _ in range(3)]
+        client = APIClient()
+
+        first = client.get('/api/v1/verses/search/', {'q': 'بسم', 'page_size': 2}, HTTP_X_TENANT_ID=str(book.tenant_id))
+        second = client.get(first.data['next'], HTTP_X_TENANT_ID=str(book.tenant_id))
+
+        ids = [result['id'] for result in first.data['results'] + second.data['results']]
+        assert sorted(ids) == sorted(verse.id for verse in verses)
+        assert second.data['next'] is None
+        assert 'page=' not in second.data['previous']
+
+    @pytest.mark.django_db
+    def test_validates_parameters(self):
+        verse = VerseFactory()
+        client = APIClient()
+
+        for params in ({}, {'q': 'x', 'page_size': 101}, {'q': 'x', 'page': 0}, {'q': 'x', 'book': 'a'}):
+            response = client.get('/api/v1/verses/search/', params, HTTP_X_TENANT_ID=str(verse.tenant_id))
+            assert response.status_code == 400
+
+
+class TestMorphologySearch:
+    """
+    Tests for stem/root analysis and the prefix and root search modes.
+    """
+
+    def test_roots_of_derived_forms(self):
+        forms = ['الكتاب', 'كاتب', 'مكتوب', 'يكتبون', 'وكتبنا']
+        assert {root(normalize(word)) for word in forms} == {'كتب'}
+        assert root(normalize('العالمين')) == root(normalize('يعلمون')) == 'علم'
+        assert stem(normalize('والكتاب')) == 'كتاب'
+        assert stem('mercy') == root('mercy') == 'mercy'
+
+    @pytest.mark.django_db
+    def test_save_stores_stems_and_roots_of_text(self):
+        verse = VerseFactory(text='ذَٰلِكَ الْكِتَابُ لَا رَيْبَ فِيهِ', translation='That is the Book')
+
+        assert verse.stem_text.split()[1] == 'كتاب'
+        assert 'كتب' in verse.root_text.split()
+        assert 'book' not in verse.stem_text
+
+    @pytest.mark.django_db
+    def test_root_mode_matches_other_forms(self):
+        verse = VerseFactory(text='ذَٰلِكَ الْكِتَابُ لَا رَيْبَ فِيهِ')
+        VerseFactory(book=verse.book, text='قل هو الله احد')
+
+        assert [verse_id for verse_id, _ in search_verses('الكتاب', verse.tenant_id)] == [verse.id]
+        assert search_verses('يكتبون', verse.tenant_id) == []
+        assert [verse_id for verse_id, _ in search_verses('يكتبون', verse.tenant_id, mode='root')] == [verse.id]
+
+    @pytest.mark.django_db
+    def test_prefix_mode_ignores_clitics(self):
+        verse = VerseFactory(text='وَبِالْآخِرَةِ هُمْ يُوقِنُونَ')
+
+        assert search_verses('اخر', verse.tenant_id) == []
+        assert [verse_id for verse_id, _ in search_verses('اخر', verse.tenant_id, mode='prefix')] == [verse.id]
+        assert highlight(verse.text, 'اخر', mode='prefix') == '<mark>وَبِالْآخِرَةِ</mark> هُمْ يُوقِنُونَ'
+
+    @pytest.mark.django_db
+    def test_index_verses_backfills_search_fields(self):
+        verse = VerseFactory(text='ذَٰلِكَ الْكِتَابُ')
+        Verse.objects.filter(id=verse.id).update(search_text='', stem_text='', root_text='')
+        assert search_verses('كتب', verse.tenant_id, mode='root') == []
+
+        assert index_verses(Verse.objects.filter(book=verse.book), batch_size=1) == 1
+        assert [verse_id for verse_id, _ in search_verses('كتب', verse.tenant_id, mode='root')] == [verse.id]
+
+    @pytest.mark.django_db
+    def test_index_command(self):
+        verse = VerseFactory(text='ذَٰلِكَ الْكِتَابُ')
+        Verse.objects.filter(id=verse.id).update(root_text='')
+
+        call_command('index_verses', str(verse.book_id), stdout=io.StringIO())
+
+        verse.refresh_from_db()
+        assert verse.root_text.split()[1] == 'كتب'
+
+    @pytest.mark.django_db
+    def test_endpoint_mode(self):
+        verse = VerseFactory(text='ذَٰلِكَ الْكِتَابُ لَا رَيْبَ فِيهِ')
+        client = APIClient()
+
+        response = client.get('/api/v1/verses/search/', {'q': 'كاتب', 'mode': 'root'}, HTTP_X_TENANT_ID=str(verse.tenant_id))
+        assert [result['id'] for result in response.data['results']] == [verse.id]
+        assert response.data['results'][0]['highlight']['text'] == 'ذَٰلِكَ <mark>الْكِتَابُ</mark> لَا رَيْبَ فِيهِ'
+        assert 'root_text' not in response.data['results'][0]
+
+        response = client.get('/api/v1/verses/search/', {'q': 'x', 'mode': 'fuzzy'}, HTTP_X_TENANT_ID=str(verse.tenant_id))
+        assert response.status_code == 400
@@ -1,5 +1,6 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import BookViewSet, ChapterViewSet, VerseViewSet
+from .views import BookPageView, BookViewSet, ChapterViewSet, VerseViewSet
 
 
 router = DefaultRouter()
@@ -7,4 +8,8 @@ router.register(r'books', BookViewSet, basename='book')
 router.register(r'chapters', ChapterViewSet, basename='chapter')
 router.register(r'verses', VerseViewSet, basename='verse')
 
-urlpatterns = router.urls
+urlpatterns = [
+    # Async read path (see core.async_views)
+    path('books/<int:pk>/pages/<int:page_number>/', BookPageView.as_view(), name='book-page'),
+    *router.urls,
+]
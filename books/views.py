@@ -1,50 +1,98 @@
+import io
+from django.http import Http404
 from django.shortcuts import render
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from core.async_views import AsyncContentView
+from core.conditional import ConditionalResponseMixin
+from core.content_cache import CachedResponseMixin
+from core.eager import EagerLoadingMixin
 from core.middleware import get_current_tenant
-from .models import Book, Chapter, Verse
-from .serializers import BookSerializer, ChapterSerializer, VerseSerializer
+from .importers import PARSERS, ImportFormatError, VerseImporter, guess_format
+from .models import Book, BookPage, Chapter, Verse
+from .pages import page_verses
+from .search import SEARCH_MODES, search_verses
+from .serializers import BookSerializer, ChapterSerializer, VerseSearchResultSerializer, VerseSerializer
 
-class BookViewSet(viewsets.ModelViewSet):
+# Default and largest number of search results per page
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+class BookViewSet(ConditionalResponseMixin, CachedResponseMixin, EagerLoadingMixin, viewsets.ModelViewSet):
+    cache_scopes = ('books',)
     serializer_class = BookSerializer
     
     def get_queryset(self):
-        tenant = get_current_tenant()
-        if tenant:
-            return Book.objects.filter(tenant=tenant)
-        return Book.objects.none()
+        return Book.objects.all()
     
     def perform_create(self, serializer):
         tenant = get_current_tenant()
         if tenant:
             serializer.save(tenant=tenant)
 
-class ChapterViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['post'], url_path='import', permission_classes=[IsAdminUser], parser_classes=[MultiPartParser])
+    def import_verses(self, request, pk=None):
+        """
+        Bulk upsert verses from an uploaded JSON/CSV/Tanzil file (admin only).
+        The upload is parsed as a stream and written in batched transactions.
+        """
+        book = self.get_object()
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'This field is required.'})
+        fmt = request.data.get('format') or guess_format(upload.name)
+        if fmt not in PARSERS:
+            raise ValidationError({'format': f'Must be one of {", ".join(sorted(PARSERS))}.'})
+
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        if fmt == 'tanzil':
+            field = request.data.get('field') or 'text'
+            if field not in ('text', 'translation'):
+                raise ValidationError({'field': 'Must be "text" or "translation".'})
+            records = PARSERS[fmt](stream, field=field)
+        else:
+            records = PARSERS[fmt](stream)
+        importer = VerseImporter(book)
+        try:
+            importer.run(records)
+        except ImportFormatError as exc:
+            raise ValidationError({'file': str(exc), 'imported': importer.verse_count})
+        return Response(
+            {'imported': importer.verse_count, 'chapters_created': importer.chapters_created},
+            status=status.HTTP_201_CREATED,
+        )
+
+class ChapterViewSet(ConditionalResponseMixin, CachedResponseMixin, EagerLoadingMixin, viewsets.ModelViewSet):
+    cache_scopes = ('books',)
     serializer_class = ChapterSerializer
+    pagination_ordering = ('book', 'number')
     
     def get_queryset(self):
-        tenant = get_current_tenant()
-        if tenant:
-            # Filter chapters by tenant through book relationship
-            return Chapter.objects.filter(book__tenant=tenant)
-        return Chapter.objects.none()
+        # Scoped on the denormalized tenant column (no join to book)
+        return Chapter.objects.all()
     
     def perform_create(self, serializer):
         tenant = get_current_tenant()
         if tenant:
             # Ensure book belongs to tenant
             book = serializer.validated_data.get('book')
-            if book and book.tenant == tenant:
+            if book and book.tenant_id == tenant.id:
                 serializer.save()
 
-class VerseViewSet(viewsets.ModelViewSet):
+class VerseViewSet(ConditionalResponseMixin, CachedResponseMixin, EagerLoadingMixin, viewsets.ModelViewSet):
+    cache_scopes = ('books',)
     serializer_class = VerseSerializer
+    # Local columns, seeking along verse_tenant_order_idx
+    pagination_ordering = ('chapter', 'number')
     
     def get_queryset(self):
-        tenant = get_current_tenant()
-        if tenant:
-            # Filter verses by tenant through book relationship
-            return Verse.objects.filter(book__tenant=tenant)
-        return Verse.objects.none()
+        # Scoped on the denormalized tenant column (no join to book)
+        return Verse.objects.all()
     
     def perform_create(self, serializer):
         tenant = get_current_tenant()
@@ -52,5 +100,102 @@ class VerseViewSet(viewsets.ModelViewSet):
             # Ensure book and chapter belong to tenant
             book = serializer.validated_data.get('book')
             chapter = serializer.validated_data.get('chapter')
-            if book and book.tenant == tenant and chapter and chapter.book.tenant == tenant:
+            if book and book.tenant_id == tenant.id and chapter and chapter.tenant_id == tenant.id:
                 serializer.save()
+
+    @action(detail=False)
+    def search(self, request):
+        """
+        Ranked full-text search over the tenant's verse text and translation:
+        ``?q=`` (all words must match, the last one as a prefix), optionally
+        ``?book=``, paginated with ``?page=`` and ``?page_size=`` up to 100.
+        ``?mode=prefix`` matches word stems as prefixes and ``?mode=root``
+        words of the same root, ignoring clitics and derived patterns.
+        """
+        return self.conditional_response(request, self.cached_response, self._search)
+
+    def _search(self, request):
+        params = request.query_params
+        query = params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This field is required.'})
+        mode = params.get('mode', 'words')
+        if mode not in SEARCH_MODES:
+            raise ValidationError({'mode': f'Must be one of {", ".join(SEARCH_MODES)}.'})
+        book = params.get('book')
+        if book is not None and not book.isdigit():
+            raise ValidationError({'book': 'Must be a book id.'})
+        page = params.get('page', '1')
+        if not page.isdigit() or int(page) < 1:
+            raise ValidationError({'page': 'Must be a positive integer.'})
+        page_size = params.get('page_size', str(SEARCH_PAGE_SIZE))
+        if not page_size.isdigit() or not 0 < int(page_size) <= SEARCH_MAX_PAGE_SIZE:
+            raise ValidationError({'page_size': f'Must be between 1 and {SEARCH_MAX_PAGE_SIZE}.'})
+        page, page_size = int(page), int(page_size)
+
+        tenant = get_current_tenant()
+        # One extra hit tells whether there is a next page
+        hits = search_verses(
+            query,
+            tenant.id if tenant else None,
+            book_id=int(book) if book is not None else None,
+            mode=mode,
+            limit=page_size + 1,
+            offset=(page - 1) * page_size,
+        )
+        scores = dict(hits[:page_size])
+        verses = Verse.objects.filter(id__in=scores).select_related('chapter').in_bulk()
+        url = request.build_absolute_uri()
+        return Response({
+            'next': replace_query_param(url, 'page', page + 1) if len(hits) > page_size else None,
+            'previous': (
+                None if page == 1
+                else remove_query_param(url, 'page') if page == 2
+                else replace_query_param(url, 'page', page - 1)
+            ),
+            'results': VerseSearchResultSerializer(
+                [verses[verse_id] for verse_id in scores if verse_id in verses],
+                many=True,
+                context={'request': request, 'scores': scores, 'query': query, 'mode': mode},
+            ).data,
+        })
+
+
+class BookPageView(AsyncContentView):
+    """
+    GET books/{id}/pages/{n}/: all verses of a Mushaf page with their
+    chapter headers, served on the async path.
+    """
+    cache_scopes = ('books',)
+
+    async def get_data(self, request, tenant, pk, page_number):
+        """
+        The page index gives existence, neighbours and the page's verse
+        bounds in one query; the verses (joined with their chapters) are a
+        range scan between those bounds.
+        """
+        pages = {
+            page.number: page
+            async for page in BookPage.objects.filter(
+                book_id=pk, number__in=[page_number - 1, page_number, page_number + 1],
+            ).select_related('first_verse__chapter', 'last_verse__chapter')
+        }
+        page = pages.get(page_number)
+        if page is None or page.first_verse is None or page.last_verse is None:
+            raise Http404
+
+        verses = [
+            verse async for verse in Verse.objects.filter(page_verses(page))
+            .select_related('chapter')
+            .order_by('chapter__number', 'number')
+        ]
+        chapters = list({verse.chapter_id: verse.chapter for verse in verses}.values())
+        return {
+            'book': page.book_id,
+            'page_number': page_number,
+            'verse_count': page.verse_count,
+            'previous_page': page_number - 1 if page_number - 1 in pages else None,
+            'next_page': page_number + 1 if page_number + 1 in pages else None,
+            'chapters': ChapterSerializer(chapters, many=True).data,
+            'verses': VerseSerializer(verses, many=True).data,
+        }
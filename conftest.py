@@ -0,0 +1,17 @@
+import pytest
+from django.core.cache import caches
+from core.context import tenant_context
+from core.tenant_cache import tenant_cache
+from notes.progress import audio_tenants
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty caches; test database ids get reused."""
+    for cache in caches.all():
+        cache.clear()
+    tenant_cache.clear()
+    audio_tenants.clear()
+    # Tests that activate a tenant must not leak it into the next one
+    with tenant_context(None):
+        yield
@@ -1,8 +1,15 @@
 from django.contrib import admin
-from .models import Tenant
+from .models import Job, Tenant
 
 @admin.register(Tenant)
 class TenantAdmin(admin.ModelAdmin):
     list_display = ('name', 'domain', 'is_active', 'created_at')
     list_filter = ('is_active', 'created_at')
     search_fields = ('name', 'domain')
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('result', 'error', 'locked_by', 'locked_at', 'created_at', 'finished_at')
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+from rest_framework.exceptions import ValidationError
+from .conditional import make_validators
+from .content_cache import acontent_versions, get_cache, response_cache_key, version_token
+from .middleware import get_current_tenant
+
+
+class AsyncContentView(View):
+    """
+    Base of async, read-only JSON endpoints for hot content reads.
+
+    Runs natively under ASGI: queries go through the async ORM and the
+    tenant's content versions and cached data through the cache's async
+    API, so a slow client holds no thread. Responses get the same
+    validators as ConditionalResponseMixin and, unless ``cache_data`` is
+    off, their data is cached like CachedResponseMixin's. Subclasses
+    implement ``get_data(request, tenant, **kwargs)``, returning the JSON
+    data or a ready response; they may raise Http404 or a DRF
+    ValidationError.
+    """
+    http_method_names = ['get', 'head', 'options']
+    cache_scopes = ()
+    cache_data = True
+    cache_timeout = None
+
+    async def get(self, request, **kwargs):
+        tenant = get_current_tenant()
+        if tenant is None:
+            return self.json_response({'detail': 'Not found.'}, status=404)
+        versions = await acontent_versions(tenant.id, *self.cache_scopes)
+        etag, last_modified = make_validators(request, tenant, versions, 'application/json')
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await self.render(request, tenant, version_token(versions), **kwargs)
+            if response.status_code != 200:
+                return response
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+        response.headers.setdefault('Cache-Control', 'no-cache')
+        return response
+
+    async def render(self, request, tenant, version, **kwargs):
+        cache = get_cache()
+        key = response_cache_key(request, tenant, version)
+        if self.cache_data:
+            data = await cache.aget(key)
+            if data is not None:
+                return self.json_response(data)
+        try:
+            data = await self.get_data(request, tenant, **kwargs)
+        except Http404:
+            return self.json_response({'detail': 'Not found.'}, status=404)
+        except ValidationError as exc:
+            return self.json_response(exc.detail, status=400)
+        if isinstance(data, HttpResponse):
+            return data
+        if self.cache_data:
+            timeout = self.cache_timeout or getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600)
+            await cache.aset(key, data, timeout=timeout)
+        return self.json_response(data)
+
+    async def get_data(self, request, tenant, **kwargs):
+        raise NotImplementedError
+
+    def json_response(self, data, status=200):
+        # Arabic text stays readable and compact, as with DRF's JSONRenderer
+        return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False})
+
@@ -0,0 +1,60 @@
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from .content_cache import content_versions
+from .middleware import get_current_tenant
+
+
+class ConditionalResponseMixin:
+    """
+    Viewset mixin answering conditional GETs for list/retrieve.
+
+    The validators come from the tenant's content versions for
+    ``cache_scopes`` (one cache read): the ETag hashes the versions with the
+    request URL and negotiated media type, and Last-Modified is the time of
+    the newest write. A matching ``If-None-Match``/``If-Modified-Since``
+    returns 304 before the queryset or serializer is touched.
+    """
+    cache_scopes = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        tenant = get_current_tenant()
+        if tenant is None or not self.get_cache_scopes() or request.method not in ('GET', 'HEAD'):
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators(request, tenant)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+        response.headers.setdefault('Cache-Control', 'no-cache')
+        return response
+
+    def get_cache_scopes(self):
+        """Content scopes the current action's response depends on"""
+        return self.cache_scopes
+
+    def get_validators(self, request, tenant):
+        versions = content_versions(tenant.id, *self.get_cache_scopes())
+        return make_validators(request, tenant, versions, getattr(request, 'accepted_media_type', '') or '')
+
+
+def make_validators(request, tenant, versions, media_type=''):
+    """``(ETag, Last-Modified timestamp)`` of a response to ``request`` at content ``versions``"""
+    token = ':'.join([
+        str(tenant.id),
+        *(str(version) for version in versions),
+        request.get_full_path(),
+        media_type,
+    ])
+    etag = f'"{hashlib.md5(token.encode()).hexdigest()}"'
+    return etag, max(versions) // 1_000_000_000
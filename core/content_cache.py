@@ -0,0 +1,130 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+from .middleware import get_current_tenant
+from .on_commit import defer_on_commit
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _version_key(tenant_id, scope):
+    return f'content-version:{scope}:{tenant_id}'
+
+
+def content_versions(tenant_id, *scopes):
+    """
+    Current content versions of ``tenant_id`` for the given scopes.
+
+    Versions are nanosecond timestamps of the last write, so a version that
+    was evicted from the cache is recreated as a new, never-seen value.
+    """
+    cache = get_cache()
+    keys = [_version_key(tenant_id, scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            now = time.time_ns()
+            cache.add(key, now, timeout=None)
+            versions[key] = cache.get(key, now)
+    return [versions[key] for key in keys]
+
+
+async def acontent_versions(tenant_id, *scopes):
+    """Async content_versions(), through the cache's async API"""
+    cache = get_cache()
+    keys = [_version_key(tenant_id, scope) for scope in scopes]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            now = time.time_ns()
+            await cache.aadd(key, now, timeout=None)
+            versions[key] = await cache.aget(key, now)
+    return [versions[key] for key in keys]
+
+
+def content_version(tenant_id, *scopes):
+    """Version token of ``tenant_id`` covering all of ``scopes``"""
+    return version_token(content_versions(tenant_id, *scopes))
+
+
+def version_token(versions):
+    return '.'.join(str(version) for version in versions)
+
+
+def response_cache_key(request, tenant, version, user=None):
+    """Cache key of a response to ``request`` at content ``version``, per ``user`` if given"""
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    key = f'response:{tenant.id}:{version}:{url}'
+    if user is not None:
+        key = f'{key}:{user.pk}'
+    return key
+
+
+def bump_content_version(tenant_id, scope):
+    """Invalidate every cached response of ``tenant_id`` that depends on ``scope``"""
+    get_cache().set(_version_key(tenant_id, scope), time.time_ns(), timeout=None)
+
+
+def bump_content_versions(keys):
+    """Bump each ``(tenant_id, scope)`` of ``keys``"""
+    for tenant_id, scope in keys:
+        bump_content_version(tenant_id, scope)
+
+
+def bump_content_version_on_commit(tenant_id, scope):
+    """
+    Bump once the current transaction commits, so a concurrent reader cannot
+    cache pre-commit data under the new version. Each version is bumped once
+    per transaction, however many rows changed.
+    """
+    if tenant_id is not None:
+        defer_on_commit(bump_content_versions, (tenant_id, scope))
+
+
+class CachedResponseMixin:
+    """
+    Viewset mixin caching list/retrieve response data per tenant.
+
+    The cache key combines the tenant, the full request URL and the tenant's
+    content version for ``cache_scopes``; writes bump the version (see the
+    apps' signals), so stale entries are never read again and simply expire.
+    Responses that depend on the requesting user set ``cache_per_user``.
+    """
+    cache_scopes = ()
+    cache_timeout = None
+    cache_per_user = False
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        tenant = get_current_tenant()
+        if tenant is None or not self.get_cache_scopes():
+            return handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = self.get_response_cache_key(request, tenant)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = self.cache_timeout or getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600)
+            cache.set(key, response.data, timeout=timeout)
+        return response
+
+    def get_cache_scopes(self):
+        """Content scopes the current action's response depends on"""
+        return self.cache_scopes
+
+    def get_response_cache_key(self, request, tenant):
+        version = content_version(tenant.id, *self.get_cache_scopes())
+        return response_cache_key(request, tenant, version, request.user if self.cache_per_user else None)
@@ -0,0 +1,139 @@
+"""
+The current tenant, held in a context variable.
+
+Each request (see core.middleware), asyncio task and ``tenant_context``
+block sees its own value, and leaving a block restores the previous one
+even when an exception escapes. Plain threads start with an empty context:
+run work through ``ContextThreadPoolExecutor`` to carry the caller's
+context over, or ``TenantProcessPoolExecutor`` to re-enter the caller's
+tenant in child processes.
+
+No context at all (scripts, the shell, jobs without a tenant) is told
+apart from a request that named no tenant, which runs with ``NO_TENANT``:
+the scoped managers of core.models leave the former unfiltered and return
+no rows for the latter.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+
+class _NoTenant:
+    """Falsy marker of a context that has no tenant, as opposed to no context"""
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return 'NO_TENANT'
+
+    def __reduce__(self):
+        return 'NO_TENANT'
+
+
+NO_TENANT = _NoTenant()
+
+_current_tenant = contextvars.ContextVar('current_tenant', default=None)
+
+
+def get_current_tenant():
+    """The current tenant, or None"""
+    return _current_tenant.get() or None
+
+
+def get_tenant_scope():
+    """The current tenant, ``NO_TENANT`` or None when no tenant context is active"""
+    return _current_tenant.get()
+
+
+def set_current_tenant(tenant):
+    """
+    Set the current tenant for the rest of the current context. Returns a
+    token for ``reset_current_tenant``; prefer ``tenant_context`` in code
+    that can raise.
+    """
+    return _current_tenant.set(tenant)
+
+
+def reset_current_tenant(token):
+    """Restore the tenant that was current before the ``set_current_tenant`` call that returned ``token``"""
+    _current_tenant.reset(token)
+
+
+class tenant_context:
+    """
+    Make ``tenant`` (a Tenant, a tenant id, ``NO_TENANT`` or None) current,
+    as a context manager or a decorator of sync and async functions::
+
+        with tenant_context(tenant):
+            Book.objects.all()  # only the tenant's books
+
+        @tenant_context(tenant)
+        async def refresh(): ...
+
+    Blocks nest, and each restores the previous tenant on exit. Tenant ids
+    are loaded (active or not) when the block is entered.
+    """
+
+    def __init__(self, tenant):
+        self.tenant = tenant
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_current_tenant.set(self._resolve()))
+        return _current_tenant.get()
+
+    def __exit__(self, *exc_info):
+        _current_tenant.reset(self._tokens.pop())
+        return False
+
+    def __call__(self, func):
+        # A block per call: concurrent calls must not share the token stack
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tenant_context(self.tenant):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tenant_context(self.tenant):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def _resolve(self):
+        if self.tenant is None or not isinstance(self.tenant, (int, str)):
+            return self.tenant
+        from .models import Tenant
+        return Tenant.objects.get(pk=self.tenant)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor running each task in a copy of the submitter's
+    context, so the current tenant (and other context variables) follow
+    the work into the pool.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _call_in_tenant(tenant, fn, *args, **kwargs):
+    with tenant_context(tenant):
+        return fn(*args, **kwargs)
+
+
+class TenantProcessPoolExecutor(ProcessPoolExecutor):
+    """
+    ProcessPoolExecutor running each task with the submitter's current
+    tenant. Contexts cannot cross processes: the tenant is pickled with the
+    task and re-entered in the child, which must have Django set up (e.g.
+    ``initializer=core.job_process.setup``).
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(_call_in_tenant, get_tenant_scope(), fn, *args, **kwargs)
@@ -0,0 +1,94 @@
+from functools import lru_cache
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import relations, serializers
+
+
+@lru_cache(maxsize=None)
+def eager_loading(serializer_class):
+    """
+    Relations to load up front for ``serializer_class``, derived from its
+    field tree, as ``(select_related, prefetch_related)`` tuples.
+
+    Nested serializers and related fields that read more than the foreign
+    key value become ``select_related`` paths; anything reached through a
+    to-many relation becomes a ``prefetch_related`` path. A serializer can
+    add paths the walk cannot see (e.g. used by a SerializerMethodField)
+    with ``Meta.select_related`` / ``Meta.prefetch_related``.
+    """
+    select, prefetch = [], []
+    _walk(serializer_class(), serializer_class.Meta.model, (), False, select, prefetch)
+    return _dedupe(select), _dedupe(prefetch)
+
+
+def eager_load(queryset, serializer_class):
+    """Apply :func:`eager_loading` of ``serializer_class`` to ``queryset``"""
+    select, prefetch = eager_loading(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def _walk(serializer, model, prefix, to_many, select, prefetch):
+    meta = getattr(serializer, 'Meta', None)
+    for path in getattr(meta, 'select_related', ()):
+        (prefetch if to_many else select).append('__'.join((*prefix, path)))
+    for path in getattr(meta, 'prefetch_related', ()):
+        prefetch.append('__'.join((*prefix, path)))
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        steps, related_model, many = _relation_steps(model, field.source_attrs)
+        if not steps:
+            continue
+        # A plain foreign key rendered as its pk is read from the ``<fk>_id`` column
+        if (
+            isinstance(field, relations.RelatedField)
+            and len(steps) == len(field.source_attrs) == 1
+            and field.use_pk_only_optimization()
+        ):
+            continue
+        if isinstance(field, relations.ManyRelatedField) and field.child_relation.use_pk_only_optimization():
+            nested = None
+        path = '__'.join((*prefix, *steps))
+        (prefetch if to_many or many else select).append(path)
+        if isinstance(nested, serializers.BaseSerializer):
+            _walk(nested, related_model, (*prefix, *steps), to_many or many, select, prefetch)
+
+
+def _relation_steps(model, attrs):
+    """Leading attributes of ``attrs`` that are model relations, the model they end on and whether any is to-many"""
+    steps, many = [], False
+    for attr in attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation or field.related_model is None:
+            break
+        steps.append(attr)
+        many = many or field.many_to_many or field.one_to_many
+        model = field.related_model
+    return steps, model, many
+
+
+def _dedupe(paths):
+    """Drop duplicates and paths implied by a longer path"""
+    unique = dict.fromkeys(paths)
+    return tuple(
+        path for path in unique
+        if not any(other.startswith(f'{path}__') for other in unique)
+    )
+
+
+class EagerLoadingMixin:
+    """
+    Viewset mixin applying the serializer's eager loading to every queryset
+    the view filters (list and object lookups).
+    """
+
+    def filter_queryset(self, queryset):
+        return eager_load(super().filter_queryset(queryset), self.get_serializer_class())
@@ -0,0 +1,33 @@
+"""
+Entry points of the job worker's child processes. Spawned children import
+this module before Django is set up, so it must not import models at load
+time.
+"""
+
+
+def setup():
+    import django
+    from django.utils.module_loading import autodiscover_modules
+    django.setup()
+    autodiscover_modules('jobs')
+
+
+def _with_connections(func, *args):
+    from django.db import close_old_connections, connections
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        connections.close_all()
+
+
+def run(job_id):
+    """Execute a claimed Job"""
+    from .jobs import execute_job
+    return _with_connections(execute_job, job_id)
+
+
+def call(name, payload):
+    """Call the handler of ``name`` directly, without a Job row"""
+    from .jobs import get_handler
+    return _with_connections(get_handler(name), payload)
@@ -0,0 +1,173 @@
+import logging
+import multiprocessing
+import os
+import socket
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+from . import job_process
+from .context import get_current_tenant, tenant_context
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Handler name -> callable(payload) returning a JSON-serializable result
+_handlers = {}
+
+
+class UnknownJob(LookupError):
+    """Raised when a job names a handler that is not registered"""
+
+
+def job(name):
+    """Register the decorated function as the handler of jobs called ``name``"""
+    def register(func):
+        _handlers[name] = func
+        return func
+    return register
+
+
+def get_handler(name):
+    if name not in _handlers:
+        autodiscover_modules('jobs')
+    try:
+        return _handlers[name]
+    except KeyError:
+        raise UnknownJob(name)
+
+
+_CURRENT = object()
+
+
+def enqueue(name, payload=None, run_at=None, max_attempts=None, tenant=_CURRENT):
+    """
+    Queue a job. Created inside a transaction, the job only becomes visible
+    to workers once it commits, so it never runs against uncommitted data.
+    The handler runs with ``tenant`` (a Tenant or an id) current, by default
+    the tenant current at enqueue time.
+    """
+    get_handler(name)
+    if tenant is _CURRENT:
+        tenant = get_current_tenant()
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        tenant_id=getattr(tenant, 'pk', tenant),
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', 3),
+    )
+
+
+def claim_jobs(limit, worker_id):
+    """
+    Atomically mark up to ``limit`` due jobs as running for ``worker_id``.
+    ``SKIP LOCKED`` lets several workers poll the same table without
+    handing out a job twice.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.QUEUED, run_at__lte=now)
+            .order_by('run_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            Job.objects.filter(id__in=ids).update(status=Job.Status.RUNNING, locked_by=worker_id, locked_at=now)
+    return ids
+
+
+def requeue_stale(timeout=None):
+    """Put back jobs whose worker died while running them"""
+    timeout = timeout or getattr(settings, 'JOB_STALE_TIMEOUT', 3600)
+    return Job.objects.filter(
+        status=Job.Status.RUNNING, locked_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(status=Job.Status.QUEUED, locked_by='', locked_at=None)
+
+
+def execute_job(job_id):
+    """
+    Run one claimed job and record its outcome. Failures are retried with
+    exponential backoff until ``max_attempts`` is reached.
+    """
+    job = Job.objects.select_related('tenant').get(id=job_id)
+    job.attempts += 1
+    try:
+        with tenant_context(job.tenant):
+            job.result = get_handler(job.name)(job.payload)
+    except Exception:
+        job.error = traceback.format_exc()
+        logger.exception('Job %s failed', job)
+        if job.attempts < job.max_attempts:
+            delay = getattr(settings, 'JOB_RETRY_DELAY', 30) * 2 ** (job.attempts - 1)
+            job.status = Job.Status.QUEUED
+            job.run_at = timezone.now() + timedelta(seconds=delay)
+        else:
+            job.status = Job.Status.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = Job.Status.DONE
+        job.error = ''
+        job.finished_at = timezone.now()
+    job.locked_by, job.locked_at = '', None
+    job.save()
+    return job.status
+
+
+class Worker:
+    """
+    Polls the Job table and runs jobs in a pool of ``processes`` worker
+    processes, so CPU-heavy handlers neither block each other nor the API.
+    With ``processes=0`` jobs run in the current process (tests, debugging).
+    """
+
+    def __init__(self, processes=None, poll_interval=None, worker_id=None):
+        self.processes = os.cpu_count() if processes is None else processes
+        self.poll_interval = poll_interval or getattr(settings, 'JOB_POLL_INTERVAL', 1.0)
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        autodiscover_modules('jobs')
+
+    def run(self, burst=False):
+        """Process jobs until stopped; with ``burst`` stop once the queue is empty"""
+        requeue_stale()
+        if not self.processes:
+            return self._run_inline(burst)
+        # Spawn rather than fork: forked children would share the parent's database sockets
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=context, initializer=job_process.setup) as pool:
+            running = set()
+            while not self.stopping:
+                free = self.processes - len(running)
+                if free:
+                    running.update(pool.submit(job_process.run, job_id) for job_id in claim_jobs(free, self.worker_id))
+                if not running:
+                    if burst:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                done, running = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception():
+                        logger.error('Job process crashed: %s', future.exception())
+
+    def _run_inline(self, burst):
+        processed = 0
+        while not self.stopping:
+            ids = claim_jobs(1, self.worker_id)
+            if not ids:
+                if burst:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            execute_job(ids[0])
+            processed += 1
+        return processed
+
+    def stop(self, *args):
+        self.stopping = True
@@ -0,0 +1,39 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.models import InheritedTenantModel
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized tenant column of models that inherit it from a parent'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows updated per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # Parents first, so each level copies an already consistent value
+        models = sorted(
+            (model for model in apps.get_models() if issubclass(model, InheritedTenantModel)),
+            key=self._depth,
+        )
+        for model in models:
+            updated = 0
+            last_pk = 0
+            while True:
+                pks = list(
+                    model._base_manager.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+                )
+                if not pks:
+                    break
+                with transaction.atomic():
+                    updated += model.unscoped.filter(pk__in=pks).sync_tenant()
+                last_pk = pks[-1]
+            self.stdout.write(self.style.SUCCESS(f'{model._meta.label}: {updated} rows updated'))
+
+    @staticmethod
+    def _depth(model):
+        depth = 0
+        while issubclass(model, InheritedTenantModel):
+            model = model._meta.get_field(model.tenant_parent).related_model
+            depth += 1
+        return depth
@@ -0,0 +1,106 @@
+import re
+from importlib import import_module
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import RequestFactory
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from core.context import tenant_context
+from core.models import Tenant
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the list query of every registered viewset for a tenant and '
+        'report which indexes the database planner uses'
+    )
+
+    url_modules = ('books.urls', 'audio.urls', 'notes.urls')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Tenant domain or id (default: first active tenant)')
+        parser.add_argument('--user', help='Username for user-scoped viewsets (default: first user of the tenant)')
+        parser.add_argument('--analyze', action='store_true', help='Run EXPLAIN ANALYZE (PostgreSQL only)')
+        parser.add_argument('--plan', action='store_true', help='Print the full query plan')
+
+    def handle(self, *args, **options):
+        tenant = self._get_tenant(options['tenant'])
+        user = self._get_user(tenant, options['user'])
+        with tenant_context(tenant):
+            for prefix, viewset in self._viewsets():
+                self._explain(prefix, viewset, user, options)
+
+    def _get_tenant(self, value):
+        tenants = Tenant.objects.filter(is_active=True)
+        if value:
+            tenant = tenants.filter(id=value).first() if value.isdigit() else tenants.filter(domain=value).first()
+        else:
+            tenant = tenants.order_by('id').first()
+        if tenant is None:
+            raise CommandError('No matching active tenant')
+        return tenant
+
+    def _get_user(self, tenant, username):
+        users = User.objects.filter(tenant=tenant)
+        if username:
+            users = users.filter(username=username)
+        return users.order_by('id').first() or AnonymousUser()
+
+    def _viewsets(self):
+        for module in self.url_modules:
+            for prefix, viewset, _basename in import_module(module).router.registry:
+                yield prefix, viewset
+
+    def _explain(self, prefix, viewset, user, options):
+        django_request = RequestFactory().get(f'/{prefix}/')
+        django_request.user = user
+        request = Request(django_request)
+        request.user = user
+        view = viewset(action='list', request=request, args=(), kwargs={}, format_kwarg=None)
+        try:
+            view.check_permissions(request)
+        except APIException as exc:
+            self.stdout.write(self.style.WARNING(f'{viewset.__name__} (/{prefix}/): skipped, {exc.detail}'))
+            return
+
+        queryset = view.filter_queryset(view.get_queryset())
+        paginator = view.paginator
+        if paginator is not None and hasattr(paginator, 'get_ordering'):
+            queryset = queryset.order_by(*paginator.get_ordering(view))[:paginator.get_page_size(request) + 1]
+
+        model = queryset.model
+        label = f'{viewset.__name__} ({model._meta.label}, /{prefix}/)'
+        if queryset.query.is_empty():
+            self.stdout.write(self.style.WARNING(f'{label}: empty queryset, nothing to explain'))
+            return
+
+        explain_options = {'analyze': True} if options['analyze'] and connections[queryset.db].vendor == 'postgresql' else {}
+        plan = queryset.explain(**explain_options)
+        used = self._indexes_in_plan(queryset.db, plan)
+        scans = re.findall(r'(?:Seq Scan on|SCAN) (\w+)', plan)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(f'  indexes: {", ".join(used) if used else "-"}')
+        if scans:
+            self.stdout.write(self.style.WARNING(f'  full scans: {", ".join(scans)}'))
+        if options['plan']:
+            for line in plan.splitlines():
+                self.stdout.write(f'    {line}')
+
+    def _indexes_in_plan(self, using, plan):
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+            names = {
+                name
+                for table in tables
+                for name, info in connection.introspection.get_constraints(cursor, table).items()
+                if info['index'] or info['primary_key'] or info['unique']
+            }
+        found = sorted(name for name in names if re.search(rf'\b{re.escape(name)}\b', plan))
+        if re.search(r'USING (?:INTEGER )?PRIMARY KEY', plan):
+            found.append('PRIMARY KEY')
+        return found
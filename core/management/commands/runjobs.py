@@ -0,0 +1,19 @@
+import signal
+from django.core.management.base import BaseCommand
+from core.jobs import Worker
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (core.models.Job) in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: CPU count, 0: run in this process)')
+        parser.add_argument('--poll-interval', type=float, default=None, help='Seconds between polls of an empty queue')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        worker = Worker(processes=options['processes'], poll_interval=options['poll_interval'])
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        self.stdout.write(f'Worker {worker.worker_id} started with {worker.processes or "no"} processes')
+        worker.run(burst=options['burst'])
+        self.stdout.write('Worker stopped')
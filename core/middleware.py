@@ -1,72 +1,79 @@
-from threading import local
-from django.utils.deprecation import MiddlewareMixin
-from .models import Tenant
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from .context import NO_TENANT, get_current_tenant, reset_current_tenant, set_current_tenant  # noqa: F401 (re-exported)
+from .tenant_cache import tenant_cache
 
-_thread_locals = local()
-
-def get_current_tenant():
-    """Get current tenant from thread local storage"""
-    return getattr(_thread_locals, 'tenant', None)
-
-def set_current_tenant(tenant):
-    """Set current tenant in thread local storage"""
-    _thread_locals.tenant = tenant
-
-class TenantMiddleware(MiddlewareMixin):
+def tenant_lookups(request):
     """
-    Middleware to identify tenant from:
+    Candidate ``(kind, value)`` tenant identifiers of a request, in order:
     1. X-Tenant-ID header
-    2. X-Tenant-Domain header  
+    2. X-Tenant-Domain header
     3. Subdomain (e.g., tenant1.example.com)
     4. Query parameter 'tenant' (for testing)
     """
-    
+    tenant_id = request.headers.get('X-Tenant-ID')
+    if tenant_id:
+        yield 'id', tenant_id
+    tenant_domain = request.headers.get('X-Tenant-Domain')
+    if tenant_domain:
+        yield 'domain', tenant_domain
+    host = request.get_host().split(':')[0]  # Remove port if present
+    parts = host.split('.')
+    if len(parts) >= 2:
+        yield 'domain', parts[0]
+    tenant_domain = request.GET.get('tenant')
+    if tenant_domain:
+        yield 'domain', tenant_domain
+
+class TenantMiddleware:
+    """
+    Middleware identifying the request's tenant (see ``tenant_lookups``) and
+    exposing it as ``request.tenant`` and ``get_current_tenant()``. Requests
+    without a tenant run with ``NO_TENANT``, so scoped managers return no rows.
+
+    Works in both sync and async mode: under ASGI the tenant is resolved
+    with the async ORM on cache misses, so no thread is held per request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = self.process_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            # Also when the view raised: never leak the tenant into the next request
+            reset_current_tenant(token)
+
+    async def __acall__(self, request):
+        token = await self.aprocess_request(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_current_tenant(token)
+
     def process_request(self, request):
+        """Resolve and activate the request's tenant; returns the reset token"""
         tenant = None
-        
-        # Method 1: Check X-Tenant-ID header
-        tenant_id = request.headers.get('X-Tenant-ID')
-        if tenant_id:
-            try:
-                tenant = Tenant.objects.get(id=tenant_id, is_active=True)
-            except Tenant.DoesNotExist:
-                pass
-        
-        # Method 2: Check X-Tenant-Domain header
-        if not tenant:
-            tenant_domain = request.headers.get('X-Tenant-Domain')
-            if tenant_domain:
-                try:
-                    tenant = Tenant.objects.get(domain=tenant_domain, is_active=True)
-                except Tenant.DoesNotExist:
-                    pass
-        
-        # Method 3: Check subdomain
-        if not tenant:
-            host = request.get_host().split(':')[0]  # Remove port if present
-            parts = host.split('.')
-            if len(parts) >= 2:
-                subdomain = parts[0]
-                try:
-                    tenant = Tenant.objects.get(domain=subdomain, is_active=True)
-                except Tenant.DoesNotExist:
-                    pass
-        
-        # Method 4: Check query parameter (for testing)
-        if not tenant:
-            tenant_domain = request.GET.get('tenant')
-            if tenant_domain:
-                try:
-                    tenant = Tenant.objects.get(domain=tenant_domain, is_active=True)
-                except Tenant.DoesNotExist:
-                    pass
-        
-        set_current_tenant(tenant)
+        for kind, value in tenant_lookups(request):
+            tenant = tenant_cache.get(kind, value)
+            if tenant:
+                break
         request.tenant = tenant
-        
-    def process_response(self, request, response):
-        # Clean up thread local storage
-        set_current_tenant(None)
-        return response
-
+        return set_current_tenant(tenant or NO_TENANT)
 
+    async def aprocess_request(self, request):
+        tenant = None
+        for kind, value in tenant_lookups(request):
+            tenant = await tenant_cache.aget(kind, value)
+            if tenant:
+                break
+        request.tenant = tenant
+        return set_current_tenant(tenant or NO_TENANT)
@@ -1,21 +1,81 @@
+from collections import deque
+from functools import lru_cache
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
 from django.db import models
-from django.db.models import Manager, QuerySet
+from django.db.models import Manager, OuterRef, QuerySet, Subquery
+from django.utils import timezone
+from .context import get_tenant_scope
+from .rls import rls_enforced
+
+
+@lru_cache(maxsize=None)
+def tenant_lookup(model):
+    """
+    The most direct lookup from ``model`` to its tenant: the model's own
+    (indexed) ``tenant`` column, else the shortest chain of forward relations
+    to a tenant-owned model that has one, e.g. ``book__tenant``. Computed
+    once per model.
+    """
+    queue, seen = deque([(model, [])]), {model}
+    while queue:
+        current, path = queue.popleft()
+        try:
+            field = current._meta.get_field('tenant')
+        except FieldDoesNotExist:
+            field = None
+        if field is not None and field.many_to_one and field.related_model is Tenant:
+            return '__'.join([*path, 'tenant'])
+        for field in current._meta.get_fields():
+            related = field.related_model
+            if (field.many_to_one or field.one_to_one) and field.concrete and related not in seen:
+                # Only through other tenant-owned models: a user's tenant does not own their notes
+                if isinstance(getattr(related, 'objects', None), TenantManager):
+                    seen.add(related)
+                    queue.append((related, [*path, field.name]))
+    raise ImproperlyConfigured(f'{model._meta.label} has no relation to a tenant')
+
 
 class TenantQuerySet(QuerySet):
     """QuerySet that filters by current tenant"""
     def for_tenant(self, tenant):
         if tenant:
-            return self.filter(tenant=tenant)
+            return self.filter(**{tenant_lookup(self.model): tenant})
         return self.none()
 
 class TenantManager(Manager):
-    """Manager that automatically filters by tenant"""
+    """
+    Default manager of tenant-owned models, scoped to the current tenant
+    (see core.context): filtered on ``tenant_lookup`` (or by the database
+    in row-level security mode), empty for requests without a tenant, and
+    unfiltered outside any tenant context.
+    """
+    scoped = True
+
     def get_queryset(self):
-        return TenantQuerySet(self.model, using=self._db)
+        return self.scope(TenantQuerySet(self.model, using=self._db))
+
+    def scope(self, queryset):
+        tenant = get_tenant_scope()
+        if not self.scoped or tenant is None:
+            return queryset
+        if tenant and rls_enforced(self.db):
+            # Row-level security policies filter the tenant's rows (see core.rls)
+            return queryset
+        return queryset.for_tenant(tenant)
     
     def for_tenant(self, tenant):
         return self.get_queryset().for_tenant(tenant)
 
+class UnscopedTenantManager(TenantManager):
+    """
+    TenantManager ignoring the current tenant: the escape hatch for code
+    working across tenants or on rows it already identified (jobs, indexes,
+    signal handlers). Declared first on tenant-owned models, so it is also
+    their ``_default_manager`` (admin, related managers, validators).
+    """
+    scoped = False
+
 class Tenant(models.Model):
     """Tenant model for multitenancy"""
     name = models.CharField(max_length=255, unique=True)
@@ -25,3 +85,186 @@ class Tenant(models.Model):
     
     def __str__(self):
         return self.name
+
+
+class InheritedTenantQuerySet(TenantQuerySet):
+    """
+    QuerySet for models whose ``tenant`` column is copied from a parent relation.
+    Keeps the denormalized column consistent on bulk operations, which bypass save().
+    """
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self.model.fill_tenant(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        parent = self.model.tenant_parent
+        if parent in fields or f'{parent}_id' in fields:
+            objs = list(objs)
+            self.model.fill_tenant(objs)
+            fields = [*fields, 'tenant']
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        parent = self.model.tenant_parent
+        for key in (parent, f'{parent}_id'):
+            if key in kwargs and 'tenant' not in kwargs and 'tenant_id' not in kwargs:
+                value = kwargs[key]
+                parent_id = value.pk if isinstance(value, models.Model) else value
+                kwargs['tenant_id'] = self.model.parent_tenant_ids([parent_id]).get(parent_id)
+        descendants = tenant_descendants(self.model) if 'tenant' in kwargs or 'tenant_id' in kwargs else ()
+        if not descendants:
+            return super().update(**kwargs)
+        # The rows' descendants copy the tenant too: resync them, shallowest first
+        pks = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+        for model, path in descendants:
+            model.unscoped.filter(**{f'{path}__in': pks}).sync_tenant()
+        return updated
+
+    def sync_tenant(self):
+        """Recompute the tenant column from the parent relation in a single UPDATE"""
+        parent_model = self.model._meta.get_field(self.model.tenant_parent).related_model
+        parent_tenant = parent_model._base_manager.filter(pk=OuterRef(self.model.tenant_parent)).values('tenant')[:1]
+        return super().update(tenant=Subquery(parent_tenant))
+
+
+class InheritedTenantManager(TenantManager):
+    """Manager exposing InheritedTenantQuerySet"""
+    def get_queryset(self):
+        return self.scope(InheritedTenantQuerySet(self.model, using=self._db))
+
+    def sync_tenant(self):
+        return self.get_queryset().sync_tenant()
+
+
+class UnscopedInheritedTenantManager(InheritedTenantManager):
+    """InheritedTenantManager ignoring the current tenant (see UnscopedTenantManager)"""
+    scoped = False
+
+
+class InheritedTenantModel(models.Model):
+    """
+    Abstract base for models owned by a tenant through a parent relation.
+
+    ``tenant_parent`` names the ForeignKey whose ``tenant_id`` is copied into
+    the indexed ``tenant`` column, so tenant-scoped queries filter a single
+    table instead of joining up to the Book. The column is maintained on
+    save(), bulk_create(), bulk_update() and update(); changes of a parent's
+    tenant are propagated to descendants by update() and, on save(), by
+    ``core.signals``.
+    """
+    tenant_parent = None
+
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='+', null=True, blank=True, editable=False)
+
+    unscoped = UnscopedInheritedTenantManager()
+    objects = InheritedTenantManager()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        remember_tenant(instance)
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.tenant_id = self.resolve_tenant_id()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.tenant_parent in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'tenant'}
+        super().save(*args, **kwargs)
+
+    def resolve_tenant_id(self):
+        parent = getattr(self, self.tenant_parent, None)
+        return parent.tenant_id if parent is not None else None
+
+    @classmethod
+    def parent_tenant_ids(cls, parent_ids):
+        """Map parent primary keys to their tenant ids with one query"""
+        parent_model = cls._meta.get_field(cls.tenant_parent).related_model
+        return dict(parent_model._base_manager.filter(pk__in=set(parent_ids)).values_list('pk', 'tenant_id'))
+
+    @classmethod
+    def fill_tenant(cls, objs):
+        """Set tenant_id on instances, loading uncached parents in one query"""
+        descriptor = getattr(cls, cls.tenant_parent)
+        attname = cls._meta.get_field(cls.tenant_parent).attname
+        missing = []
+        for obj in objs:
+            if descriptor.is_cached(obj):
+                parent = getattr(obj, cls.tenant_parent)
+                obj.tenant_id = parent.tenant_id if parent is not None else None
+            else:
+                missing.append(obj)
+        if missing:
+            tenant_ids = cls.parent_tenant_ids(getattr(obj, attname) for obj in missing)
+            for obj in missing:
+                obj.tenant_id = tenant_ids.get(getattr(obj, attname))
+
+    @classmethod
+    def tenant_path(cls, model):
+        """Lookup path from this model to ``model`` through tenant parents, or None"""
+        path, current = [], cls
+        while issubclass(current, InheritedTenantModel):
+            path.append(current.tenant_parent)
+            current = current._meta.get_field(current.tenant_parent).related_model
+            if current is model:
+                return '__'.join(path)
+        return None
+
+
+@lru_cache(maxsize=None)
+def tenant_descendants(model):
+    """
+    (model, lookup path) pairs whose denormalized tenant derives from
+    ``model``, shallowest first so each can be resynced from its parent
+    """
+    descendants = []
+    for candidate in apps.get_models():
+        if issubclass(candidate, InheritedTenantModel):
+            path = candidate.tenant_path(model)
+            if path:
+                descendants.append((candidate, path))
+    return tuple(sorted(descendants, key=lambda item: item[1].count('__')))
+
+
+def remember_tenant(instance):
+    """Note the stored tenant, so saves only propagate actual changes (see core.signals)"""
+    instance._loaded_tenant_id = instance.__dict__.get('tenant_id')
+
+
+class Job(models.Model):
+    """A unit of background work run by the ``runjobs`` worker (see core.jobs)"""
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    name = models.CharField(max_length=100, help_text="Registered handler name")
+    payload = models.JSONField(default=dict, blank=True)
+    # Current tenant while the handler runs (see core.context)
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's claim query: due queued jobs in run_at order
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,45 @@
+"""
+Deduplicated ``transaction.on_commit`` work.
+
+Signal handlers fire once per row, but the work they trigger (a version
+bump, a track rebuild) only has to run once per transaction for each
+target. ``defer_on_commit`` collects the targets in a set per transaction
+and callback, and calls the callback once with all of them on commit.
+"""
+from django.db import transaction
+
+
+class _Batch:
+    def __init__(self, callback, block):
+        self.callback = callback
+        self.block = block
+        self.items = set()
+
+    def __call__(self):
+        self.callback(self.items)
+
+
+def defer_on_commit(callback, item, using=None):
+    """
+    Call ``callback(items)`` once the current transaction commits, with
+    every ``item`` deferred to it meanwhile; immediately in autocommit mode.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        callback({item})
+        return
+    # The transaction is the outermost atomic block of the application, not
+    # the one a test case wraps around each test and never commits
+    block = next((block for block in connection.atomic_blocks if not block._from_testcase), None)
+    if block is None:
+        transaction.on_commit(lambda: callback({item}), using=using)
+        return
+    batches = connection.__dict__.setdefault('deferred_on_commit', {})
+    batch = batches.get(callback)
+    # A rolled back savepoint drops the registered batch along with its writes
+    if batch is None or batch.block is not block or not any(
+        func is batch for _, func, _ in connection.run_on_commit
+    ):
+        batch = batches[callback] = _Batch(callback, block)
+        transaction.on_commit(batch, using=using)
+    batch.items.add(item)
@@ -0,0 +1,191 @@
+import base64
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a multi-column ordering.
+
+    Unlike offset pagination, every page is fetched with a ``WHERE (ordering
+    columns) > (last seen values)`` predicate, so deep pages cost the same as
+    the first one. Views declare their ordering with ``pagination_ordering``
+    (e.g. ``('chapter', 'number')``); the primary key is appended
+    automatically to make the ordering total. Keep to local columns covered
+    by an index (after the tenant), or deep pages sort every row again.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    ordering = ('id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.ordering = self.get_ordering(view)
+        self.base_url = request.build_absolute_uri()
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self._clean_position(queryset.model, position)
+
+        queryset = queryset.annotate(**{
+            self._key_alias(index): F(field.lstrip('-'))
+            for index, field in enumerate(self.ordering)
+        })
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(position, reverse))
+
+        ordering = self._reverse(self.ordering) if reverse else self.ordering
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.next_position = self._position(results[-1]) if results and self.has_next else None
+        self.previous_position = self._position(results[0]) if results and self.has_previous else None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size) if self.max_page_size else size
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, view):
+        ordering = tuple(getattr(view, 'pagination_ordering', None) or self.ordering)
+        if not {'id', 'pk', '-id', '-pk'} & set(ordering):
+            ordering += ('-id',) if ordering[-1].startswith('-') else ('id',)
+        return ordering
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.next_position, False))
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.previous_position, True))
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            position, reverse = payload['p'], bool(payload.get('r'))
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError(position)
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+    def _seek_filter(self, position, reverse):
+        """
+        Build the row-comparison predicate ``(c1, c2, ...) > (v1, v2, ...)``
+        expanded into ORed prefix-equality terms, honouring per-column
+        direction. The leading ``c1 >= v1`` bound lets the planner start an
+        index range scan instead of evaluating the OR over the whole table.
+        """
+        ordering = self._reverse(self.ordering) if reverse else self.ordering
+        seek = Q()
+        for index, field in enumerate(ordering):
+            term = Q(**{
+                prefix.lstrip('-'): value
+                for prefix, value in zip(ordering[:index], position[:index])
+            })
+            op = 'lt' if field.startswith('-') else 'gt'
+            seek |= term & Q(**{f'{field.lstrip("-")}__{op}': position[index]})
+        first = ordering[0]
+        op = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{op}': position[0]}) & seek
+
+    def _clean_position(self, model, position):
+        """
+        The cursor's values converted by their ordering fields, so a tampered
+        cursor is a 404 rather than a failing query
+        """
+        values = []
+        for path, value in zip(self.ordering, position):
+            *relations, name = path.lstrip('-').split('__')
+            for relation in relations:
+                model = model._meta.get_field(relation).related_model
+            field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            try:
+                if value is None:
+                    raise ValidationError('Missing value')
+                values.append(field.to_python(value))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _position(self, instance):
+        return [getattr(instance, self._key_alias(index)) for index in range(len(self.ordering))]
+
+    @staticmethod
+    def _key_alias(index):
+        return f'_keyset_{index}'
+
+    @staticmethod
+    def _reverse(ordering):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
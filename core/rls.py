@@ -0,0 +1,158 @@
+"""
+Optional PostgreSQL row-level security (RLS) for tenant isolation.
+
+Migrations put a ``tenant_isolation`` policy on every tenant-owned table
+(``TenantRLS``), comparing each row's tenant with the session variable
+``app.tenant_id``. With ``TENANT_RLS`` enabled every connection sets that
+variable from the current tenant (see core.context) before its queries,
+and the scoped managers of core.models stop adding their own tenant
+filter: the database enforces it. A request without a tenant (``NO_TENANT``)
+sends an id no row has, so it sees nothing. Only code running with no
+tenant context at all (jobs, commands, ``tenant_context(None)``) sends an
+empty variable, which lets every row through; so does an unset one, which
+keeps the policies inert while the mode is off.
+
+Other databases (SQLite in tests) skip both the policies and the variable.
+PostgreSQL superusers and roles with BYPASSRLS are never restricted: run
+the application as an ordinary role. A deployment can go further and give
+cross-tenant work (``runjobs``, maintenance commands) a BYPASSRLS role of
+its own, leaving the web role unable to escape the policies.
+"""
+from django.conf import settings
+from django.db import connections
+from django.db.migrations.operations.base import Operation
+from .context import get_tenant_scope
+
+SESSION_VARIABLE = 'app.tenant_id'
+POLICY_NAME = 'tenant_isolation'
+# Value of the variable for NO_TENANT: matches no tenant's rows
+NO_TENANT_VARIABLE = '-1'
+
+
+def rls_enabled(connection):
+    """Whether tenant isolation is enforced by policies on ``connection``"""
+    return getattr(settings, 'TENANT_RLS', False) and connection.vendor == 'postgresql'
+
+
+def rls_enforced(using):
+    """``rls_enabled`` for a database alias"""
+    return rls_enabled(connections[using])
+
+
+def tenant_variable():
+    """
+    Value of ``app.tenant_id`` for the current tenant: its id, ``'-1'`` for
+    ``NO_TENANT``, or '' for no restriction outside any tenant context
+    """
+    tenant = get_tenant_scope()
+    if tenant is None:
+        return ''
+    return str(tenant.pk) if tenant else NO_TENANT_VARIABLE
+
+
+def set_tenant_variable(execute, sql, params, many, context):
+    """
+    Execute wrapper bringing ``app.tenant_id`` up to date before a query.
+    Outside transactions the session keeps the value, so it is only sent
+    when the tenant changes. Inside one it is set for the transaction only
+    (``set_config(..., true)``), once, and again only if the tenant changes
+    or a rollback to a savepoint may have reverted it.
+    """
+    connection = context['connection']
+    value = tenant_variable()
+    if connection.in_atomic_block:
+        # Django replaces run_on_commit when a transaction ends and on every
+        # savepoint rollback: while it is the same list, the value holds
+        state = (value, connection.run_on_commit)
+        local = getattr(connection, 'tenant_variable_local', None)
+        if local is None or local[0] != value or local[1] is not connection.run_on_commit:
+            _set_config(connection, value, local=True)
+            connection.tenant_variable_local = state
+    elif connection.tenant_variable != value:
+        _set_config(connection, value, local=False)
+        connection.tenant_variable = value
+    return execute(sql, params, many, context)
+
+
+def _set_config(connection, value, local):
+    # On a cursor of its own from the raw connection: the query's cursor may
+    # be a server-side one, which takes a single statement, and going through
+    # Django's cursor wrappers again would recurse into set_tenant_variable
+    with connection.connection.cursor() as cursor:
+        cursor.execute('SELECT set_config(%s, %s, %s)', [SESSION_VARIABLE, value, local])
+
+
+class TenantRLS(Operation):
+    """
+    Enable row-level security on a tenant-owned model's table with a
+    ``tenant_isolation`` policy. Rows match on their own ``tenant`` column
+    or, with ``parent``, through that ForeignKey to a table with its own
+    policy. PostgreSQL only; a no-op elsewhere.
+    """
+    reversible = True
+
+    def __init__(self, model_name, parent=None):
+        self.model_name = model_name
+        self.parent = parent
+
+    def deconstruct(self):
+        kwargs = {'parent': self.parent} if self.parent else {}
+        return self.__class__.__name__, [self.model_name], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        model = to_state.apps.get_model(app_label, self.model_name)
+        for sql in self.enable_sql(model, schema_editor.quote_name):
+            schema_editor.execute(sql)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        model = from_state.apps.get_model(app_label, self.model_name)
+        for sql in self.disable_sql(model, schema_editor.quote_name):
+            schema_editor.execute(sql)
+
+    def describe(self):
+        return f'Enable tenant row-level security on {self.model_name}'
+
+    @property
+    def migration_name_fragment(self):
+        return f'{self.model_name}_tenant_rls'
+
+    def predicate(self, model, quote_name):
+        """The policy's condition on a row of ``model``"""
+        current = f"NULLIF(current_setting('{SESSION_VARIABLE}', true), '')"
+        if self.parent is None:
+            match = f"{quote_name(model._meta.get_field('tenant').column)} = {current}::bigint"
+        else:
+            field = model._meta.get_field(self.parent)
+            parent = field.related_model._meta
+            # The parent's own policy filters the subquery
+            match = (
+                f'EXISTS (SELECT 1 FROM {quote_name(parent.db_table)} '
+                f'WHERE {quote_name(parent.db_table)}.{quote_name(parent.pk.column)} '
+                f'= {quote_name(model._meta.db_table)}.{quote_name(field.column)})'
+            )
+        return f'{current} IS NULL OR {match}'
+
+    def enable_sql(self, model, quote_name):
+        table = quote_name(model._meta.db_table)
+        predicate = self.predicate(model, quote_name)
+        return [
+            f'ALTER TABLE {table} ENABLE ROW LEVEL SECURITY',
+            # Also for the table owner, usually the application's role
+            f'ALTER TABLE {table} FORCE ROW LEVEL SECURITY',
+            f'CREATE POLICY {POLICY_NAME} ON {table} USING ({predicate}) WITH CHECK ({predicate})',
+        ]
+
+    def disable_sql(self, model, quote_name):
+        table = quote_name(model._meta.db_table)
+        return [
+            f'DROP POLICY IF EXISTS {POLICY_NAME} ON {table}',
+            f'ALTER TABLE {table} NO FORCE ROW LEVEL SECURITY',
+            f'ALTER TABLE {table} DISABLE ROW LEVEL SECURITY',
+        ]
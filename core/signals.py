@@ -0,0 +1,43 @@
+from django.apps import apps
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Tenant, remember_tenant, tenant_descendants
+from .rls import rls_enabled, set_tenant_variable
+from .tenant_cache import tenant_cache
+
+_UNKNOWN = object()
+
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def invalidate_tenant_cache(sender, instance, **kwargs):
+    """Drop cached tenant lookups (including negative entries) on any change"""
+    tenant_cache.clear()
+
+
+def propagate_inherited_tenant(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Copy a changed tenant down to every row that inherits it from ``instance``"""
+    if raw or (update_fields is not None and 'tenant' not in update_fields):
+        return
+    if not created and getattr(instance, '_loaded_tenant_id', _UNKNOWN) != instance.tenant_id:
+        # Shallowest first, so each level copies from an up to date parent
+        for model, path in tenant_descendants(sender):
+            model.unscoped.filter(**{path: instance}).exclude(tenant_id=instance.tenant_id).sync_tenant()
+    remember_tenant(instance)
+
+
+def connect_tenant_propagation():
+    """Connect ``propagate_inherited_tenant`` to the models that tenants are inherited from"""
+    for model in apps.get_models():
+        if tenant_descendants(model):
+            post_save.connect(propagate_inherited_tenant, sender=model, dispatch_uid=f'propagate_tenant_{model._meta.label}')
+
+
+@receiver(connection_created)
+def install_tenant_variable(sender, connection, **kwargs):
+    """Keep ``app.tenant_id`` in step with the current tenant in row-level security mode (see core.rls)"""
+    # A new session starts without the variable
+    connection.tenant_variable = connection.tenant_variable_local = None
+    if rls_enabled(connection) and set_tenant_variable not in connection.execute_wrappers:
+        connection.execute_wrappers.append(set_tenant_variable)
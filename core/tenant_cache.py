@@ -0,0 +1,81 @@
+from django.conf import settings
+from .lru import LRUCache
+from .models import Tenant
+
+_MISSING = object()
+
+
+class TenantCache:
+    """
+    In-process cache of active tenants keyed by id and by domain.
+
+    Unknown or inactive identifiers are cached as ``None`` (negative caching)
+    with a shorter timeout, so repeated requests for a bad domain do not hit
+    the database either. Any Tenant save/delete clears the cache (see
+    ``core.signals``).
+    """
+
+    def __init__(self, max_size=None, timeout=None, negative_timeout=None):
+        self.timeout = timeout if timeout is not None else getattr(settings, 'TENANT_CACHE_TIMEOUT', 300)
+        self.negative_timeout = (
+            negative_timeout if negative_timeout is not None
+            else getattr(settings, 'TENANT_CACHE_NEGATIVE_TIMEOUT', 30)
+        )
+        self._cache = LRUCache(
+            max_size=max_size or getattr(settings, 'TENANT_CACHE_MAX_SIZE', 1024),
+            timeout=self.timeout,
+        )
+
+    def get(self, kind, value):
+        """Active tenant by ``kind`` ('id' or 'domain') and identifier, or None"""
+        return self.get_by_id(value) if kind == 'id' else self.get_by_domain(value)
+
+    async def aget(self, kind, value):
+        """Async get(): a cache miss is resolved with the async ORM"""
+        lookup = self._lookup(kind, value)
+        if lookup is None:
+            return None
+        key, filters = lookup
+        tenant = self._cache.get(key, _MISSING)
+        if tenant is _MISSING:
+            tenant = await Tenant.objects.filter(is_active=True, **filters).afirst()
+            self._store(key, tenant)
+        return tenant
+
+    def get_by_id(self, tenant_id):
+        return self._get(self._lookup('id', tenant_id))
+
+    def get_by_domain(self, domain):
+        return self._get(self._lookup('domain', domain))
+
+    def _lookup(self, kind, value):
+        """Cache key and query filters of an identifier, or None if it is invalid"""
+        value = str(value).strip()
+        if kind == 'id':
+            return (('id', value), {'id': int(value)}) if value.isdigit() else None
+        return (('domain', value), {'domain': value}) if value else None
+
+    def _get(self, lookup):
+        if lookup is None:
+            return None
+        key, filters = lookup
+        tenant = self._cache.get(key, _MISSING)
+        if tenant is not _MISSING:
+            return tenant
+        tenant = Tenant.objects.filter(is_active=True, **filters).first()
+        self._store(key, tenant)
+        return tenant
+
+    def _store(self, key, tenant):
+        if tenant is None:
+            self._cache.set(key, None, timeout=self.negative_timeout)
+        else:
+            # Prime both keys so a tenant resolved by domain is also a hit by id
+            self._cache.set(('id', str(tenant.id)), tenant)
+            self._cache.set(('domain', tenant.domain), tenant)
+
+    def clear(self):
+        self._cache.clear()
+
+
+tenant_cache = TenantCache()
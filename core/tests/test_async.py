@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, RequestFactory
+from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
+from core.middleware import TenantMiddleware, get_current_tenant
+from core.tests.factories import TenantFactory
+
+class TestAsyncTenantMiddleware:
+    """
+    Unit tests for TenantMiddleware in async mode.
+    Tests cover tenant resolution with the async ORM and isolation of
+    concurrent requests through the tenant context variable.
+    """
+
+    @pytest.mark.django_db
+    def test_tenant_set_for_async_view_and_cleared(self):
+        """
+        Test that an async view sees the request's tenant and that it is
+        cleared once the response is returned.
+        """
+        tenant = TenantFactory()
+        seen = []
+
+        async def view(request):
+            seen.append((request.tenant, get_current_tenant()))
+            return 'response'
+
+        middleware = TenantMiddleware(view)
+        request = RequestFactory().get('/', HTTP_X_TENANT_ID=str(tenant.id))
+
+        assert asyncio.iscoroutinefunction(middleware)
+        assert async_to_sync(middleware)(request) == 'response'
+        assert seen == [(tenant, tenant)]
+        assert get_current_tenant() is None
+
+    @pytest.mark.django_db
+    def test_concurrent_requests_keep_their_tenant(self):
+        """
+        Test that interleaved requests on one event loop each keep their own tenant.
+        """
+        tenants = [TenantFactory(), TenantFactory()]
+
+        async def view(request):
+            before = get_current_tenant()
+            await asyncio.sleep(0.01)  # let the other request run
+            return before, get_current_tenant()
+
+        middleware = TenantMiddleware(view)
+        factory = RequestFactory()
+
+        async def both():
+            return await asyncio.gather(*(
+                middleware(factory.get('/', HTTP_X_TENANT_ID=str(tenant.id))) for tenant in tenants
+            ))
+
+        assert async_to_sync(both)() == [(tenant, tenant) for tenant in tenants]
+
+
+class TestAsyncReadPath:
+    """
+    Integration tests for the async content endpoints served through ASGI.
+    """
+
+    @pytest.mark.django_db
+    def test_book_page_over_asgi(self):
+        """
+        Test that the page endpoint answers through the ASGI handler and
+        revalidates with its ETag.
+        """
+        book = BookFactory()
+        chapter = ChapterFactory(book=book)
+        verse = VerseFactory(book=book, chapter=chapter, page_number=1, text='بِسْمِ اللَّهِ')
+        client = AsyncClient()
+        headers = {'X-Tenant-ID': str(book.tenant_id)}
+
+        response = async_to_sync(client.get)(f'/api/v1/books/{book.id}/pages/1/', headers=headers)
+
+        assert response.status_code == 200
+        assert [item['id'] for item in response.json()['verses']] == [verse.id]
+        assert 'بِسْمِ' in response.content.decode()  # not \u-escaped
+        response = async_to_sync(client.get)(
+            f'/api/v1/books/{book.id}/pages/1/', headers={**headers, 'If-None-Match': response['ETag']},
+        )
+        assert response.status_code == 304
+
+    @pytest.mark.django_db
+    def test_bundle_validation_error_over_asgi(self):
+        """
+        Test that invalid parameters return DRF-style 400 errors.
+        """
+        tenant = TenantFactory()
+
+        response = async_to_sync(AsyncClient().get)(
+            '/api/v1/audio/chapter-audios/bundle/?chapter=x', headers={'X-Tenant-ID': str(tenant.id)},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {'chapter': 'A valid integer is required.'}
@@ -0,0 +1,25 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from books.tests.factories import ChapterFactory
+from core.tests.factories import TenantFactory
+
+class TestExplainViewsetsCommand:
+    """
+    Unit tests for the explain_viewsets management command.
+    """
+    
+    @pytest.mark.django_db
+    def test_reports_index_used_by_list_query(self):
+        """
+        Test that the chapter list query is reported as using the
+        composite (tenant, book, number) index.
+        """
+        tenant = TenantFactory(domain="explain")
+        ChapterFactory(book__tenant=tenant)
+        out = StringIO()
+        
+        call_command('explain_viewsets', '--tenant', 'explain', stdout=out)
+        
+        chapter_report = out.getvalue().split('ChapterViewSet', 1)[1].split('\n')[1]
+        assert 'chapter_tenant_book_num_idx' in chapter_report
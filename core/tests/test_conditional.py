@@ -0,0 +1,94 @@
+import pytest
+from rest_framework.test import APIClient
+from audio.tests.factories import ChapterAudioFactory
+from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
+from core.tests.factories import TenantFactory
+
+class TestConditionalGet:
+    """
+    Integration tests for ConditionalResponseMixin.
+    Tests cover ETag/Last-Modified headers, 304 responses without queries,
+    and validator changes after writes.
+    """
+
+    @pytest.fixture
+    def chapter(self):
+        """Fixture providing a chapter with one verse."""
+        book = BookFactory(tenant=TenantFactory())
+        chapter = ChapterFactory(book=book, number=1)
+        VerseFactory(book=book, chapter=chapter, number=1)
+        return chapter
+
+    def _get(self, url, tenant, **headers):
+        return APIClient().get(url, HTTP_X_TENANT_ID=str(tenant.id), **headers)
+
+    @pytest.mark.django_db
+    def test_validators_present(self, chapter):
+        """
+        Test that list and detail responses carry a strong ETag and Last-Modified.
+        """
+        for url in ('/api/v1/chapters/', f'/api/v1/chapters/{chapter.id}/'):
+            response = self._get(url, chapter.tenant)
+            assert response.status_code == 200
+            assert response['ETag'].startswith('"')
+            assert 'Last-Modified' in response
+
+    @pytest.mark.django_db
+    def test_if_none_match_returns_304_without_queries(self, chapter, django_assert_num_queries):
+        """
+        Test that a matching If-None-Match is answered with an empty 304
+        without running the queryset.
+        """
+        etag = self._get('/api/v1/verses/', chapter.tenant)['ETag']
+
+        with django_assert_num_queries(0):
+            response = self._get('/api/v1/verses/', chapter.tenant, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert not response.content
+
+    @pytest.mark.django_db
+    def test_if_modified_since_returns_304(self, chapter):
+        """
+        Test that If-Modified-Since equal to Last-Modified returns 304.
+        """
+        last_modified = self._get('/api/v1/chapters/', chapter.tenant)['Last-Modified']
+        response = self._get('/api/v1/chapters/', chapter.tenant, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+    @pytest.mark.django_db
+    def test_etag_changes_after_write(self, chapter, django_capture_on_commit_callbacks):
+        """
+        Test that a write to the tenant's content invalidates the old ETag.
+        """
+        etag = self._get('/api/v1/verses/', chapter.tenant)['ETag']
+        with django_capture_on_commit_callbacks(execute=True):
+            VerseFactory(book=chapter.book, chapter=chapter, number=2)
+
+        response = self._get('/api/v1/verses/', chapter.tenant, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        assert len(response.json()['results']) == 2
+
+    @pytest.mark.django_db
+    def test_etag_differs_per_url(self, chapter):
+        """
+        Test that different representations get different ETags.
+        """
+        first = self._get('/api/v1/verses/', chapter.tenant)['ETag']
+        second = self._get('/api/v1/verses/?page_size=1', chapter.tenant)['ETag']
+        assert first != second
+
+    @pytest.mark.django_db
+    def test_audio_scope(self, chapter, django_capture_on_commit_callbacks):
+        """
+        Test that audio viewsets are versioned by audio writes only.
+        """
+        etag = self._get('/api/v1/audio/chapter-audios/', chapter.tenant)['ETag']
+        with django_capture_on_commit_callbacks(execute=True):
+            VerseFactory(book=chapter.book, chapter=chapter, number=2)
+        assert self._get('/api/v1/audio/chapter-audios/', chapter.tenant, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ChapterAudioFactory(chapter=chapter)
+        assert self._get('/api/v1/audio/chapter-audios/', chapter.tenant, HTTP_IF_NONE_MATCH=etag).status_code == 200
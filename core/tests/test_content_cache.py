@@ -0,0 +1,136 @@
+import pytest
+from django.db import transaction
+from rest_framework.test import APIClient
+from books.models import Book, Verse
+from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
+from core.content_cache import bump_content_version, content_version
+from core.tests.factories import TenantFactory
+
+class TestContentVersion:
+    """
+    Unit tests for per-tenant content versions.
+    """
+
+    def test_version_is_stable_until_bumped(self):
+        """
+        Test that the version stays the same between reads and changes
+        only for the bumped scope.
+        """
+        books = content_version(1, 'books')
+        audio = content_version(1, 'audio')
+        assert content_version(1, 'books') == books
+
+        bump_content_version(1, 'books')
+        assert content_version(1, 'books') != books
+        assert content_version(1, 'audio') == audio
+
+    def test_versions_are_per_tenant(self):
+        """
+        Test that bumping one tenant leaves another tenant's version alone.
+        """
+        other = content_version(2, 'books')
+        bump_content_version(1, 'books')
+        assert content_version(2, 'books') == other
+
+
+class TestCachedResponses:
+    """
+    Integration tests for CachedResponseMixin on the books viewsets.
+    Tests cover cache hits without queries, invalidation on writes and
+    tenant isolation.
+    """
+
+    @pytest.fixture
+    def book(self):
+        """Fixture providing a book with one chapter and two verses."""
+        book = BookFactory(tenant=TenantFactory())
+        chapter = ChapterFactory(book=book, number=1)
+        VerseFactory(book=book, chapter=chapter, number=1, page_number=1)
+        VerseFactory(book=book, chapter=chapter, number=2, page_number=1)
+        return book
+
+    def _get(self, url, tenant):
+        return APIClient().get(url, HTTP_X_TENANT_ID=str(tenant.id))
+
+    @pytest.mark.django_db
+    def test_repeated_list_served_from_cache(self, book, django_assert_num_queries):
+        """
+        Test that a repeated list request is answered without any query.
+        """
+        first = self._get('/api/v1/verses/', book.tenant)
+        assert first.status_code == 200
+
+        with django_assert_num_queries(0):
+            second = self._get('/api/v1/verses/', book.tenant)
+        assert second.json() == first.json()
+
+    @pytest.mark.django_db
+    def test_page_served_from_cache(self, book, django_assert_num_queries):
+        """
+        Test that the Mushaf page action is cached as well.
+        """
+        url = f'/api/v1/books/{book.id}/pages/1/'
+        assert self._get(url, book.tenant).status_code == 200
+        with django_assert_num_queries(0):
+            assert self._get(url, book.tenant).json()['verse_count'] == 2
+
+    @pytest.mark.django_db
+    def test_write_invalidates(self, book, django_capture_on_commit_callbacks):
+        """
+        Test that saving a verse makes the next request see the change.
+        """
+        url = f'/api/v1/books/{book.id}/pages/1/'
+        assert self._get(url, book.tenant).json()['verse_count'] == 2
+
+        with django_capture_on_commit_callbacks(execute=True):
+            VerseFactory(book=book, chapter=book.chapters.first(), number=3, page_number=1)
+
+        assert self._get(url, book.tenant).json()['verse_count'] == 3
+
+    @pytest.mark.django_db
+    def test_queryset_delete_invalidates(self, book, django_capture_on_commit_callbacks):
+        """
+        Test that a bulk delete (as the admin's delete action does) makes
+        the next request see the change.
+        """
+        assert len(self._get('/api/v1/verses/', book.tenant).json()['results']) == 2
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Verse.unscoped.filter(book=book, number=2).delete()
+
+        assert len(self._get('/api/v1/verses/', book.tenant).json()['results']) == 1
+
+    @pytest.mark.django_db
+    def test_errors_not_cached(self, book):
+        """
+        Test that a 404 is not cached, so the page appears once it exists.
+        """
+        url = f'/api/v1/books/{book.id}/pages/9/'
+        assert self._get(url, book.tenant).status_code == 404
+        VerseFactory(book=book, chapter=book.chapters.first(), number=3, page_number=9)
+        assert self._get(url, book.tenant).status_code == 200
+
+    @pytest.mark.django_db
+    def test_tenants_isolated(self, book):
+        """
+        Test that one tenant's cached list is not served to another tenant.
+        """
+        other = TenantFactory()
+        assert len(self._get('/api/v1/books/', book.tenant).json()['results']) == 1
+        assert self._get('/api/v1/books/', other).json()['results'] == []
+
+    @pytest.mark.django_db
+    def test_cascade_bumps_once(self, book, django_capture_on_commit_callbacks):
+        """
+        Test that deleting a book with its chapters and verses in one
+        transaction queues a single version bump.
+        """
+        url = f'/api/v1/books/{book.id}/pages/1/'
+        assert self._get(url, book.tenant).status_code == 200
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                Book.unscoped.filter(id=book.id).delete()
+
+        assert len(callbacks) == 1
+        assert self._get(url, book.tenant).status_code == 404
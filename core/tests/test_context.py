@@ -0,0 +1,125 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+from core.context import (
+    ContextThreadPoolExecutor,
+    TenantProcessPoolExecutor,
+    get_current_tenant,
+    set_current_tenant,
+    tenant_context,
+)
+from core.middleware import TenantMiddleware
+from core.models import Tenant
+from core.tests.factories import TenantFactory
+
+class TestTenantContext:
+    """
+    Unit tests for the context-variable based tenant context.
+    Tests cover scoped activation, decorators and propagation into executors.
+    """
+
+    def test_blocks_nest_and_restore(self):
+        """
+        Test that nested blocks restore the previous tenant, also on errors.
+        """
+        outer, inner = Tenant(id=1, domain='outer'), Tenant(id=2, domain='inner')
+
+        with tenant_context(outer):
+            with pytest.raises(RuntimeError):
+                with tenant_context(inner):
+                    assert get_current_tenant() is inner
+                    raise RuntimeError
+            assert get_current_tenant() is outer
+        assert get_current_tenant() is None
+
+    @pytest.mark.django_db
+    def test_tenant_id_is_loaded(self):
+        """
+        Test that a tenant id is resolved to the Tenant when the block is entered.
+        """
+        tenant = TenantFactory()
+
+        with tenant_context(tenant.id) as current:
+            assert current == tenant == get_current_tenant()
+
+    def test_decorates_sync_and_async_functions(self):
+        """
+        Test that decorated functions run with the tenant, and the same
+        decorator can be re-entered.
+        """
+        tenant = Tenant(id=1, domain='decorated')
+        scope = tenant_context(tenant)
+
+        @scope
+        def sync_current():
+            return get_current_tenant()
+
+        @scope
+        async def async_current():
+            await asyncio.sleep(0)
+            return get_current_tenant(), sync_current()
+
+        assert sync_current() is tenant
+        assert async_to_sync(async_current)() == (tenant, tenant)
+        assert get_current_tenant() is None
+
+    def test_decorated_coroutines_run_concurrently(self):
+        """
+        Test that concurrent calls of a decorated coroutine, exiting in
+        another order than they entered, each restore their own tenant.
+        """
+        tenant = Tenant(id=1, domain='concurrent')
+
+        @tenant_context(tenant)
+        async def current(delay):
+            await asyncio.sleep(delay)
+            return get_current_tenant()
+
+        async def run():
+            return await asyncio.gather(current(0), current(0.02))
+
+        assert asyncio.run(run()) == [tenant, tenant]
+        assert get_current_tenant() is None
+
+    def test_context_thread_pool_propagates(self):
+        """
+        Test that ContextThreadPoolExecutor tasks see the submitter's tenant,
+        unlike tasks of a plain thread pool.
+        """
+        tenant = Tenant(id=1, domain='pooled')
+
+        with tenant_context(tenant):
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                assert pool.submit(get_current_tenant).result() is None
+            with ContextThreadPoolExecutor(max_workers=2) as pool:
+                assert list(pool.map(lambda _: get_current_tenant(), range(3))) == [tenant] * 3
+
+    def test_process_pool_reenters_tenant(self):
+        """
+        Test that TenantProcessPoolExecutor tasks run with the submitter's tenant.
+        """
+        tenant = Tenant(id=7, domain='forked')
+
+        with tenant_context(tenant):
+            with TenantProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork')) as pool:
+                assert pool.submit(get_current_tenant).result().domain == 'forked'
+
+    @pytest.mark.django_db
+    def test_middleware_resets_tenant_when_view_raises(self):
+        """
+        Test that the request's tenant does not outlive a failing view.
+        """
+        tenant = TenantFactory()
+        previous = Tenant(id=0, domain='previous')
+        set_current_tenant(previous)
+
+        def view(request):
+            assert get_current_tenant() == tenant
+            raise RuntimeError
+
+        with pytest.raises(RuntimeError):
+            TenantMiddleware(view)(RequestFactory().get('/', HTTP_X_TENANT_ID=str(tenant.id)))
+        assert get_current_tenant() is previous
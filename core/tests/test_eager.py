@@ -0,0 +1,137 @@
+import pytest
+from rest_framework import serializers
+from rest_framework.test import APIClient
+from audio.models import ChapterAudio
+from audio.serializers import AudioTimestampSerializer, ChapterAudioSerializer, ReciterSerializer
+from audio.tests.factories import AudioTimestampFactory, ChapterAudioFactory, ReciterFactory
+from books.models import Book, Chapter
+from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
+from core.eager import eager_loading
+from core.tests.factories import TenantFactory
+from core.tests.utils import assert_constant_queries
+from notes.tests.factories import BookmarkFactory, PlayHistoryFactory, UserNoteFactory
+from users.tests.factories import UserFactory
+
+class TestEagerLoading:
+    """
+    Unit tests for deriving select_related/prefetch_related from serializers.
+    """
+
+    def test_nested_serializer_selects_relation(self):
+        """
+        Test that the nested reciter is selected while pk-only relations are not.
+        """
+        assert eager_loading(ChapterAudioSerializer) == (('reciter',), ())
+
+    def test_flat_serializer_loads_nothing(self):
+        """
+        Test that a serializer rendering only foreign key ids needs no joins.
+        """
+        assert eager_loading(AudioTimestampSerializer) == ((), ())
+
+    def test_to_many_nested_serializer_is_prefetched(self):
+        """
+        Test that relations under a to-many nested serializer are prefetched,
+        and that dotted sources select the relation they traverse.
+        """
+        class AudioSerializer(serializers.ModelSerializer):
+            reciter = ReciterSerializer()
+
+            class Meta:
+                model = ChapterAudio
+                fields = ['id', 'reciter']
+
+        class ChapterWithAudiosSerializer(serializers.ModelSerializer):
+            audios = AudioSerializer(many=True)
+            book_title = serializers.CharField(source='book.title')
+
+            class Meta:
+                model = Chapter
+                fields = ['id', 'audios', 'book_title']
+
+        assert eager_loading(ChapterWithAudiosSerializer) == (('book',), ('audios__reciter',))
+
+    def test_meta_overrides(self):
+        """
+        Test that Meta.select_related / Meta.prefetch_related are added.
+        """
+        class BookWithCountSerializer(serializers.ModelSerializer):
+            chapter_count = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Book
+                fields = ['id', 'chapter_count']
+                select_related = ['tenant']
+                prefetch_related = ['chapters']
+
+            def get_chapter_count(self, obj):
+                return len(obj.chapters.all())
+
+        assert eager_loading(BookWithCountSerializer) == (('tenant',), ('chapters',))
+
+
+class TestListQueryCounts:
+    """
+    Integration tests asserting every list endpoint runs a constant number
+    of queries regardless of the number of rows.
+    """
+
+    @pytest.fixture
+    def chapter(self):
+        """Fixture providing a chapter of a fresh tenant's book."""
+        book = BookFactory(tenant=TenantFactory())
+        return ChapterFactory(book=book, number=1)
+
+    def _assert_constant(self, url, tenant, add_rows, client=None):
+        assert_constant_queries(client or APIClient(), url, add_rows, HTTP_X_TENANT_ID=str(tenant.id))
+
+    @pytest.mark.django_db
+    def test_book_endpoints(self, chapter):
+        """
+        Test the book, chapter and verse lists.
+        """
+        tenant = chapter.tenant
+        self._assert_constant('/api/v1/books/', tenant, lambda n: BookFactory.create_batch(n, tenant=tenant))
+        self._assert_constant(
+            '/api/v1/chapters/', tenant,
+            lambda n: [ChapterFactory(book=chapter.book) for _ in range(n)],
+        )
+        self._assert_constant(
+            '/api/v1/verses/', tenant,
+            lambda n: [VerseFactory(book=chapter.book, chapter=chapter) for _ in range(n)],
+        )
+
+    @pytest.mark.django_db
+    def test_audio_endpoints(self, chapter):
+        """
+        Test the reciter, chapter audio and timestamp lists.
+        """
+        tenant = chapter.tenant
+        self._assert_constant('/api/v1/audio/reciters/', tenant, lambda n: ReciterFactory.create_batch(n, tenant=tenant))
+        self._assert_constant(
+            '/api/v1/audio/chapter-audios/', tenant,
+            lambda n: ChapterAudioFactory.create_batch(n, chapter=chapter, reciter__tenant=tenant),
+        )
+        audio = ChapterAudioFactory(chapter=chapter, reciter__tenant=tenant)
+        self._assert_constant(
+            '/api/v1/audio/timestamps/', tenant,
+            lambda n: AudioTimestampFactory.create_batch(n, chapter_audio=audio),
+        )
+
+    @pytest.mark.django_db
+    def test_note_endpoints(self, chapter):
+        """
+        Test the authenticated user's notes, bookmarks and play history lists.
+        """
+        tenant = chapter.tenant
+        user = UserFactory(tenant=tenant)
+        client = APIClient()
+        client.force_authenticate(user)
+        book = chapter.book
+        self._assert_constant('/api/v1/notes/notes/', tenant, lambda n: UserNoteFactory.create_batch(n, user=user, book=book), client)
+        self._assert_constant('/api/v1/notes/bookmarks/', tenant, lambda n: BookmarkFactory.create_batch(n, user=user, book=book), client)
+        self._assert_constant(
+            '/api/v1/notes/history/', tenant,
+            lambda n: PlayHistoryFactory.create_batch(n, user=user, chapter_audio__chapter=chapter, chapter_audio__reciter__tenant=tenant),
+            client,
+        )
@@ -0,0 +1,109 @@
+from datetime import timedelta
+import pytest
+from django.utils import timezone
+from core import jobs
+from core.context import get_current_tenant, tenant_context
+from core.models import Job
+from core.tests.factories import TenantFactory
+
+calls = []
+
+
+@jobs.job('tests.record')
+def record(payload):
+    calls.append(payload['value'])
+    return {'doubled': payload['value'] * 2}
+
+
+@jobs.job('tests.tenant')
+def record_tenant(payload):
+    calls.append(get_current_tenant())
+
+
+@jobs.job('tests.fail')
+def fail(payload):
+    raise RuntimeError('boom')
+
+
+class TestJobQueue:
+    """
+    Unit tests for the database-backed job queue.
+    Tests cover enqueueing, claiming, inline execution, retries and stale job recovery.
+    """
+
+    @pytest.fixture(autouse=True)
+    def reset_calls(self):
+        calls.clear()
+
+    @pytest.mark.django_db
+    def test_enqueue_and_run(self):
+        """
+        Test that queued jobs run once, in run_at order, and store their result.
+        """
+        second = jobs.enqueue('tests.record', {'value': 2}, run_at=timezone.now() - timedelta(seconds=1))
+        first = jobs.enqueue('tests.record', {'value': 1}, run_at=timezone.now() - timedelta(seconds=2))
+
+        assert jobs.Worker(processes=0).run(burst=True) == 2
+        assert calls == [1, 2]
+        first.refresh_from_db()
+        assert first.status == Job.Status.DONE
+        assert first.result == {'doubled': 2}
+        assert jobs.Worker(processes=0).run(burst=True) == 0
+
+    @pytest.mark.django_db
+    def test_handler_runs_with_enqueuing_tenant(self):
+        """
+        Test that a job runs with the tenant current when it was queued,
+        or the one given explicitly.
+        """
+        tenant, other = TenantFactory(), TenantFactory()
+        with tenant_context(tenant):
+            jobs.enqueue('tests.tenant', run_at=timezone.now() - timedelta(seconds=2))
+            jobs.enqueue('tests.tenant', run_at=timezone.now() - timedelta(seconds=1), tenant=other.id)
+
+        assert jobs.Worker(processes=0).run(burst=True) == 2
+        assert calls == [tenant, other]
+        assert get_current_tenant() is None
+
+    @pytest.mark.django_db
+    def test_unknown_handler_rejected(self):
+        """
+        Test that enqueueing an unregistered job name fails immediately.
+        """
+        with pytest.raises(jobs.UnknownJob):
+            jobs.enqueue('tests.missing')
+
+    @pytest.mark.django_db
+    def test_future_jobs_not_claimed(self):
+        """
+        Test that jobs scheduled in the future are not claimed yet.
+        """
+        jobs.enqueue('tests.record', {'value': 1}, run_at=timezone.now() + timedelta(hours=1))
+        assert jobs.claim_jobs(10, 'worker') == []
+
+    @pytest.mark.django_db
+    def test_failure_retried_then_failed(self, settings):
+        """
+        Test that a failing job is rescheduled with backoff and fails after max_attempts.
+        """
+        settings.JOB_RETRY_DELAY = 0
+        job = jobs.enqueue('tests.fail', max_attempts=2)
+
+        jobs.Worker(processes=0).run(burst=True)
+        job.refresh_from_db()
+        assert job.status == Job.Status.FAILED
+        assert job.attempts == 2
+        assert 'RuntimeError: boom' in job.error
+
+    @pytest.mark.django_db
+    def test_stale_running_jobs_requeued(self):
+        """
+        Test that a job left running by a dead worker is put back in the queue.
+        """
+        job = jobs.enqueue('tests.record', {'value': 3})
+        jobs.claim_jobs(1, 'dead-worker')
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(days=1))
+
+        assert jobs.requeue_stale(timeout=60) == 1
+        jobs.Worker(processes=0).run(burst=True)
+        assert calls == [3]
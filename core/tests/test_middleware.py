@@ -1,6 +1,7 @@
 import pytest
 from django.test import RequestFactory
 from core.middleware import TenantMiddleware, get_current_tenant
+from core.tenant_cache import tenant_cache
 from core.tests.factories import TenantFactory
 
 class TestTenantMiddleware:
@@ -61,4 +62,66 @@ class TestTenantMiddleware:
         middleware.process_request(request)
         
         assert request.tenant is None
-        assert get_current_tenant() is None
\ No newline at end of file
+        assert get_current_tenant() is None
+    
+    @pytest.mark.django_db
+    def test_tenant_resolution_is_cached(self, middleware, factory, django_assert_num_queries):
+        """
+        Test that a resolved tenant is served from the in-process cache.
+        Verifies that the second request for the same tenant runs no query,
+        whether it is identified by id or by domain.
+        """
+        tenant = TenantFactory(domain="cached")
+        request = factory.get('/')
+        request.META['HTTP_X_TENANT_DOMAIN'] = "cached"
+        middleware.process_request(request)
+        
+        with django_assert_num_queries(0):
+            request = factory.get('/')
+            request.META['HTTP_X_TENANT_ID'] = str(tenant.id)
+            middleware.process_request(request)
+        
+        assert request.tenant == tenant
+    
+    @pytest.mark.django_db
+    def test_unknown_domain_is_negatively_cached(self, middleware, factory, django_assert_num_queries):
+        """
+        Test negative caching of unknown tenant domains.
+        Verifies that repeated lookups for a missing domain hit the database once.
+        """
+        tenant_cache.clear()
+        request = factory.get('/')
+        request.META['HTTP_X_TENANT_DOMAIN'] = "missing"
+        middleware.process_request(request)
+        
+        with django_assert_num_queries(0):
+            middleware.process_request(request)
+        
+        assert request.tenant is None
+    
+    @pytest.mark.django_db
+    def test_cache_invalidated_on_tenant_save(self, middleware, factory):
+        """
+        Test that saving a tenant invalidates cached lookups.
+        Verifies that a deactivated tenant is no longer resolved and that
+        a domain cached as missing resolves once the tenant is created.
+        """
+        tenant = TenantFactory(domain="toggle")
+        request = factory.get('/')
+        request.META['HTTP_X_TENANT_DOMAIN'] = "toggle"
+        middleware.process_request(request)
+        assert request.tenant == tenant
+        
+        tenant.is_active = False
+        tenant.save()
+        middleware.process_request(request)
+        assert request.tenant is None
+        
+        request = factory.get('/')
+        request.META['HTTP_X_TENANT_DOMAIN'] = "later"
+        middleware.process_request(request)
+        assert request.tenant is None
+        
+        later = TenantFactory(domain="later")
+        middleware.process_request(request)
+        assert request.tenant == later
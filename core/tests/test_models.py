@@ -1,6 +1,8 @@
 import pytest
 from django.core.exceptions import ValidationError
-from core.models import Tenant
+from rest_framework.test import APIClient
+from core.context import NO_TENANT, tenant_context
+from core.models import Tenant, tenant_lookup
 from core.tests.factories import TenantFactory
 
 class TestTenantModel:
@@ -41,4 +43,63 @@ class TestTenantModel:
         """
         TenantFactory(domain="test")
         with pytest.raises(Exception):  # IntegrityError یا ValidationError
-            TenantFactory(domain="test")
\ No newline at end of file
+            TenantFactory(domain="test")
+
+class TestTenantScoping:
+    """
+    Unit tests for the tenant-scoped default managers.
+    Tests cover the generated tenant lookups, the three scope states
+    and the unscoped escape hatch.
+    """
+
+    def test_lookup_prefers_the_tenant_column(self):
+        """
+        Test that models filter on their own tenant column, else on the
+        nearest tenant-owned relation (never on the user's tenant).
+        """
+        from audio.models import AudioWaveform
+        from books.models import BookPage, Verse
+        from notes.models import PlayHistory, UserNote
+
+        assert tenant_lookup(Verse) == 'tenant'
+        assert tenant_lookup(BookPage) == 'book__tenant'
+        assert tenant_lookup(UserNote) == 'book__tenant'
+        assert tenant_lookup(PlayHistory) == 'chapter_audio__tenant'
+        assert tenant_lookup(AudioWaveform) == 'chapter_audio__tenant'
+
+    @pytest.mark.django_db
+    def test_objects_follow_the_current_tenant(self):
+        """
+        Test that ``objects`` is unfiltered outside a tenant context, scoped
+        inside one and empty for NO_TENANT, while ``unscoped`` and related
+        managers always see every row.
+        """
+        from books.models import Book, Verse
+        from books.tests.factories import VerseFactory
+
+        verse, other = VerseFactory(), VerseFactory()
+        assert Verse.objects.count() == 2
+
+        with tenant_context(verse.tenant):
+            assert list(Verse.objects.all()) == [verse]
+            assert list(Book.objects.values_list('id', flat=True)) == [verse.book_id]
+            assert Verse.unscoped.count() == 2
+            assert list(other.book.verses.all()) == [other]
+        with tenant_context(NO_TENANT):
+            assert not Verse.objects.exists()
+            assert Verse._default_manager.count() == 2
+
+    @pytest.mark.django_db
+    def test_requests_without_tenant_see_nothing(self):
+        """
+        Test that a request naming no tenant gets an empty list from a
+        viewset relying on the scoped manager alone.
+        """
+        from books.tests.factories import BookFactory
+
+        book = BookFactory()
+        client = APIClient()
+
+        assert client.get('/api/v1/books/').data['results'] == []
+        response = client.get('/api/v1/books/', HTTP_X_TENANT_ID=str(book.tenant_id))
+        assert [row['id'] for row in response.data['results']] == [book.id]
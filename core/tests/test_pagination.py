@@ -0,0 +1,91 @@
+import pytest
+from rest_framework.test import APIClient
+from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
+from core.pagination import KeysetPagination
+from core.tests.factories import TenantFactory
+
+class TestKeysetPagination:
+    """
+    Unit tests for KeysetPagination.
+    Tests cover ordering by (chapter, verse number), forward and backward
+    traversal through cursor links, and invalid cursors.
+    """
+
+    @pytest.fixture
+    def verses(self):
+        """Fixture providing seven verses spread over two chapters created out of order."""
+        tenant = TenantFactory()
+        book = BookFactory(tenant=tenant)
+        chapter2 = ChapterFactory(book=book, number=2)
+        chapter1 = ChapterFactory(book=book, number=1)
+        created = [
+            VerseFactory(book=book, chapter=chapter, number=number)
+            for chapter, number in [(chapter2, 2), (chapter1, 3), (chapter2, 1), (chapter1, 1), (chapter1, 2), (chapter2, 3), (chapter1, 4)]
+        ]
+        expected = sorted(created, key=lambda verse: (verse.chapter_id, verse.number))
+        return tenant, [verse.id for verse in expected]
+
+    def _get(self, client, url, tenant):
+        response = client.get(url, HTTP_X_TENANT_ID=str(tenant.id))
+        assert response.status_code == 200
+        return response.json()
+
+    @pytest.mark.django_db
+    def test_walk_pages_forward(self, verses):
+        """
+        Test following `next` links through every page.
+        Verifies that pages are bounded by page_size and that the concatenated
+        results follow (chapter, verse number) without gaps or repeats.
+        """
+        tenant, expected = verses
+        client = APIClient()
+        url = '/api/v1/verses/?page_size=3'
+        seen = []
+        while url:
+            page = self._get(client, url, tenant)
+            assert len(page['results']) <= 3
+            seen.extend(verse['id'] for verse in page['results'])
+            url = page['next']
+
+        assert seen == expected
+
+    @pytest.mark.django_db
+    def test_previous_link_returns_prior_page(self, verses):
+        """
+        Test backward traversal through the `previous` link.
+        Verifies that going forward then back yields the first page again
+        and that the first page has no previous link.
+        """
+        tenant, expected = verses
+        client = APIClient()
+        first = self._get(client, '/api/v1/verses/?page_size=3', tenant)
+        assert first['previous'] is None
+
+        second = self._get(client, first['next'], tenant)
+        assert [verse['id'] for verse in second['results']] == expected[3:6]
+
+        back = self._get(client, second['previous'], tenant)
+        assert [verse['id'] for verse in back['results']] == expected[:3]
+        assert back['previous'] is None
+
+    @pytest.mark.django_db
+    def test_invalid_cursor(self, verses):
+        """
+        Test that a malformed cursor returns 404 instead of a server error.
+        """
+        tenant, _ = verses
+        response = APIClient().get('/api/v1/verses/?cursor=not-a-cursor', HTTP_X_TENANT_ID=str(tenant.id))
+        assert response.status_code == 404
+
+    @pytest.mark.django_db
+    def test_tampered_cursor(self, verses):
+        """
+        Test that a well-formed cursor with values of the wrong types
+        returns 404 instead of failing the query.
+        """
+        tenant, _ = verses
+        pagination = KeysetPagination()
+        for position in (['x', 'y', 'z'], [1, None, 2], [[1], 2, 3]):
+            cursor = pagination.encode_cursor(position, False)
+            response = APIClient().get(f'/api/v1/verses/?cursor={cursor}', HTTP_X_TENANT_ID=str(tenant.id))
+            assert response.status_code == 404
@@ -0,0 +1,230 @@
+from types import SimpleNamespace
+import pytest
+from django.apps import apps
+from django.db import DatabaseError, connection, transaction
+from django.db.migrations.state import ProjectState
+from core import rls
+from core.context import NO_TENANT, tenant_context
+from core.models import Tenant
+from core.rls import TenantRLS, set_tenant_variable, tenant_variable
+
+class FakeCursor:
+    """DB-API cursor recording its statements; takes one, like a named cursor"""
+
+    def __init__(self, executed):
+        self.executed = executed
+        self.closed = False
+
+    def execute(self, sql, params=None):
+        assert not self.executed, 'a named cursor takes a single statement'
+        self.executed.append((sql, params))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed = True
+
+
+class FakeDatabase:
+    """Raw connection handing out a fresh FakeCursor per cursor() call"""
+
+    def __init__(self):
+        self.cursors = []
+
+    def cursor(self):
+        self.cursors.append(FakeCursor([]))
+        return self.cursors[-1]
+
+    @property
+    def sent(self):
+        return [(cursor.executed[0][1][1], cursor.executed[0][1][2]) for cursor in self.cursors]
+
+    @property
+    def cursors_closed(self):
+        return all(cursor.closed for cursor in self.cursors)
+
+
+class TestTenantRLS:
+    """
+    Unit tests for the optional PostgreSQL row-level security mode.
+    Tests cover the session variable, the policy migrations and the SQLite fallback.
+    """
+
+    def test_variable_follows_the_current_tenant(self):
+        """
+        Test that only code outside any tenant context is unrestricted:
+        NO_TENANT sends an id that matches no rows.
+        """
+        assert tenant_variable() == ''
+        with tenant_context(Tenant(id=7)):
+            assert tenant_variable() == '7'
+            with tenant_context(NO_TENANT):
+                assert tenant_variable() == '-1'
+                with tenant_context(None):
+                    assert tenant_variable() == ''
+
+    def test_variable_is_sent_when_it_changes(self):
+        """
+        Test that the execute wrapper sets the session variable once per
+        tenant in autocommit mode, and a transaction-local one once per
+        transaction, again after a savepoint rollback.
+        """
+        database = FakeDatabase()
+        connection = SimpleNamespace(in_atomic_block=False, tenant_variable=None, run_on_commit=[], connection=database)
+
+        def query():
+            set_tenant_variable(lambda *args: None, 'SELECT 1', None, False, {'connection': connection, 'cursor': None})
+
+        query()
+        query()
+        with tenant_context(Tenant(id=3)):
+            query()
+            query()
+            connection.in_atomic_block = True
+            query()
+            query()
+            connection.run_on_commit.append('callback')
+            query()
+            # A savepoint rollback filters run_on_commit into a new list
+            connection.run_on_commit = []
+            query()
+            connection.in_atomic_block = False
+            query()
+        assert database.sent == [('', False), ('3', False), ('3', True), ('3', True)]
+
+    def test_variable_is_set_beside_server_side_cursors(self):
+        """
+        Test that the variable goes through a cursor of its own, leaving the
+        query's cursor (a named cursor for .iterator() on PostgreSQL, which
+        accepts a single execute) to the query.
+        """
+        database = FakeDatabase()
+        connection = SimpleNamespace(in_atomic_block=True, tenant_variable=None, run_on_commit=[], connection=database)
+        named = FakeCursor([])
+        context = {'connection': connection, 'cursor': SimpleNamespace(cursor=named)}
+
+        def execute(sql, params, many, context):
+            context['cursor'].cursor.execute(sql, params)
+
+        with tenant_context(Tenant(id=5)):
+            set_tenant_variable(execute, 'SELECT * FROM books_verse', None, False, context)
+        assert named.executed == [('SELECT * FROM books_verse', None)]
+        assert database.sent == [('5', True)]
+        assert database.cursors_closed
+
+    def test_policies_are_skipped_on_sqlite(self):
+        """
+        Test that the policy operation emits nothing outside PostgreSQL,
+        and builds the policy on the tenant column or through the parent.
+        """
+        state = ProjectState.from_apps(apps)
+        operation = TenantRLS('bookpage', parent='book')
+        executed = []
+        editor = SimpleNamespace(connection=connection, quote_name=connection.ops.quote_name, execute=executed.append)
+        operation.database_forwards('books', editor, state, state)
+        operation.database_backwards('books', editor, state, state)
+        assert executed == []
+
+        model = state.apps.get_model('books', 'BookPage')
+        predicate = operation.predicate(model, connection.ops.quote_name)
+        assert 'EXISTS (SELECT 1 FROM "books_book"' in predicate
+        assert '"books_bookpage"."book_id"' in predicate
+        assert '"tenant_id" = ' in TenantRLS('verse').predicate(state.apps.get_model('books', 'Verse'), connection.ops.quote_name)
+
+    @pytest.mark.django_db
+    def test_managers_leave_filtering_to_the_policies(self, monkeypatch):
+        """
+        Test that scoped managers add no tenant filter when policies are
+        enforced, but still return nothing for requests without a tenant.
+        """
+        from books.models import Verse
+        from books.tests.factories import VerseFactory
+
+        verse = VerseFactory()
+        VerseFactory()
+        monkeypatch.setattr('core.models.rls_enforced', lambda using: True)
+
+        with tenant_context(verse.tenant):
+            # SQLite has no policies: every row shows
+            assert Verse.objects.count() == 2
+        with tenant_context(NO_TENANT):
+            assert not Verse.objects.exists()
+        assert not rls.rls_enabled(connection)
+
+
+@pytest.mark.skipif(connection.vendor != 'postgresql', reason='Row-level security policies need PostgreSQL')
+@pytest.mark.django_db
+class TestTenantPolicies:
+    """
+    Tests for the policies themselves on PostgreSQL, queried as an ordinary
+    role since superusers bypass row-level security.
+    """
+
+    @pytest.fixture
+    def books(self, settings):
+        """Fixture providing books of two tenants, read through the policies."""
+        from books.tests.factories import BookFactory, ChapterFactory
+
+        settings.TENANT_RLS = True
+        first, second = ChapterFactory().book, BookFactory()
+        with connection.cursor() as cursor:
+            # Rolled back with the test's transaction
+            cursor.execute('CREATE ROLE tenant_rls_probe NOLOGIN')
+            cursor.execute('GRANT SELECT, INSERT, UPDATE, DELETE ON ALL TABLES IN SCHEMA public TO tenant_rls_probe')
+            cursor.execute('GRANT USAGE ON ALL SEQUENCES IN SCHEMA public TO tenant_rls_probe')
+            cursor.execute('SET LOCAL ROLE tenant_rls_probe')
+        with connection.execute_wrapper(set_tenant_variable):
+            yield first, second
+
+    def test_tenant_sees_only_its_rows(self, books):
+        """
+        Test that a tenant reads only its rows, on its own tenant column and
+        through a parent, even through the unscoped managers.
+        """
+        from books.models import Book, Chapter
+
+        first, second = books
+        with tenant_context(first.tenant):
+            assert list(Book.unscoped.values_list('id', flat=True)) == [first.id]
+            assert list(Book.objects.values_list('id', flat=True)) == [first.id]
+            assert Chapter.unscoped.filter(book=first).exists()
+        with tenant_context(second.tenant):
+            assert not Chapter.unscoped.exists()
+
+    def test_only_no_context_is_unrestricted(self, books):
+        """
+        Test that a request without a tenant sees nothing, while code outside
+        any tenant context sees every tenant's rows.
+        """
+        from books.models import Book
+
+        with tenant_context(NO_TENANT):
+            assert not Book.unscoped.exists()
+        with tenant_context(None):
+            assert Book.unscoped.count() == 2
+
+    def test_writes_are_checked(self, books):
+        """
+        Test that a tenant cannot write rows of another tenant.
+        """
+        from books.models import Book
+
+        first, second = books
+        with tenant_context(first.tenant):
+            with pytest.raises(DatabaseError), transaction.atomic():
+                Book.unscoped.create(tenant=second.tenant, title='Foreign')
+
+    def test_variable_survives_savepoint_rollback(self, books):
+        """
+        Test that the transaction-local variable is restored after a
+        savepoint rollback reverts it.
+        """
+        from books.models import Book
+
+        first, second = books
+        with tenant_context(first.tenant), transaction.atomic():
+            with pytest.raises(ValueError), transaction.atomic():
+                assert Book.unscoped.count() == 1
+                raise ValueError
+            assert list(Book.unscoped.values_list('id', flat=True)) == [first.id]
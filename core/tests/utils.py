@@ -0,0 +1,31 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.tenant_cache import tenant_cache
+
+
+def count_queries(client, url, **extra):
+    """Number of queries a cold (uncached) GET of ``url`` runs"""
+    for cache in caches.all():
+        cache.clear()
+    tenant_cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, **extra)
+    assert response.status_code == 200, response.content
+    return len(context.captured_queries)
+
+
+def assert_constant_queries(client, url, add_rows, counts=(1, 5), **extra):
+    """
+    Assert that listing ``url`` runs the same number of queries whatever the
+    number of rows. ``add_rows(n)`` must create ``n`` more rows visible at
+    ``url``; ``extra`` is passed to ``client.get`` (e.g. tenant headers).
+    """
+    measured = []
+    total = 0
+    for count in counts:
+        add_rows(count - total)
+        total = count
+        measured.append(count_queries(client, url, **extra))
+    assert len(set(measured)) == 1, f'{url}: query count grows with rows {dict(zip(counts, measured))}'
+    return measured[0]
@@ -16,4 +16,4 @@ class BookmarkAdmin(admin.ModelAdmin):
 @admin.register(PlayHistory)
 class PlayHistoryAdmin(admin.ModelAdmin):
     list_display = ('user', 'chapter_audio', 'last_position', 'updated_at')
-    list_filter = ('chapter_audio__chapter__book__tenant', 'updated_at')
\ No newline at end of file
+    list_filter = ('chapter_audio__tenant', 'updated_at')
\ No newline at end of file
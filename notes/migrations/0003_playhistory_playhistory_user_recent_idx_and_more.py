@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio', '0004_audiotimestamp_timestamp_audio_start_idx_and_more'),
+        ('books', '0004_chapter_chapter_tenant_book_num_idx_and_more'),
+        ('notes', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='playhistory',
+            index=models.Index(fields=['user', '-updated_at'], name='playhistory_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usernote',
+            index=models.Index(fields=['user', 'book'], name='usernote_user_book_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_playhistory_playhistory_user_recent_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playhistory',
+            name='position_at',
+            field=models.DateTimeField(blank=True, help_text='When the player reported last_position', null=True),
+        ),
+    ]
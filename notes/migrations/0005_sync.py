@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0005_bookpage'),
+        ('core', '0002_job'),
+        ('notes', '0004_playhistory_position_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('note', 'Note'), ('bookmark', 'Bookmark')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('client_id', models.UUIDField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='bookmark',
+            name='client_id',
+            field=models.UUIDField(blank=True, help_text='Id generated by an offline client (see notes.sync)', null=True),
+        ),
+        migrations.AddField(
+            model_name='bookmark',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='usernote',
+            name='client_id',
+            field=models.UUIDField(blank=True, help_text='Id generated by an offline client (see notes.sync)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='bookmark',
+            index=models.Index(fields=['user', 'updated_at'], name='bookmark_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usernote',
+            index=models.Index(fields=['user', 'updated_at'], name='usernote_user_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookmark',
+            constraint=models.UniqueConstraint(fields=('user', 'client_id'), name='bookmark_user_client_id_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='usernote',
+            constraint=models.UniqueConstraint(fields=('user', 'client_id'), name='usernote_user_client_id_uniq'),
+        ),
+        migrations.AddField(
+            model_name='synctombstone',
+            name='tenant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='synctombstone',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['user', 'deleted_at'], name='synctombstone_user_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:12
+
+import django.db.models.manager
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_sync'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='bookmark',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='playhistory',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='synctombstone',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='usernote',
+            managers=[
+                ('unscoped', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
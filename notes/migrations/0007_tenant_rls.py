@@ -0,0 +1,18 @@
+from django.db import migrations
+from core.rls import TenantRLS
+
+
+class Migration(migrations.Migration):
+    """Row-level security policies for the optional TENANT_RLS mode (PostgreSQL only, see core.rls)"""
+
+    dependencies = [
+        ('notes', '0006_tenant_managers'),
+        ('audio', '0009_tenant_rls'),
+    ]
+
+    operations = [
+        TenantRLS('synctombstone'),
+        TenantRLS('usernote', parent='book'),
+        TenantRLS('bookmark', parent='book'),
+        TenantRLS('playhistory', parent='chapter_audio'),
+    ]
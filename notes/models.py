@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from books.models import Book, Chapter, Verse
 from audio.models import ChapterAudio
+from core.models import Tenant, TenantManager, UnscopedTenantManager
 
 User = settings.AUTH_USER_MODEL
 
@@ -12,11 +13,23 @@ class UserNote(models.Model):
     verse = models.ForeignKey(Verse, on_delete=models.SET_NULL, null=True, blank=True, related_name="notes")
     page_number = models.PositiveIntegerField(null=True, blank=True, help_text="Optional, relevant for structured texts like Quran")
     note_text = models.TextField()
+    client_id = models.UUIDField(null=True, blank=True, help_text="Id generated by an offline client (see notes.sync)")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    unscoped = UnscopedTenantManager()
+    objects = TenantManager()
+
     class Meta:
         unique_together = ('user', 'verse')  # Only enforce if verse exists
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client_id'], name='usernote_user_client_id_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'book'], name='usernote_user_book_idx'),
+            # Sync change feed
+            models.Index(fields=['user', 'updated_at'], name='usernote_user_updated_idx'),
+        ]
 
     def __str__(self):
         target = self.verse or self.chapter or self.book
@@ -29,10 +42,22 @@ class Bookmark(models.Model):
     chapter = models.ForeignKey(Chapter, on_delete=models.SET_NULL, null=True, blank=True)
     verse = models.ForeignKey(Verse, on_delete=models.SET_NULL, null=True, blank=True)
     page_number = models.PositiveIntegerField(null=True, blank=True)
+    client_id = models.UUIDField(null=True, blank=True, help_text="Id generated by an offline client (see notes.sync)")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    unscoped = UnscopedTenantManager()
+    objects = TenantManager()
 
     class Meta:
         unique_together = ('user', 'book', 'chapter', 'verse')
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client_id'], name='bookmark_user_client_id_uniq'),
+        ]
+        indexes = [
+            # Sync change feed
+            models.Index(fields=['user', 'updated_at'], name='bookmark_user_updated_idx'),
+        ]
 
     def __str__(self):
         target = self.verse or self.chapter or self.book
@@ -43,11 +68,47 @@ class PlayHistory(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="play_history")
     chapter_audio = models.ForeignKey(ChapterAudio, on_delete=models.CASCADE)
     last_position = models.FloatField(default=0.0, help_text="Seconds played")
+    position_at = models.DateTimeField(null=True, blank=True, help_text="When the player reported last_position")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    unscoped = UnscopedTenantManager()
+    objects = TenantManager()
+
     class Meta:
         unique_together = ('user', 'chapter_audio')
+        indexes = [
+            # Most recently played first ("continue listening")
+            models.Index(fields=['user', '-updated_at'], name='playhistory_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} played {self.chapter_audio}"
+
+
+class SyncTombstone(models.Model):
+    """
+    Record of a deleted note or bookmark, so the sync change feed can tell
+    offline clients to drop their copy (see notes.sync).
+    """
+    class Kind(models.TextChoices):
+        NOTE = 'note', 'Note'
+        BOOKMARK = 'bookmark', 'Bookmark'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="+", null=True, blank=True)
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    object_id = models.BigIntegerField()
+    client_id = models.UUIDField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    unscoped = UnscopedTenantManager()
+    objects = TenantManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='synctombstone_user_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} deleted {self.kind} {self.object_id}"
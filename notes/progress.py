@@ -0,0 +1,196 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from audio.models import ChapterAudio
+from core.content_cache import bump_content_version_on_commit
+from core.context import tenant_context
+from core.lru import LRUCache
+from .models import PlayHistory
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+_NOT_FOUND = object()
+
+
+def history_scope(user_id):
+    """Content version scope of a user's play history (see core.content_cache)"""
+    return f'history:{user_id}'
+
+
+class AudioTenantCache:
+    """
+    ChapterAudio id -> tenant id, so validating a progress report does not
+    query the database. Unknown ids are cached too; ChapterAudio saves and
+    deletes invalidate their entry (see ``notes.signals``).
+    """
+
+    def __init__(self, max_size=4096, timeout=300):
+        self._cache = LRUCache(max_size=max_size, timeout=timeout)
+
+    def get(self, chapter_audio_id):
+        """Tenant id of the chapter audio; raises ChapterAudio.DoesNotExist"""
+        tenant_id = self._cache.get(chapter_audio_id, _MISSING)
+        if tenant_id is _MISSING:
+            # Shared by all tenants: look past the current one (and its row-level security)
+            with tenant_context(None):
+                rows = list(ChapterAudio.unscoped.filter(id=chapter_audio_id).values_list('tenant_id', flat=True)[:1])
+            tenant_id = rows[0] if rows else _NOT_FOUND
+            self._cache.set(chapter_audio_id, tenant_id)
+        if tenant_id is _NOT_FOUND:
+            raise ChapterAudio.DoesNotExist(chapter_audio_id)
+        return tenant_id
+
+    def invalidate(self, chapter_audio_id):
+        self._cache.delete(chapter_audio_id)
+
+    def clear(self):
+        self._cache.clear()
+
+
+audio_tenants = AudioTenantCache()
+
+
+class ProgressBuffer:
+    """
+    In-process buffer of playback positions, flushed to PlayHistory in
+    batched upserts.
+
+    Reports are keyed by (user, chapter_audio); within the buffer and
+    against stored rows the report with the latest ``reported_at`` wins, so
+    retried or reordered reports never move a position backwards. A daemon
+    thread flushes every ``interval`` seconds (sooner once ``max_size``
+    entries are pending) and the process flushes once more at exit. Should
+    the thread fall behind or be lost (a forked worker does not inherit
+    it), the next report restarts it and is flushed by the request itself.
+    A killed process loses at most the reports of its last ``interval``.
+    With ``interval=0`` every report is written immediately.
+    """
+
+    def __init__(self, interval=None, max_size=None):
+        self.interval = interval if interval is not None else getattr(settings, 'PLAY_PROGRESS_FLUSH_INTERVAL', 5.0)
+        self.max_size = max_size or getattr(settings, 'PLAY_PROGRESS_BUFFER_SIZE', 5000)
+        self._reset()
+
+    def _reset(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._flushed_at = time.monotonic()
+
+    def add(self, user_id, chapter_audio_id, position, reported_at=None):
+        self._merge({(user_id, chapter_audio_id): (position, reported_at or timezone.now())})
+        if not self.interval:
+            self.flush()
+            return
+        self._start()
+        if len(self._pending) >= self.max_size:
+            self._wake.set()
+        if time.monotonic() - self._flushed_at > 2 * self.interval:
+            # The flush thread is not keeping up: bound the loss window here
+            self.flush()
+
+    def _merge(self, entries):
+        with self._lock:
+            for key, (position, reported_at) in entries.items():
+                current = self._pending.get(key)
+                if current is None or current[1] <= reported_at:
+                    self._pending[key] = (position, reported_at)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def flush(self):
+        """Write the pending positions; returns the number of rows written"""
+        with self._flush_lock:
+            self._flushed_at = time.monotonic()
+            with self._lock:
+                entries, self._pending = self._pending, {}
+            if not entries:
+                return 0
+            try:
+                return self._write(entries)
+            except Exception:
+                # Keep the positions for the next flush; newer reports still win
+                logger.exception('Flushing %d play positions failed', len(entries))
+                self._merge(entries)
+                return 0
+
+    def _write(self, entries):
+        audio_ids = {audio_id for _, audio_id in entries}
+        user_ids = {user_id for user_id, _ in entries}
+        # Entries span tenants, whichever request triggers the flush
+        with tenant_context(None), transaction.atomic():
+            # Reports for rows deleted meanwhile would fail the whole batch
+            audio_tenant_ids = dict(ChapterAudio.unscoped.filter(id__in=audio_ids).values_list('id', 'tenant_id'))
+            user_ids = set(get_user_model().objects.filter(id__in=user_ids).values_list('id', flat=True))
+            stored = {
+                (user_id, audio_id): reported_at
+                for user_id, audio_id, reported_at in PlayHistory.unscoped.select_for_update()
+                .filter(user_id__in=user_ids, chapter_audio_id__in=audio_tenant_ids)
+                .values_list('user_id', 'chapter_audio_id', 'position_at')
+            }
+            rows = [
+                PlayHistory(user_id=user_id, chapter_audio_id=audio_id, last_position=position, position_at=reported_at)
+                for (user_id, audio_id), (position, reported_at) in entries.items()
+                if user_id in user_ids and audio_id in audio_tenant_ids
+                and (stored.get((user_id, audio_id)) is None or stored[user_id, audio_id] <= reported_at)
+            ]
+            PlayHistory.unscoped.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['user', 'chapter_audio'],
+                update_fields=['last_position', 'position_at', 'updated_at'],
+            )
+            for tenant_id, user_id in {(audio_tenant_ids[row.chapter_audio_id], row.user_id) for row in rows}:
+                bump_content_version_on_commit(tenant_id, history_scope(user_id))
+        return len(rows)
+
+    def _start(self):
+        if self._stopped.is_set() or self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._flushed_at = time.monotonic()
+                self._thread = threading.Thread(target=self._run, name='play-progress-flush', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        from django.db import connection
+        try:
+            while not self._stopped.is_set():
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                self.flush()
+        finally:
+            connection.close()
+
+    def stop(self):
+        """Stop the flush thread and write what is still pending"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+        self.flush()
+
+    def after_fork(self):
+        """
+        Start over in a forked child: the parent's flush thread is not
+        running there, and the parent writes the positions it buffered.
+        """
+        self._reset()
+
+
+progress_buffer = ProgressBuffer()
+atexit.register(progress_buffer.stop)
+os.register_at_fork(after_in_child=progress_buffer.after_fork)
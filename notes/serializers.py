@@ -1,5 +1,10 @@
+from django.utils import timezone
 from rest_framework import serializers
+from audio.models import ChapterAudio, Reciter
+from books.models import Book, Chapter
+from core.middleware import get_current_tenant
 from .models import UserNote, Bookmark, PlayHistory
+from .progress import audio_tenants
 
 
 class UserNoteSerializer(serializers.ModelSerializer):
@@ -16,7 +21,64 @@ class PlayHistorySerializer(serializers.ModelSerializer):
     class Meta:
         model = PlayHistory
         fields = '__all__'
-        read_only_fields = ['user']
-    
+        read_only_fields = ['user', 'position_at']
 
 
+class PlayProgressSerializer(serializers.Serializer):
+    """A playback position report; ``at`` is when the player recorded it"""
+    chapter_audio = serializers.IntegerField(min_value=1)
+    position = serializers.FloatField(min_value=0)
+    at = serializers.DateTimeField(required=False)
+
+    def validate_chapter_audio(self, value):
+        # Without a tenant no chapter audio is visible, as with the scoped managers
+        tenant = get_current_tenant()
+        try:
+            tenant_id = audio_tenants.get(value)
+        except ChapterAudio.DoesNotExist:
+            raise serializers.ValidationError('Unknown chapter audio.')
+        if tenant is None or tenant_id != tenant.id:
+            raise serializers.ValidationError('Unknown chapter audio.')
+        return value
+
+    def validate_at(self, value):
+        # Clock skew must not let a report win over every later one
+        return min(value, timezone.now())
+
+
+class RecentBookSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Book
+        fields = ['id', 'title']
+
+
+class RecentChapterSerializer(serializers.ModelSerializer):
+    book = RecentBookSerializer(read_only=True)
+
+    class Meta:
+        model = Chapter
+        fields = ['id', 'number', 'title', 'book']
+
+
+class RecentReciterSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Reciter
+        fields = ['id', 'name']
+
+
+class RecentAudioSerializer(serializers.ModelSerializer):
+    chapter = RecentChapterSerializer(read_only=True)
+    reciter = RecentReciterSerializer(read_only=True)
+
+    class Meta:
+        model = ChapterAudio
+        fields = ['id', 'chapter', 'reciter', 'external_url', 'file', 'duration_seconds']
+
+
+class RecentPlaySerializer(serializers.ModelSerializer):
+    """A "continue listening" entry with its audio, chapter, book and reciter"""
+    chapter_audio = RecentAudioSerializer(read_only=True)
+
+    class Meta:
+        model = PlayHistory
+        fields = ['id', 'chapter_audio', 'last_position', 'updated_at']
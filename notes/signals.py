@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from audio.models import ChapterAudio
+from core.content_cache import bump_content_version_on_commit
+from core.models import Tenant
+from .models import Bookmark, PlayHistory, UserNote
+from .progress import audio_tenants, history_scope
+from .sync import record_deletion
+
+
+@receiver(post_save, sender=ChapterAudio)
+@receiver(post_delete, sender=ChapterAudio)
+def invalidate_audio_tenant(sender, instance, **kwargs):
+    audio_tenants.invalidate(instance.id)
+
+
+@receiver(post_save, sender=PlayHistory)
+@receiver(post_delete, sender=PlayHistory)
+def bump_history_version(sender, instance, **kwargs):
+    """Invalidate the user's cached recent history"""
+    try:
+        tenant_id = audio_tenants.get(instance.chapter_audio_id)
+    except ChapterAudio.DoesNotExist:
+        # Deleted with its audio, whose own signal bumps the audio content
+        return
+    bump_content_version_on_commit(tenant_id, history_scope(instance.user_id))
+
+
+@receiver(post_delete, sender=UserNote)
+@receiver(post_delete, sender=Bookmark)
+def record_sync_tombstone(sender, instance, origin=None, **kwargs):
+    """Let offline clients know about the deletion (see notes.sync)"""
+    # Deleting the user or tenant removes their tombstones as well
+    if issubclass(getattr(origin, 'model', type(origin)), (get_user_model(), Tenant)):
+        return
+    record_deletion(instance)
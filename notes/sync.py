@@ -0,0 +1,389 @@
+"""
+Offline sync of notes and bookmarks.
+
+Clients push batches of create/update/delete operations, addressed by a
+client-generated UUID (``client_id``) or the server id, and pull a change
+feed ordered by ``(updated_at, source, id)`` from an opaque cursor.
+Deletions reach the feed through SyncTombstone rows.
+"""
+import base64
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
+from books.models import Book, Chapter, Verse
+from .models import Bookmark, SyncTombstone, UserNote
+from .serializers import BookmarkSerializer, UserNoteSerializer
+
+RELATION_FIELDS = ('book', 'chapter', 'verse')
+NO_TENANT_MESSAGE = 'Syncing requires a tenant.'
+
+
+class SyncError(Exception):
+    """The batch cannot be applied as a whole"""
+
+
+class NoteDataSerializer(serializers.Serializer):
+    book = serializers.IntegerField()
+    chapter = serializers.IntegerField(allow_null=True, required=False)
+    verse = serializers.IntegerField(allow_null=True, required=False)
+    page_number = serializers.IntegerField(min_value=0, allow_null=True, required=False)
+    note_text = serializers.CharField()
+
+
+class BookmarkDataSerializer(serializers.Serializer):
+    book = serializers.IntegerField()
+    chapter = serializers.IntegerField(allow_null=True, required=False)
+    verse = serializers.IntegerField(allow_null=True, required=False)
+    page_number = serializers.IntegerField(min_value=0, allow_null=True, required=False)
+
+
+class SyncKind:
+    """How one synced model is validated, written and serialized"""
+
+    def __init__(self, name, model, data_serializer, serializer, unique_fields):
+        self.name = name
+        self.model = model
+        self.data_serializer = data_serializer
+        self.serializer = serializer
+        # The model's unique_together columns besides ``user``
+        self.unique_fields = unique_fields
+        self.fields = list(data_serializer().fields)
+
+    def unique_key(self, values):
+        key = tuple(values.get(field) for field in self.unique_fields)
+        # NULLs never collide in a unique constraint
+        return None if None in key else key
+
+
+KINDS = {
+    'note': SyncKind('note', UserNote, NoteDataSerializer, UserNoteSerializer, ('verse',)),
+    'bookmark': SyncKind('bookmark', Bookmark, BookmarkDataSerializer, BookmarkSerializer, ('book', 'chapter', 'verse')),
+}
+
+
+class SyncOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=['create', 'update', 'delete'])
+    type = serializers.ChoiceField(choices=sorted(KINDS))
+    id = serializers.IntegerField(required=False)
+    client_id = serializers.UUIDField(required=False)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs):
+        if attrs['op'] == 'create' and 'client_id' not in attrs:
+            raise serializers.ValidationError('A create needs a client_id.')
+        if 'id' not in attrs and 'client_id' not in attrs:
+            raise serializers.ValidationError('Pass an id or a client_id.')
+        return attrs
+
+
+# Deletions recorded while batched_tombstones() is active in this thread
+_batch = threading.local()
+
+
+@contextmanager
+def batched_tombstones():
+    """Collect the tombstones of the deletions in the block and write them with one insert"""
+    _batch.pending = []
+    try:
+        yield
+        write_tombstones(_batch.pending)
+    finally:
+        del _batch.pending
+
+
+def record_deletion(instance):
+    """Write the tombstone of a deleted note or bookmark (queued inside batched_tombstones())"""
+    # Captured now: the deletion clears the instance's pk afterwards
+    tombstone = SyncTombstone(
+        user_id=instance.user_id,
+        kind=SyncTombstone.Kind.NOTE if isinstance(instance, UserNote) else SyncTombstone.Kind.BOOKMARK,
+        object_id=instance.pk,
+        client_id=instance.client_id,
+    )
+    pending = getattr(_batch, 'pending', None)
+    if pending is None:
+        write_tombstones([(instance.book_id, tombstone)])
+    else:
+        pending.append((instance.book_id, tombstone))
+
+
+def write_tombstones(entries):
+    """Insert ``(book_id, tombstone)`` entries, taking each tenant from the book"""
+    if not entries:
+        return
+    tenants = dict(Book.unscoped.filter(id__in={book_id for book_id, _ in entries}).values_list('id', 'tenant_id'))
+    for book_id, tombstone in entries:
+        tombstone.tenant_id = tenants.get(book_id)
+    SyncTombstone.unscoped.bulk_create([tombstone for _, tombstone in entries])
+
+
+class SyncBatch:
+    """
+    Apply validated operations for ``user`` within ``tenant``.
+
+    The addressed rows, the referenced books/chapters/verses and the rows
+    that could collide with a unique constraint are loaded up front with a
+    few set-based queries. Operations are then resolved in order in memory
+    (a create followed by an update of the same client_id becomes a single
+    insert; replaying a create updates the row it created) and written in
+    one transaction with one bulk delete, update and insert per model.
+    """
+
+    def __init__(self, user, tenant):
+        if tenant is None:
+            # Fail closed: without a tenant no book is visible
+            raise PermissionDenied(NO_TENANT_MESSAGE)
+        self.user = user
+        self.tenant = tenant
+
+    def apply(self, operations):
+        self._load(operations)
+        results = [self._apply(operation) for operation in operations]
+        try:
+            with transaction.atomic():
+                self._write()
+        except IntegrityError as exc:
+            raise SyncError(f'The operations conflict: {exc}')
+        for result, obj in results:
+            if obj is not None:
+                result['id'] = obj.pk
+        return [result for result, _ in results]
+
+    def _load(self, operations):
+        addressed = {name: (set(), set()) for name in KINDS}
+        refs = {field: set() for field in RELATION_FIELDS}
+        for operation in operations:
+            ids, client_ids = addressed[operation['type']]
+            if 'id' in operation:
+                ids.add(operation['id'])
+            if 'client_id' in operation:
+                client_ids.add(operation['client_id'])
+            for field in RELATION_FIELDS:
+                if isinstance(operation['data'].get(field), int):
+                    refs[field].add(operation['data'][field])
+
+        in_tenant = {'book__tenant': self.tenant}
+        self.rows = {name: {} for name in KINDS}
+        self.by_client_id = {name: {} for name in KINDS}
+        self.unique = {name: {} for name in KINDS}
+        for name, kind in KINDS.items():
+            ids, client_ids = addressed[name]
+            if ids or client_ids:
+                for obj in kind.model.unscoped.filter(user=self.user, **in_tenant).filter(Q(id__in=ids) | Q(client_id__in=client_ids)):
+                    self._track(kind, obj)
+                    # Partial updates are checked against the relations they keep
+                    for field, value in self._values(obj).items():
+                        if value is not None:
+                            refs[field].add(value)
+        # Other rows that may share a unique key: same verse (notes) or book (bookmarks)
+        for kind, field in ((KINDS['note'], 'verse'), (KINDS['bookmark'], 'book')):
+            if refs[field]:
+                candidates = kind.model.unscoped.filter(user=self.user, **{f'{field}__in': refs[field]})
+                for obj in candidates.exclude(id__in=self.rows[kind.name]):
+                    self._index_unique(kind, obj)
+
+        tenant = {'tenant': self.tenant}
+        self.books = set(Book.unscoped.filter(id__in=refs['book'], **tenant).values_list('id', flat=True)) if refs['book'] else set()
+        self.chapters = dict(Chapter.unscoped.filter(id__in=refs['chapter'], **tenant).values_list('id', 'book_id')) if refs['chapter'] else {}
+        self.verses = {
+            verse_id: (book_id, chapter_id)
+            for verse_id, book_id, chapter_id in Verse.unscoped.filter(id__in=refs['verse'], **tenant).values_list('id', 'book_id', 'chapter_id')
+        } if refs['verse'] else {}
+
+        self.creates = {name: {} for name in KINDS}
+        self.updates = {name: {} for name in KINDS}
+        self.deletes = {name: [] for name in KINDS}
+
+    def _values(self, obj):
+        return {field: getattr(obj, f'{field}_id') for field in RELATION_FIELDS}
+
+    def _index_unique(self, kind, obj):
+        key = kind.unique_key(self._values(obj))
+        if key is not None:
+            self.unique[kind.name][key] = obj
+
+    def _track(self, kind, obj):
+        if obj.pk is not None:
+            self.rows[kind.name][obj.pk] = obj
+        if obj.client_id is not None:
+            self.by_client_id[kind.name][obj.client_id] = obj
+        self._index_unique(kind, obj)
+
+    def _forget(self, kind, obj):
+        self.rows[kind.name].pop(obj.pk, None)
+        self.by_client_id[kind.name].pop(obj.client_id, None)
+        key = kind.unique_key(self._values(obj))
+        if key is not None and self.unique[kind.name].get(key) is obj:
+            del self.unique[kind.name][key]
+
+    def _find(self, kind, operation):
+        if 'id' in operation:
+            return self.rows[kind.name].get(operation['id'])
+        return self.by_client_id[kind.name].get(operation['client_id'])
+
+    def _apply(self, operation):
+        kind = KINDS[operation['type']]
+        client_id = operation.get('client_id')
+        result = {'type': kind.name, 'client_id': str(client_id) if client_id else None, 'id': operation.get('id')}
+        obj = self._find(kind, operation)
+
+        if operation['op'] == 'delete':
+            if obj is None:
+                result['status'] = 'not_found'
+                return result, None
+            self._forget(kind, obj)
+            if obj.pk is None:
+                del self.creates[kind.name][id(obj)]
+            else:
+                self.updates[kind.name].pop(obj.pk, None)
+                self.deletes[kind.name].append(obj.pk)
+            result.update(status='deleted', id=obj.pk)
+            return result, None
+        if operation['op'] == 'update' and obj is None:
+            result['status'] = 'not_found'
+            return result, None
+
+        data = kind.data_serializer(data=operation['data'], partial=obj is not None)
+        if not data.is_valid():
+            result.update(status='invalid', errors=data.errors)
+            return result, obj
+        values = {**(self._values(obj) if obj is not None else {}), **data.validated_data}
+        errors = self._check_relations(values)
+        key = kind.unique_key(values)
+        if not errors and key is not None and self.unique[kind.name].get(key, obj) is not obj:
+            errors = {'non_field_errors': [f'Another {kind.name} exists for this target.'], 'conflict_id': self.unique[kind.name][key].pk}
+        if errors:
+            result.update(status='invalid', errors=errors)
+            return result, obj
+
+        if obj is None:
+            obj = kind.model(user=self.user, client_id=client_id)
+            self.creates[kind.name][id(obj)] = obj
+            result['status'] = 'created'
+        else:
+            self._forget(kind, obj)
+            if obj.pk is not None:
+                self.updates[kind.name][obj.pk] = obj
+            result['status'] = 'updated' if obj.pk is not None else 'created'
+        for field, value in data.validated_data.items():
+            setattr(obj, f'{field}_id' if field in RELATION_FIELDS else field, value)
+        self._track(kind, obj)
+        return result, obj
+
+    def _check_relations(self, values):
+        book, chapter, verse = (values.get(field) for field in RELATION_FIELDS)
+        errors = {}
+        if book not in self.books:
+            errors['book'] = ['Invalid book.']
+        if chapter is not None and self.chapters.get(chapter) != book:
+            errors['chapter'] = ['Invalid chapter for this book.']
+        if verse is not None:
+            verse_book, verse_chapter = self.verses.get(verse, (None, None))
+            if verse_book != book or (chapter is not None and verse_chapter != chapter):
+                errors['verse'] = ['Invalid verse for this book and chapter.']
+        return errors
+
+    def _write(self):
+        now = timezone.now()
+        with batched_tombstones():
+            for name, ids in self.deletes.items():
+                if ids:
+                    KINDS[name].model.unscoped.filter(id__in=ids).delete()
+        for name, objs in self.updates.items():
+            if objs:
+                for obj in objs.values():
+                    obj.updated_at = now
+                KINDS[name].model.unscoped.bulk_update(list(objs.values()), [*KINDS[name].fields, 'updated_at'])
+        for name, objs in self.creates.items():
+            if objs:
+                KINDS[name].model.unscoped.bulk_create(list(objs.values()))
+
+
+# Feed sources, in their order among rows changed at the same instant
+FEED_SOURCES = ('note', 'bookmark', 'deleted')
+
+
+def encode_cursor(position):
+    moment, source, row_id = position
+    payload = json.dumps([moment.isoformat(), source, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """``(moment, source, id)`` of a cursor; raises ValueError if it is malformed"""
+    try:
+        moment, source, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        moment = datetime.fromisoformat(moment)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(source, int) or not isinstance(row_id, int) or timezone.is_naive(moment):
+        raise ValueError('Invalid cursor')
+    return moment, source, row_id
+
+
+def _after(queryset, time_field, source, position):
+    """Rows of ``source`` strictly after ``position`` in (time, source, id) order"""
+    if position is None:
+        return queryset
+    moment, cursor_source, row_id = position
+    if source < cursor_source:
+        return queryset.filter(**{f'{time_field}__gt': moment})
+    if source > cursor_source:
+        return queryset.filter(**{f'{time_field}__gte': moment})
+    return queryset.filter(Q(**{f'{time_field}__gt': moment}) | Q(**{time_field: moment, 'id__gt': row_id}))
+
+
+def changes_since(user, tenant, cursor=None, limit=None):
+    """
+    Notes, bookmarks and deletions of ``user`` changed after ``cursor``, as
+    ``(changes, next_cursor, has_more)``.
+
+    Rows changed in the last ``SYNC_SETTLE_SECONDS`` are held back until
+    the transactions that wrote them have surely committed, so a row can
+    never commit behind a cursor that was already handed out.
+    """
+    if tenant is None:
+        raise PermissionDenied(NO_TENANT_MESSAGE)
+    limit = limit or settings.SYNC_PAGE_SIZE
+    position = decode_cursor(cursor) if cursor else None
+    until = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    in_tenant = {'book__tenant': tenant}
+    sources = (
+        (KINDS['note'].model.unscoped.filter(user=user, **in_tenant), 'updated_at'),
+        (KINDS['bookmark'].model.unscoped.filter(user=user, **in_tenant), 'updated_at'),
+        (SyncTombstone.unscoped.filter(user=user, tenant=tenant), 'deleted_at'),
+    )
+    rows = []
+    for source, (queryset, time_field) in enumerate(sources):
+        queryset = _after(queryset.filter(**{f'{time_field}__lte': until}), time_field, source, position)
+        rows.extend(
+            (getattr(row, time_field), source, row.id, row)
+            for row in queryset.order_by(time_field, 'id')[:limit + 1]
+        )
+    rows.sort(key=lambda row: row[:3])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = []
+    for _, source, row_id, row in rows:
+        if FEED_SOURCES[source] == 'deleted':
+            changes.append({'type': row.kind, 'op': 'delete', 'id': row.object_id, 'client_id': row.client_id and str(row.client_id)})
+        else:
+            kind = KINDS[FEED_SOURCES[source]]
+            changes.append({
+                'type': kind.name, 'op': 'upsert', 'id': row_id,
+                'client_id': row.client_id and str(row.client_id), 'data': kind.serializer(row).data,
+            })
+    # Once caught up, everything up to ``until`` has been seen
+    if has_more:
+        next_position = rows[-1][:3]
+    else:
+        next_position = max(position or (until,), (until, len(FEED_SOURCES), 0))
+    return changes, encode_cursor(next_position), has_more
@@ -0,0 +1,170 @@
+from datetime import timedelta
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+from audio.tests.factories import ChapterAudioFactory
+from notes.models import PlayHistory
+from notes.progress import ProgressBuffer, progress_buffer
+from notes.tests.factories import PlayHistoryFactory
+from users.tests.factories import UserFactory
+
+
+@pytest.mark.django_db
+class TestProgressBuffer:
+    """
+    Tests for buffering and batched writing of playback positions.
+    """
+
+    def test_flush_writes_latest_report(self, django_assert_max_num_queries):
+        """
+        Test that repeated reports coalesce into one upsert per (user, audio).
+        """
+        buffer = ProgressBuffer(interval=3600)
+        user = UserFactory()
+        audios = ChapterAudioFactory.create_batch(2)
+        now = timezone.now()
+        PlayHistoryFactory(user=user, chapter_audio=audios[0], last_position=1)
+        for second in range(10):
+            buffer.add(user.id, audios[0].id, float(second), now + timedelta(seconds=second))
+            buffer.add(user.id, audios[1].id, float(second) * 2, now + timedelta(seconds=second))
+        # An older report arriving late does not win
+        buffer.add(user.id, audios[0].id, 0.0, now)
+        assert not PlayHistory.objects.filter(last_position__gt=1).exists()
+
+        with django_assert_max_num_queries(6):
+            assert buffer.flush() == 2
+        assert len(buffer) == 0
+        positions = dict(PlayHistory.objects.filter(user=user).values_list('chapter_audio_id', 'last_position'))
+        assert positions == {audios[0].id: 9.0, audios[1].id: 18.0}
+        buffer.stop()
+
+    def test_stale_reports_do_not_overwrite(self):
+        """
+        Test that a report older than the stored one is dropped (another process wrote later).
+        """
+        user = UserFactory()
+        audio = ChapterAudioFactory()
+        now = timezone.now()
+        PlayHistoryFactory(user=user, chapter_audio=audio, last_position=50, position_at=now)
+
+        buffer = ProgressBuffer(interval=3600)
+        buffer.add(user.id, audio.id, 10.0, now - timedelta(seconds=5))
+        assert buffer.flush() == 0
+        assert PlayHistory.objects.get(user=user).last_position == 50
+        buffer.stop()
+
+    def test_deleted_audio_does_not_break_batch(self):
+        """
+        Test that reports for deleted audios are dropped while the rest are written.
+        """
+        user = UserFactory()
+        kept, deleted = ChapterAudioFactory.create_batch(2)
+        buffer = ProgressBuffer(interval=3600)
+        buffer.add(user.id, kept.id, 5.0)
+        buffer.add(user.id, deleted.id, 5.0)
+        deleted.delete()
+
+        assert buffer.flush() == 1
+        assert list(PlayHistory.objects.values_list('chapter_audio_id', flat=True)) == [kept.id]
+        buffer.stop()
+
+    def test_stop_flushes_pending(self):
+        """
+        Test that stopping (as at process exit) writes what is pending.
+        """
+        user = UserFactory()
+        audio = ChapterAudioFactory()
+        buffer = ProgressBuffer(interval=3600)
+        buffer.add(user.id, audio.id, 42.0)
+        buffer.stop()
+        assert PlayHistory.objects.get(user=user).last_position == 42.0
+
+    def test_lost_thread_does_not_hold_reports(self, monkeypatch):
+        """
+        Test that without a working flush thread (as in a forked worker) a
+        report older than two intervals is written by the next add, and the
+        thread is started again.
+        """
+        user = UserFactory()
+        audio = ChapterAudioFactory()
+        buffer = ProgressBuffer(interval=60)
+        buffer.after_fork()
+        assert buffer._thread is None
+
+        buffer.add(user.id, audio.id, 2.0)
+        assert buffer._thread.is_alive()
+        assert not PlayHistory.objects.exists()
+
+        monkeypatch.setattr(buffer, '_flushed_at', buffer._flushed_at - 121)
+        buffer.add(user.id, audio.id, 3.0)
+        assert PlayHistory.objects.get(user=user).last_position == 3.0
+        buffer.stop()
+
+
+@pytest.mark.django_db
+class TestProgressEndpoint:
+    """
+    Tests for POST /api/v1/notes/history/progress/.
+    """
+
+    URL = '/api/v1/notes/history/progress/'
+
+    @pytest.fixture(autouse=True)
+    def write_through(self, monkeypatch):
+        monkeypatch.setattr(progress_buffer, 'interval', 0)
+
+    def client_for(self, user, tenant):
+        client = APIClient()
+        client.force_authenticate(user)
+        client.credentials(HTTP_X_TENANT_ID=str(tenant.id))
+        return client
+
+    def test_single_and_batch_reports(self):
+        """
+        Test that reports are accepted with 202 and upserted without unique errors.
+        """
+        user = UserFactory()
+        audio, other = ChapterAudioFactory(), ChapterAudioFactory()
+        other.chapter.book.tenant = audio.tenant
+        other.chapter.book.save()
+        client = self.client_for(user, audio.tenant)
+
+        response = client.post(self.URL, {'chapter_audio': audio.id, 'position': 12.5}, format='json')
+        assert response.status_code == 202
+        response = client.post(self.URL, [
+            {'chapter_audio': audio.id, 'position': 20},
+            {'chapter_audio': other.id, 'position': 3},
+        ], format='json')
+        assert response.status_code == 202
+        assert response.json() == {'accepted': 2}
+        positions = dict(PlayHistory.objects.filter(user=user).values_list('chapter_audio_id', 'last_position'))
+        assert positions == {audio.id: 20.0, other.id: 3.0}
+
+    def test_rejects_other_tenant_and_invalid_reports(self):
+        """
+        Test that audios of another tenant, unknown audios and negative positions are rejected.
+        """
+        user = UserFactory()
+        audio, foreign = ChapterAudioFactory(), ChapterAudioFactory()
+        client = self.client_for(user, audio.tenant)
+
+        for payload in (
+            {'chapter_audio': foreign.id, 'position': 1},
+            {'chapter_audio': 999999, 'position': 1},
+            {'chapter_audio': audio.id, 'position': -1},
+        ):
+            assert client.post(self.URL, payload, format='json').status_code == 400
+        assert not PlayHistory.objects.exists()
+
+    def test_rejects_reports_without_tenant(self):
+        """
+        Test that a request naming no tenant cannot record progress for any
+        tenant's audio.
+        """
+        user = UserFactory()
+        audio = ChapterAudioFactory()
+        client = APIClient()
+        client.force_authenticate(user)
+
+        assert client.post(self.URL, {'chapter_audio': audio.id, 'position': 1}, format='json').status_code == 400
+        assert not PlayHistory.objects.exists()
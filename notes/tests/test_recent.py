@@ -0,0 +1,82 @@
+from datetime import timedelta
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+from audio.tests.factories import ChapterAudioFactory
+from core.tests.utils import assert_constant_queries
+from notes.models import PlayHistory
+from notes.progress import ProgressBuffer
+from notes.tests.factories import PlayHistoryFactory
+from users.tests.factories import UserFactory
+
+URL = '/api/v1/notes/history/recent/'
+
+
+@pytest.mark.django_db
+class TestRecentHistory:
+    """
+    Tests for the "continue listening" endpoint.
+    """
+
+    def setup_method(self):
+        self.user = UserFactory()
+        self.audio = ChapterAudioFactory()
+        self.tenant = self.audio.tenant
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.credentials(HTTP_X_TENANT_ID=str(self.tenant.id))
+
+    def add_history(self, user=None, **kwargs):
+        audio = ChapterAudioFactory(chapter__book=self.audio.chapter.book)
+        return PlayHistoryFactory(user=user or self.user, chapter_audio=audio, **kwargs)
+
+    def test_newest_first_with_details(self):
+        """
+        Test ordering, limit and the nested chapter, book and reciter.
+        """
+        entries = [self.add_history(last_position=index) for index in range(3)]
+        now = timezone.now()
+        for index, entry in enumerate(entries):
+            PlayHistory.objects.filter(id=entry.id).update(updated_at=now - timedelta(minutes=index))
+        self.add_history(user=UserFactory())
+
+        data = self.client.get(URL, {'limit': 2}).json()
+        assert [item['id'] for item in data] == [entries[0].id, entries[1].id]
+        audio = data[0]['chapter_audio']
+        assert audio['chapter']['book'] == {'id': self.audio.chapter.book.id, 'title': self.audio.chapter.book.title}
+        assert audio['reciter']['name'] == entries[0].chapter_audio.reciter.name
+        assert self.client.get(URL, {'limit': 0}).status_code == 400
+
+    def test_constant_queries(self):
+        """
+        Test that the entries are loaded with a fixed number of queries.
+        """
+        assert_constant_queries(
+            self.client, URL,
+            lambda count: [self.add_history() for _ in range(count)],
+            HTTP_X_TENANT_ID=str(self.tenant.id),
+        )
+
+    def test_cached_per_user_and_invalidated(self, django_capture_on_commit_callbacks, django_assert_num_queries):
+        """
+        Test that the response is cached per user and refreshed by writes and progress flushes.
+        """
+        with django_capture_on_commit_callbacks(execute=True):
+            entry = self.add_history(last_position=1)
+        assert self.client.get(URL).json()[0]['last_position'] == 1
+        with django_assert_num_queries(0):
+            assert self.client.get(URL).json()[0]['last_position'] == 1
+
+        other = APIClient()
+        other.force_authenticate(UserFactory())
+        assert other.get(URL, HTTP_X_TENANT_ID=str(self.tenant.id)).json() == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            entry.last_position = 5
+            entry.save()
+        assert self.client.get(URL).json()[0]['last_position'] == 5
+
+        buffer = ProgressBuffer(interval=0)
+        with django_capture_on_commit_callbacks(execute=True):
+            buffer.add(self.user.id, entry.chapter_audio_id, 9.0)
+        assert self.client.get(URL).json()[0]['last_position'] == 9
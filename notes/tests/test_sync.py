@@ -0,0 +1,137 @@
+import uuid
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from books.tests.factories import BookFactory, ChapterFactory, VerseFactory
+from notes.models import Bookmark, SyncTombstone, UserNote
+from notes.tests.factories import UserNoteFactory
+from users.tests.factories import UserFactory
+
+URL = '/api/v1/notes/sync/'
+
+
+@pytest.mark.django_db
+class TestSync:
+    """
+    Tests for the batch sync endpoint and the change feed.
+    """
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.SYNC_SETTLE_SECONDS = 0
+        self.user = UserFactory()
+        self.book = BookFactory()
+        self.chapter = ChapterFactory(book=self.book)
+        self.verses = [VerseFactory(book=self.book, chapter=self.chapter, number=number) for number in range(1, 31)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.credentials(HTTP_X_TENANT_ID=str(self.book.tenant_id))
+
+    def note_op(self, client_id, verse, text='text', op='create'):
+        return {'op': op, 'type': 'note', 'client_id': str(client_id), 'data': {
+            'book': self.book.id, 'chapter': self.chapter.id, 'verse': verse.id, 'note_text': text,
+        }}
+
+    def push(self, operations, cursor=None):
+        response = self.client.post(URL, {'operations': operations, 'cursor': cursor}, format='json')
+        assert response.status_code == 200, response.content
+        return response.json()
+
+    def test_apply_batch_and_replay(self):
+        """
+        Test creates, in-batch updates, deletes and that replaying the batch is idempotent.
+        """
+        note_id, bookmark_id = uuid.uuid4(), uuid.uuid4()
+        operations = [
+            self.note_op(note_id, self.verses[0], 'draft'),
+            {'op': 'update', 'type': 'note', 'client_id': str(note_id), 'data': {'note_text': 'final'}},
+            {'op': 'create', 'type': 'bookmark', 'client_id': str(bookmark_id), 'data': {'book': self.book.id, 'page_number': 3}},
+        ]
+        results = self.push(operations)['results']
+        assert [result['status'] for result in results] == ['created', 'created', 'created']
+        note = UserNote.objects.get(user=self.user)
+        assert note.note_text == 'final' and note.client_id == note_id
+        assert results[0]['id'] == results[1]['id'] == note.id
+
+        results = self.push(operations)['results']
+        assert [result['status'] for result in results] == ['updated', 'updated', 'updated']
+        assert UserNote.objects.count() == 1 and Bookmark.objects.count() == 1
+
+        results = self.push([
+            {'op': 'delete', 'type': 'bookmark', 'client_id': str(bookmark_id)},
+            {'op': 'delete', 'type': 'bookmark', 'client_id': str(bookmark_id)},
+        ])['results']
+        assert [result['status'] for result in results] == ['deleted', 'not_found']
+        assert not Bookmark.objects.exists()
+        assert SyncTombstone.objects.get().client_id == bookmark_id
+
+    def test_invalid_items_do_not_block_batch(self):
+        """
+        Test per-item errors for foreign verses and unique conflicts.
+        """
+        existing = UserNoteFactory(user=self.user, book=self.book, chapter=self.chapter, verse=self.verses[0])
+        foreign = VerseFactory()
+        results = self.push([
+            self.note_op(uuid.uuid4(), self.verses[0]),
+            self.note_op(uuid.uuid4(), foreign),
+            {'op': 'update', 'type': 'note', 'id': 999999, 'data': {'note_text': 'x'}},
+            self.note_op(uuid.uuid4(), self.verses[1]),
+        ])['results']
+        assert [result['status'] for result in results] == ['invalid', 'invalid', 'not_found', 'created']
+        assert results[0]['errors']['conflict_id'] == existing.id
+        assert 'verse' in results[1]['errors']
+        assert UserNote.objects.count() == 2
+
+    def test_constant_queries(self):
+        """
+        Test that a push runs the same number of queries for 2 and 20 operations.
+        """
+        self.client.get(URL)
+        counts = []
+        for verses in (self.verses[:2], self.verses[2:22]):
+            with CaptureQueriesContext(connection) as context:
+                self.push([self.note_op(uuid.uuid4(), verse) for verse in verses])
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1]
+
+    def test_change_feed(self):
+        """
+        Test paging through the feed, then receiving only later changes and deletions.
+        """
+        notes = [UserNoteFactory(user=self.user, book=self.book, verse=verse) for verse in self.verses[:5]]
+        UserNoteFactory(verse=self.verses[5], book=self.book)
+
+        seen, cursor = [], None
+        while True:
+            data = self.client.get(URL, {'cursor': cursor or '', 'limit': 2}).json()
+            seen += [change['id'] for change in data['changes']]
+            cursor = data['cursor']
+            if not data['has_more']:
+                break
+        assert seen == [note.id for note in notes]
+        assert self.client.get(URL, {'cursor': cursor}).json()['changes'] == []
+
+        notes[1].note_text = 'edited'
+        notes[1].save()
+        deleted_id = notes[2].id
+        notes[2].delete()
+        changes = self.client.get(URL, {'cursor': cursor}).json()['changes']
+        assert [(change['op'], change['id']) for change in changes] == [('upsert', notes[1].id), ('delete', deleted_id)]
+        assert changes[0]['data']['note_text'] == 'edited'
+
+        assert self.client.get(URL, {'cursor': 'bogus'}).status_code == 400
+
+    def test_requires_tenant(self):
+        """
+        Test that without a tenant nothing is pushed or pulled, rather than
+        rows of every tenant.
+        """
+        UserNoteFactory(user=self.user, book=self.book, chapter=self.chapter, verse=self.verses[0])
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        assert client.get(URL).status_code == 403
+        response = client.post(URL, {'operations': [self.note_op(uuid.uuid4(), self.verses[1])]}, format='json')
+        assert response.status_code == 403
+        assert UserNote.objects.count() == 1
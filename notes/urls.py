@@ -1,12 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserNoteViewSet, BookmarkViewSet, PlayHistoryViewSet
+from .views import UserNoteViewSet, BookmarkViewSet, PlayHistoryViewSet, SyncViewSet
 
 
 router=DefaultRouter()
 router.register(r'notes',UserNoteViewSet, basename='notes')
 router.register(r'bookmarks',BookmarkViewSet,basename='bookmarks')
 router.register(r'history',PlayHistoryViewSet,basename='playhistory')
+router.register(r'sync',SyncViewSet,basename='sync')
 
 urlpatterns = [
     path('',include(router.urls)),
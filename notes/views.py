@@ -1,61 +1,151 @@
+from django.conf import settings
 from django.shortcuts import render
-from rest_framework import viewsets
+from django.utils import timezone
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from core.content_cache import CachedResponseMixin
+from core.eager import EagerLoadingMixin
 from core.middleware import get_current_tenant
 
 from .models import UserNote, Bookmark, PlayHistory
+from .progress import history_scope, progress_buffer
+from .sync import SyncBatch, SyncError, SyncOperationSerializer, changes_since
 from .serializers import (
     UserNoteSerializer,
     BookmarkSerializer,
-    PlayHistorySerializer
+    PlayHistorySerializer,
+    PlayProgressSerializer,
+    RecentPlaySerializer
 )
 
+# Most position reports accepted in one progress request
+PROGRESS_BATCH_LIMIT = 100
+# Default and largest number of "continue listening" entries
+RECENT_HISTORY_LIMIT = 20
+RECENT_HISTORY_MAX_LIMIT = 100
 
-class UserNoteViewSet(viewsets.ModelViewSet):
+
+class UserNoteViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     serializer_class = UserNoteSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        tenant = get_current_tenant()
-        queryset = UserNote.objects.filter(user=self.request.user)
-        if tenant:
-            # Filter by tenant through book relationship
-            queryset = queryset.filter(book__tenant=tenant)
-        return queryset
+        # Scoped through the book (book__tenant)
+        return UserNote.objects.filter(user=self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class BookmarkViewSet(viewsets.ModelViewSet):
+class BookmarkViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     serializer_class = BookmarkSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        tenant = get_current_tenant()
-        queryset = Bookmark.objects.filter(user=self.request.user)
-        if tenant:
-            # Filter by tenant through book relationship
-            queryset = queryset.filter(book__tenant=tenant)
-        return queryset
+        # Scoped through the book (book__tenant)
+        return Bookmark.objects.filter(user=self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)  
 
-class PlayHistoryViewSet(viewsets.ModelViewSet):
+class PlayHistoryViewSet(CachedResponseMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     serializer_class = PlayHistorySerializer
     permission_classes = [IsAuthenticated]
+    cache_per_user = True
+
+    def get_serializer_class(self):
+        if self.action == 'recent':
+            return RecentPlaySerializer
+        return super().get_serializer_class()
+
+    def get_cache_scopes(self):
+        if self.action == 'recent':
+            # Titles and names come from the books and audio content
+            return ('books', 'audio', history_scope(self.request.user.pk))
+        return ()
 
     def get_queryset(self):
-        tenant = get_current_tenant()
-        queryset = PlayHistory.objects.filter(user=self.request.user)
-        if tenant:
-            # Filter by tenant through chapter_audio->chapter->book relationship
-            queryset = queryset.filter(chapter_audio__chapter__book__tenant=tenant)
-        return queryset
+        # Scoped on the chapter audio's denormalized tenant column (single join)
+        return PlayHistory.objects.filter(user=self.request.user)
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)  
-    
+        serializer.save(user=self.request.user, position_at=timezone.now())
+
+    def perform_update(self, serializer):
+        serializer.save(position_at=timezone.now())
+
+    @action(detail=False, methods=['post'])
+    def progress(self, request):
+        """
+        Report playback positions: one ``{chapter_audio, position, at?}``
+        object or a list of them. Positions are buffered and written in
+        batches, latest report winning; answered with 202.
+        """
+        many = isinstance(request.data, list)
+        if many and len(request.data) > PROGRESS_BATCH_LIMIT:
+            raise ValidationError(f'At most {PROGRESS_BATCH_LIMIT} reports per request.')
+        serializer = PlayProgressSerializer(data=request.data, many=many)
+        serializer.is_valid(raise_exception=True)
+        reports = serializer.validated_data if many else [serializer.validated_data]
+        for report in reports:
+            progress_buffer.add(request.user.id, report['chapter_audio'], report['position'], report.get('at'))
+        return Response({'accepted': len(reports)}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False)
+    def recent(self, request):
+        """
+        The user's most recently played audios ("continue listening"), newest
+        first, with chapter, book and reciter; ``?limit=`` up to 100.
+        """
+        return self.cached_response(request, self._recent)
+
+    def _recent(self, request):
+        limit = request.query_params.get('limit', str(RECENT_HISTORY_LIMIT))
+        if not limit.isdigit() or not 0 < int(limit) <= RECENT_HISTORY_MAX_LIMIT:
+            raise ValidationError({'limit': f'Must be between 1 and {RECENT_HISTORY_MAX_LIMIT}.'})
+        # Served by the (user, -updated_at) index
+        queryset = self.filter_queryset(self.get_queryset()).order_by('-updated_at')[:int(limit)]
+        return Response(self.get_serializer(queryset, many=True).data)
+
+
+class SyncViewSet(viewsets.ViewSet):
+    """
+    Offline sync of notes and bookmarks (see notes.sync).
+
+    ``GET`` returns the changes after ``?cursor=``; ``POST`` applies
+    ``{"operations": [...], "cursor": ...}`` in one transaction and returns
+    per-operation results along with the changes after ``cursor``.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        return Response(self._changes(request, request.query_params.get('cursor')))
+
+    def create(self, request):
+        operations = request.data.get('operations') if isinstance(request.data, dict) else None
+        if not isinstance(operations, list):
+            raise ValidationError({'operations': 'A list of operations is required.'})
+        if len(operations) > settings.SYNC_BATCH_LIMIT:
+            raise ValidationError({'operations': f'At most {settings.SYNC_BATCH_LIMIT} operations per request.'})
+        serializer = SyncOperationSerializer(data=operations, many=True)
+        serializer.is_valid(raise_exception=True)
+        try:
+            results = SyncBatch(request.user, get_current_tenant()).apply(serializer.validated_data)
+        except SyncError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response({'results': results, **self._changes(request, request.data.get('cursor'))})
 
+    def _changes(self, request, cursor):
+        limit = request.query_params.get('limit', '')
+        try:
+            changes, cursor, has_more = changes_since(
+                request.user, get_current_tenant(), cursor,
+                min(int(limit), settings.SYNC_PAGE_SIZE) if limit.isdigit() and int(limit) else None,
+            )
+        except ValueError:
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        return {'changes': changes, 'cursor': cursor, 'has_more': has_more}
 